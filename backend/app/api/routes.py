@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import json
 from datetime import datetime
 from typing import Any, Dict
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy import text
 
-from ..db import get_session
+from ..db import engine, get_async_session, get_session
+from ..cache import swr
+from ..settings import get_settings
 from sqlalchemy import text
-from ..models import SettingsRow, Player, Roster, RosterStatus, Projection, LineupResult, WaiverRec, TradeEval
+from ..models import DEFAULT_LEAGUE, League, Player, Roster, RosterStatus, Projection
 from ..schemas import (
+    LeagueIn,
     SettingsIn,
     RosterImportRequest,
     LineupResponse,
@@ -18,27 +25,62 @@ from ..schemas import (
     TradeRequest,
     TradeResponse,
 )
-from ..services.projections import blend_projections
+from ..services.projections import BLENDED, write_blended
+from ..services.projection_history import projections_as_of
 from ..services.optimizer import optimize_lineup
-from ..services.waivers import waiver_suggestions
+from ..services.waivers import free_agent_filter, waiver_suggestions
 from ..services.trades import evaluate_trade
 from ..services.draft import best_picks_by_position
 from ..services.alerts import send_slack_message
+from ..services.changes import changes_since
+from ..services.duplicates import MIN_CONFIDENCE, duplicate_candidates, merge_duplicate_players
+from ..services.dashboard import dashboard_payload, mark_dashboard_dirty, refresh_dashboard
+from ..services.results import compact_results, result_writer
+from ..services.leagues import (
+    create_league,
+    current_week_async,
+    get_settings_row_async,
+    league_to_dict,
+    risk_lambda,
+    save_league_settings,
+)
 from ..services import sportsdata as sdata
 from ..services.schedule import upsert_game, fetch_weather_for_week
 from ..auth import create_token, auth_required, hash_password, verify_password
 from ..models import User
-from ..models import Roster, Player, RosterStatus, Injury, SettingsRow
+from ..models import Job, LeagueTeam, PipelineRun, ScheduledRun
+from ..jobs.queue import TERMINAL, DuplicateJob, enqueue, job_to_dict, request_cancel
+from ..jobs.dag import run_to_dict
+from ..jobs.leader import INSTANCE, elector
+from ..jobs.pipelines import UPDATE_EVERYTHING
+from ..models import Roster, Player, RosterStatus, Injury
 from ingest.providers import fantasypros as fp_provider
 from ingest.providers import espn as espn_provider
 from ingest.providers import injuries as injuries_provider
 from ingest.providers import adp as adp_provider
 from ingest.providers import espn as espn_provider
-from ingest.providers import dvp as dvp_provider
+from ingest.roster_csv import import_roster_csv
 
 
 router = APIRouter(prefix="/api")
 
+# Leagues are never deleted, so a league seen once needs no further lookups
+_known_leagues = {DEFAULT_LEAGUE}
+
+
+async def league_scope(
+    league_id: int | None = None,
+    x_league_id: int | None = Header(default=None),
+    session: AsyncSession = Depends(get_async_session),
+) -> int:
+    """League of the request: ``?league_id=`` or the ``X-League-Id`` header, else the default league."""
+    lid = league_id or x_league_id or DEFAULT_LEAGUE
+    if lid not in _known_leagues:
+        if await session.get(League, lid) is None:
+            raise HTTPException(status_code=404, detail=f"league {lid} not found")
+        _known_leagues.add(lid)
+    return lid
+
 
 @router.get("/healthz")
 def healthz() -> Dict[str, str]:
@@ -82,71 +124,55 @@ def auth_register(body: Dict[str, str], session: Session = Depends(get_session))
     return {"ok": True, "token": token}
 
 
+@router.get("/leagues")
+def list_leagues(session: Session = Depends(get_session)) -> Dict[str, Any]:
+    return {"leagues": [league_to_dict(lg) for lg in session.exec(select(League).order_by(League.id)).all()]}
+
+
+@router.post("/leagues", status_code=201)
+def add_league(payload: LeagueIn, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    league = create_league(session, payload.name, payload.espn_league_id, payload.espn_team_id, data=payload.data)
+    _known_leagues.add(league.id)
+    return league_to_dict(league)
+
+
 @router.post("/settings")
-def save_settings(payload: SettingsIn, session: Session = Depends(get_session)) -> Dict[str, Any]:
-    row = session.get(SettingsRow, 1)
-    if not row:
-        row = SettingsRow(id=1, data=payload.data)
-        session.add(row)
-    else:
-        row.data = payload.data
+def save_settings(payload: SettingsIn, league_id: int = Depends(league_scope), session: Session = Depends(get_session)) -> Dict[str, Any]:
+    old = save_league_settings(session, league_id, payload.data)
     session.commit()
+    if league_id == DEFAULT_LEAGUE and payload.data.get("weights") != old.get("weights"):
+        # Weight changes don't touch projection rows, so re-blend the current week in full.
+        # Blended rows are shared: only the default league's weights feed them.
+        write_blended(session, int(payload.data.get("current_week", 1)), full=True)
+        session.commit()
     return {"ok": True}
 
 
 @router.get("/settings")
-def get_settings_api(session: Session = Depends(get_session)) -> Dict[str, Any]:
-    row = session.get(SettingsRow, 1)
+async def get_settings_api(league_id: int = Depends(league_scope), session: AsyncSession = Depends(get_async_session)) -> Dict[str, Any]:
+    row = await get_settings_row_async(session, league_id)
     return {"data": (row.data if row else {})}
 
 
 @router.post("/roster/import")
-def import_roster(req: RosterImportRequest, session: Session = Depends(get_session)) -> Dict[str, Any]:
-    # Expect CSV header: name,position,team,status
-    added = 0
-    lines = [ln.strip() for ln in req.csv.strip().splitlines() if ln.strip()]
-    if not lines:
+def import_roster(
+    req: RosterImportRequest, create_missing: bool = False, league_id: int = Depends(league_scope), session: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    # CSV header: name,position,team,status[,my_team]; one transaction, bad rows reported
+    if not req.csv.strip():
         raise HTTPException(400, "Empty CSV")
-    header = [h.strip().lower() for h in lines[0].split(",")]
-    for line in lines[1:]:
-        cols = [c.strip() for c in line.split(",")]
-        row = dict(zip(header, cols))
-        name = row.get("name")
-        pos = row.get("position", "FLEX").upper()
-        team = row.get("team")
-        status = row.get("status", "bench").lower()
-        if not name:
-            continue
-        player = session.exec(select(Player).where(Player.name == name)).first()
-        if not player:
-            player = Player(name=name, position=pos, team=team)
-            session.add(player)
-            session.flush()
-        roster = session.exec(select(Roster).where(Roster.player_id == player.id)).first()
-        if not roster:
-            roster = Roster(player_id=player.id, status=RosterStatus(status), my_team=True)
-            session.add(roster)
-        else:
-            roster.status = RosterStatus(status)
-        added += 1
+    res = import_roster_csv(session, req.csv, create_missing=create_missing, league_id=league_id)
     session.commit()
-    return {"ok": True, "count": added}
+    return res
 
 
 @router.post("/projections/update")
-def update_projections(week: int, session: Session = Depends(get_session)) -> Dict[str, Any]:
-    # Assume ingest has inserted source-specific projections; compute blended and store/override source 'blended'
-    blended = blend_projections(session, week)
-    for pid, data in blended.items():
-        # Upsert as source 'blended'
-        row = session.exec(select(Projection).where(Projection.player_id == pid, Projection.week == week, Projection.source == "blended")).first()
-        if not row:
-            row = Projection(player_id=pid, week=week, source="blended", expected=data["expected"], stdev=1.5)
-            session.add(row)
-        else:
-            row.expected = data["expected"]
+def update_projections(week: int, full: bool = False, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    # Assume ingest has inserted source-specific projections; re-blend players whose sources changed
+    # (or everyone with full=true) and store/override source 'blended'
+    count = write_blended(session, week, full=full)
     session.commit()
-    return {"ok": True, "blended_count": len(blended)}
+    return {"ok": True, "blended_count": count}
 
 
 @router.post("/projections/ingest-blend")
@@ -165,28 +191,43 @@ def ingest_and_blend(week: int, session: Session = Depends(get_session)) -> Dict
     c_adp_fp = adp_provider.fetch_adp(session)
     c_adp_espn = espn_provider.fetch_adp(session)
     session.commit()
-    blended = blend_projections(session, week)
-    for pid, data in blended.items():
-        row = session.exec(select(Projection).where(Projection.player_id == pid, Projection.week == week, Projection.source == "blended")).first()
-        if not row:
-            session.add(Projection(player_id=pid, week=week, source="blended", expected=data["expected"], stdev=1.5))
-        else:
-            row.expected = data["expected"]
+    blended = write_blended(session, week)
     session.commit()
-    return {"ok": True, "counts": {"fantasypros": c_fp, "espn": c_espn, "sportsdata_proj": c_sd_proj, "yahoo_proj": c_yahoo_proj, "injuries": c_inj, "adp_fp": c_adp_fp, "adp_espn": c_adp_espn}, "blended": len(blended)}
+    refresh_dashboard(session, week)
+    return {"ok": True, "counts": {"fantasypros": c_fp, "espn": c_espn, "sportsdata_proj": c_sd_proj, "yahoo_proj": c_yahoo_proj, "injuries": c_inj, "adp_fp": c_adp_fp, "adp_espn": c_adp_espn}, "blended": blended}
+
+
+@router.get("/projections/as-of")
+def projections_at(
+    week: int, at: datetime | None = None, source: str | None = None, season: int | None = None, session: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    # Week's projections as they stood at `at` (default: now), from the append-only history
+    at = at or datetime.utcnow()
+    rows = projections_as_of(session, week, at, season=season, source=source)
+    return {
+        "week": week,
+        "season": season or get_settings().season,
+        "at": at.isoformat(),
+        "count": len(rows),
+        "projections": [
+            {"player_id": r.player_id, "source": r.source, "expected": r.expected, "stdev": r.stdev, "recorded_at": r.recorded_at.isoformat()}
+            for r in rows
+        ],
+    }
 
 
 @router.get("/lineup/optimal", response_model=LineupResponse)
-def lineup_optimal(week: int, objective: str = "risk", stack: bool = False, session: Session = Depends(get_session)) -> LineupResponse:
-    result = optimize_lineup(session, week=week, objective=objective, lam=0.35, stack_bonus=stack)
-    # Save result
-    session.add(LineupResult(week=week, objective=objective, results_json=result))
-    session.commit()
+def lineup_optimal(
+    week: int, objective: str = "risk", stack: bool = False, league_id: int = Depends(league_scope), session: Session = Depends(get_session)
+) -> LineupResponse:
+    result = optimize_lineup(session, week=week, objective=objective, lam=risk_lambda(session, league_id), stack_bonus=stack, league_id=league_id)
+    # Saved in the background (batched, deduplicated); the response doesn't wait on a commit
+    result_writer.submit("lineup", result, league_id=league_id, week=week, objective=objective)
     return LineupResponse(**result)
 
 
 @router.post("/whatif/lineup", response_model=LineupResponse)
-def whatif_lineup(req: WhatIfRequest, session: Session = Depends(get_session)) -> LineupResponse:
+def whatif_lineup(req: WhatIfRequest, league_id: int = Depends(league_scope), session: Session = Depends(get_session)) -> LineupResponse:
     # Apply overrides temporarily
     overrides = req.overrides or {}
     touched = []
@@ -197,7 +238,7 @@ def whatif_lineup(req: WhatIfRequest, session: Session = Depends(get_session)) -
             row.expected = o.get("expected", row.expected)
             row.stdev = o.get("stdev", row.stdev)
     session.commit()
-    result = optimize_lineup(session, week=req.week, objective=req.objective, lam=req.lambda_risk, stack_bonus=False)
+    result = optimize_lineup(session, week=req.week, objective=req.objective, lam=req.lambda_risk, stack_bonus=False, league_id=league_id)
     # Revert overrides
     for row, exp, sd in touched:
         row.expected = exp
@@ -207,18 +248,16 @@ def whatif_lineup(req: WhatIfRequest, session: Session = Depends(get_session)) -
 
 
 @router.get("/waivers/suggestions")
-def waivers(week: int, session: Session = Depends(get_session)) -> Dict[str, Any]:
-    recs = waiver_suggestions(session, week)
-    session.add(WaiverRec(week=week, data={"recs": recs}))
-    session.commit()
+def waivers(week: int, league_id: int = Depends(league_scope), session: Session = Depends(get_session)) -> Dict[str, Any]:
+    recs = waiver_suggestions(session, week, league_id=league_id)
+    result_writer.submit("waivers", {"recs": recs}, league_id=league_id, week=week)
     return {"recs": recs}
 
 
 @router.post("/trades/evaluate", response_model=TradeResponse)
-def trade_eval(req: TradeRequest, week: int = 1, session: Session = Depends(get_session)) -> TradeResponse:
+def trade_eval(req: TradeRequest, week: int = 1, league_id: int = Depends(league_scope), session: Session = Depends(get_session)) -> TradeResponse:
     data = evaluate_trade(session, week, req.players_in, req.players_out)
-    session.add(TradeEval(data=data))
-    session.commit()
+    result_writer.submit("trade", data, league_id=league_id)
     return TradeResponse(**data)
 
 
@@ -234,91 +273,47 @@ async def alerts_test() -> Dict[str, Any]:
 
 
 @router.post("/espn/import-roster")
-def espn_import_roster(week: int = 1, session: Session = Depends(get_session)) -> Dict[str, Any]:
-    res = espn_provider.fetch_private_roster(session, week=week)
+def espn_import_roster(
+    week: int = 1, refresh: bool = False, league_id: int = Depends(league_scope), session: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    league = session.get(League, league_id)
+    error = espn_provider.league_config_error(espn_league_id=league.espn_league_id, espn_team_id=league.espn_team_id)
+    if error:
+        return {"ok": False, "error": error}
+    # League JSON is served stale-while-revalidate; refresh=true forces a download
+    settings = get_settings()
+    espn_league_id = league.espn_league_id or settings.league_id
+    data, freshness = swr.get(
+        f"espn:league:{espn_league_id}:{week}",
+        lambda: espn_provider.fetch_league_json(week, espn_league_id=espn_league_id),
+        ttl=settings.league_json_ttl_s,
+        force=refresh,
+    )
+    res = espn_provider.apply_private_roster(session, data, league_id=league_id, team_id=league.espn_team_id)
+    mark_dashboard_dirty(session, "roster", league_id=league_id)
     session.commit()
-    return res
+    return {**res, "freshness": freshness}
 
 
-def _norm_name(s: str) -> str:
-    s = (s or "").strip().lower()
-    for ch in ["’", "‘", "`", "´", "–", "—"]:
-        s = s.replace(ch, "'")
-    # strip trailing team abbreviations or dst
-    import re as _re
-    s = _re.sub(r"\s+(?:[a-z]{2,3}|d\/st|dst)$", "", s)
-    s = _re.sub(r"\b(jr|sr|ii|iii|iv|v)\.?$", "", s)
-    while "  " in s:
-        s = s.replace("  ", " ")
-    return s
+@router.post("/admin/cleanup/merge-duplicates")
+def merge_duplicates(dry_run: bool = False, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    # Set-based, one transaction; dry_run=true reports what would change
+    return merge_duplicate_players(session, dry_run=dry_run)
 
 
-@router.post("/admin/cleanup/merge-duplicates")
-def merge_duplicates(session: Session = Depends(get_session)) -> Dict[str, Any]:
-    players = session.exec(select(Player)).all()
-    groups: Dict[str, list[Player]] = {}
-    for p in players:
-        groups.setdefault(_norm_name(p.name), []).append(p)
-    details = []
-    merged = 0
-    for key, plist in groups.items():
-        if len(plist) <= 1:
-            continue
-        # choose canonical: prefer with espn_id, then with most projections, else lowest id
-        # precompute projection counts
-        proj_counts: Dict[int, int] = {}
-        for (cnt_pid, cnt) in session.exec(text("select player_id, count(*) from projection group by player_id")).all():
-            proj_counts[int(cnt_pid)] = int(cnt)
-        def score(p: Player) -> tuple:
-            return (1 if p.espn_id else 0, proj_counts.get(p.id or -1, 0), -(p.id or 0))
-        canonical = sorted(plist, key=score, reverse=True)[0]
-        dup_ids = [p.id for p in plist if p.id != canonical.id]
-        if not dup_ids:
-            continue
-        # If canonical lacks team/position, fill from a duplicate
-        if not canonical.team:
-            for p in plist:
-                if p.team:
-                    canonical.team = p.team
-                    break
-        if (not canonical.position) or canonical.position == "FLEX":
-            for p in plist:
-                if p.position and p.position != "FLEX":
-                    canonical.position = p.position
-                    break
-        # Re-point foreign keys in bulk
-        for table in ("roster", "projection", "injury", "adp"):
-            for dup_id in dup_ids:
-                session.exec(text(f"update {table} set player_id = :canon where player_id = :dup").bindparams(canon=canonical.id, dup=dup_id))
-        # Deduplicate ADP by keeping most recent per source for canonical
-        session.exec(text(
-            "delete from adp a using adp b "
-            "where a.player_id = :pid and b.player_id = :pid and a.source = b.source and a.updated_at < b.updated_at"
-        ).bindparams(pid=canonical.id))
-        # Deduplicate Projections by keeping most recent per (week,source)
-        session.exec(text(
-            "delete from projection a using projection b "
-            "where a.player_id = :pid and b.player_id = :pid and a.week = b.week and a.source = b.source and a.updated_at < b.updated_at"
-        ).bindparams(pid=canonical.id))
-        # Delete duplicate player rows
-        for dup_id in dup_ids:
-            session.exec(text("delete from player where id = :dup").bindparams(dup=dup_id))
-        session.commit()
-        details.append({"name": canonical.name, "canonical_id": canonical.id, "removed_ids": dup_ids})
-        merged += 1
-    return {"merged_groups": merged, "details": details}
+@router.post("/admin/results/compact")
+def compact_saved_results(session: Session = Depends(get_session)) -> Dict[str, Any]:
+    # Write out buffered results, then trim every week/objective to the retention policy
+    result_writer.flush()
+    deleted = compact_results(session)
+    session.commit()
+    return {"ok": True, "deleted": deleted, "writer": result_writer.stats}
 
 
 @router.get("/admin/duplicates")
-def list_duplicates(session: Session = Depends(get_session)) -> Dict[str, Any]:
-    players = session.exec(select(Player)).all()
-    groups: Dict[str, list[dict]] = {}
-    for p in players:
-        key = _norm_name(p.name)
-        entry = {"id": p.id, "name": p.name, "team": p.team, "position": p.position}
-        groups.setdefault(key, []).append(entry)
-    dups = {k:v for k,v in groups.items() if len(v) > 1}
-    return {"duplicate_groups": dups}
+def list_duplicates(min_confidence: float = MIN_CONFIDENCE, limit: int = 200, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    # Ranked fuzzy merge candidates (blocked by position/team/surname)
+    return duplicate_candidates(session, min_confidence=min_confidence, limit=limit)
 
 
 @router.post("/admin/schedule/import")
@@ -347,6 +342,7 @@ def import_schedule(csv: str, week: int, session: Session = Depends(get_session)
             continue
         upsert_game(session, week=week, team=team.upper(), opponent=(opponent or None), home=home, kickoff_utc=kickoff)
         added += 1
+    mark_dashboard_dirty(session, "schedule", week=week)
     session.commit()
     return {"ok": True, "imported": added}
 
@@ -358,8 +354,10 @@ async def update_weather(week: int, session: Session = Depends(get_session)) ->
 
 
 @router.get("/roster/my")
-def my_roster(session: Session = Depends(get_session)) -> Dict[str, Any]:
-    rows = session.exec(select(Roster, Player).join(Player, Roster.player_id == Player.id).where(Roster.my_team == True)).all()
+async def my_roster(league_id: int = Depends(league_scope), session: AsyncSession = Depends(get_async_session)) -> Dict[str, Any]:
+    rows = (await session.exec(
+        select(Roster, Player).join(Player, Roster.player_id == Player.id).where(Roster.league_id == league_id, Roster.my_team == True)  # noqa: E712
+    )).all()
     data = []
     for r, p in rows:
         data.append({
@@ -372,16 +370,77 @@ def my_roster(session: Session = Depends(get_session)) -> Dict[str, Any]:
     return {"roster": data}
 
 
+@router.get("/league/rosters")
+async def league_rosters(league_id: int = Depends(league_scope), session: AsyncSession = Depends(get_async_session)) -> Dict[str, Any]:
+    # Every league team's roster as of the last ESPN league import
+    teams = {t.id: {"id": t.id, "name": t.name, "abbrev": t.abbrev, "is_mine": t.is_mine, "roster": []}
+             for t in (await session.exec(select(LeagueTeam).where(LeagueTeam.league_id == league_id).order_by(LeagueTeam.id))).all()}
+    rows = (await session.exec(
+        select(Roster, Player).join(Player, Roster.player_id == Player.id)
+        .where(Roster.league_id == league_id, Roster.league_team_id.is_not(None))
+    )).all()
+    for r, p in rows:
+        if r.league_team_id in teams:
+            teams[r.league_team_id]["roster"].append(
+                {"player_id": p.id, "name": p.name, "team": p.team, "position": p.position, "status": r.status.value}
+            )
+    return {"teams": list(teams.values())}
+
+
+@router.get("/league/free-agents")
+async def league_free_agents(
+    position: str | None = None, limit: int = 50, league_id: int = Depends(league_scope), session: AsyncSession = Depends(get_async_session)
+) -> Dict[str, Any]:
+    # Players on no league roster, best blended projection for the current week first
+    week = await current_week_async(session, league_id)
+    stmt = (
+        select(Player, Projection.expected)
+        .join(Projection, (Projection.player_id == Player.id) & (Projection.week == week) & (Projection.source == BLENDED), isouter=True)
+        .where(free_agent_filter(league_id))
+        .order_by(Projection.expected.desc().nulls_last(), Player.id)
+        .limit(max(1, min(limit, 500)))
+    )
+    if position:
+        stmt = stmt.where(Player.position == position.upper())
+    rows = (await session.exec(stmt)).all()
+    return {
+        "week": week,
+        "free_agents": [
+            {"player_id": p.id, "name": p.name, "team": p.team, "position": p.position, "expected": expected}
+            for p, expected in rows
+        ],
+    }
+
+
+@router.get("/changes")
+def list_changes(since: int = 0, kinds: str | None = None, limit: int = 200, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    # Incremental feed: clients pass back the returned cursor to fetch only newer events;
+    # events too recent to be sure no earlier id is still committing wait for the next poll
+    kind_list = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    events = changes_since(session, since, kinds=kind_list, limit=max(1, min(limit, 1000)))
+    pids = {e.player_id for e in events if e.player_id is not None}
+    names = dict(session.exec(select(Player.id, Player.name).where(Player.id.in_(pids))).all()) if pids else {}
+    return {
+        "cursor": events[-1].id if events else since,
+        "changes": [
+            {"id": e.id, "kind": e.kind, "week": e.week, "player_id": e.player_id, "player": names.get(e.player_id), "data": e.data, "created_at": e.created_at.isoformat()}
+            for e in events
+        ],
+    }
+
+
 @router.get("/news/my-players")
-def news_my_players(session: Session = Depends(get_session)) -> Dict[str, Any]:
-    settings = session.get(SettingsRow, 1)
-    current_week = int((settings.data or {}).get("current_week", 1)) if settings else 1
-    roster_rows = session.exec(select(Roster.player_id).where(Roster.my_team == True)).all()
-    pids = [(row[0] if isinstance(row, tuple) else row) for row in roster_rows]
+async def news_my_players(league_id: int = Depends(league_scope), session: AsyncSession = Depends(get_async_session)) -> Dict[str, Any]:
+    current_week = await current_week_async(session, league_id)
+    roster_players = (await session.exec(
+        select(Player).join(Roster, Roster.player_id == Player.id).where(Roster.league_id == league_id, Roster.my_team == True)  # noqa: E712
+    )).all()
+    pid_to_player = {p.id: p for p in roster_players}
+    pids = list(pid_to_player)
     items: list[dict] = []
     if pids:
         # Always include injury notes stored locally
-        inj = session.exec(select(Injury, Player).join(Player, Injury.player_id == Player.id).where(Injury.week == current_week, Injury.player_id.in_(pids))).all()
+        inj = (await session.exec(select(Injury, Player).join(Player, Injury.player_id == Player.id).where(Injury.week == current_week, Injury.player_id.in_(pids)))).all()
         for i, p in inj:
             if i.status or i.note:
                 items.append({
@@ -393,17 +452,14 @@ def news_my_players(session: Session = Depends(get_session)) -> Dict[str, Any]:
                     "week": current_week,
                     "kind": "injury",
                 })
-        # If SportsData.io key configured, enrich with recent player news
+        # If SportsData.io key configured, enrich with recent player news (per-team TTL cache)
         try:
-            # Unique teams from my roster
-            teams = [t for (t,) in session.exec(select(Player.team).join(Roster, Roster.player_id == Player.id).where(Roster.my_team == True)).all() if t]
-            team_news = sdata.news_by_teams(teams)
-            # Map pid -> player record
-            pid_to_player = {p.id: p for p in session.exec(select(Player).where(Player.id.in_(pids))).all()}
+            team_news = await sdata.news_by_teams_async(p.team for p in roster_players)
+            # One pass over the news for all rostered names
+            by_player = sdata.NameMatcher({pid: p.name for pid, p in pid_to_player.items()}).group(team_news)
             matched_any = False
             for pid, p in pid_to_player.items():
-                pitems = sdata.extract_player_news(team_news, p.name)
-                for it in pitems[:3]:  # cap per player to avoid flood
+                for it in by_player.get(pid, [])[:3]:  # cap per player to avoid flood
                     items.append({
                         "player_id": pid,
                         "name": p.name,
@@ -434,149 +490,125 @@ def news_my_players(session: Session = Depends(get_session)) -> Dict[str, Any]:
 
 @router.get("/standings")
 def standings(session: Session = Depends(get_session)) -> Dict[str, Any]:
+    freshness = None
     try:
-        table = espn_provider.fetch_standings()
+        settings = get_settings()
+        table, freshness = swr.get(f"espn:standings:{settings.league_id}", espn_provider.fetch_standings, ttl=settings.standings_ttl_s)
         if table:
-            return {"table": table, "source": "espn"}
+            return {"table": table, "source": "espn", "freshness": freshness}
     except Exception:
         pass
     table = [{"team": "Standings unavailable", "record": "-", "points_for": 0}]
-    return {"table": table, "source": "placeholder"}
+    return {"table": table, "source": "placeholder", "freshness": freshness}
 
 
 @router.get("/dashboard/cards")
-def dashboard_cards(session: Session = Depends(get_session)) -> Dict[str, Any]:
-    # Compose a set of carousel cards for the dashboard
-    settings = session.get(SettingsRow, 1)
-    week = int((settings.data or {}).get("current_week", 1)) if settings else 1
-    # Injury timelines
-    inj = session.exec(select(Injury, Player).join(Player, Injury.player_id == Player.id).where(Injury.week == week)).all()
-    injury_cards = []
-    for i, p in inj:
-        if i.status or i.note:
-            tag = 'Expected to play' if (i.status or '').lower()== 'questionable' and (i.note or '').lower().find('expected')>=0 else (i.status or 'Update')
-            injury_cards.append({"type":"injury","player":p.name,"team":p.team,"tag":tag,"status": i.status, "note":i.note,"timestamp":i.updated_at.isoformat()})
-    # Bye week alerts
-    bye_cards = []
-    starters = session.exec(select(Roster, Player).join(Player, Roster.player_id==Player.id).where(Roster.my_team==True, Roster.status==RosterStatus.start)).all()
-    for r, p in starters:
-        if p.bye_week and p.bye_week == week+1:
-            # find bench replacement same position
-            bench = session.exec(select(Roster, Player).join(Player, Roster.player_id==Player.id).where(Roster.my_team==True, Roster.status==RosterStatus.bench, Player.position==p.position)).all()
-            repl = bench[0][1].name if bench else None
-            bye_cards.append({"type":"bye","player":p.name,"team":p.team,"position":p.position,"bye_week":p.bye_week,"replacement":repl})
-    # Weather warnings (high wind / heavy rain) for starters
-    from ..models import Game
-    team_games = {g.team: g for g in session.exec(select(Game).where(Game.week==week)).all()}
-    weather_cards = []
-    for r,p in starters:
-        g = team_games.get(p.team or "")
-        wx = g.weather if g else None
-        if wx:
-            wind = (wx.get('wind_kmh') or 0)
-            precip = (wx.get('precip_prob') or 0)
-            if (p.position in ('QB','K') and wind and wind>=25) or (precip and precip>=60):
-                weather_cards.append({"type":"weather","player":p.name,"team":p.team,"wx":wx})
-    # Late swap reminders
-    swap_cards = []
-    import datetime as _dt
-    for r,p in starters:
-        g = team_games.get(p.team or "")
-        if g and g.kickoff_utc and g.kickoff_utc.weekday()==6 and g.kickoff_utc.hour>=20:
-            swap_cards.append({"type":"late_swap","player":p.name,"team":p.team,"kickoff":g.kickoff_utc.isoformat()})
-    # Waiver watchlist (top 3)
-    from ..services.waivers import waiver_suggestions
-    ww = waiver_suggestions(session, week)
-    waiver_cards = [{"type":"waiver","name":w['name'],"team":w['position'],"vorp_delta":w['vorp_delta'],"faab":w['faab_bid']} for w in ww[:3]]
-    # Trade pulse (simple pulse using vorp totals)
-    from ..services.vorp import compute_vorp
-    vorp = compute_vorp(session, week)
-    my_ids = [r.player_id for r in session.exec(select(Roster).where(Roster.my_team==True)).all()]
-    total_vorp = sum(vorp.get(pid,0) for pid in my_ids)
-    trade_cards = [{"type":"trade_pulse","summary":f"Roster VORP total {round(total_vorp,1)} — Explore 1-2 upgrades at weakest positions."}]
-    # Matchup (S.o.S via DVP): flag easy (rank high fp allowed) or tough (rank low fp allowed)
-    from ..models import DVP
-    matchup_cards = []
-    dvp_map: Dict[tuple, DVP] = {}
-    for d in session.exec(select(DVP)).all():
-        dvp_map[(d.team, d.position)] = d
-    for r,p in starters:
-        g = team_games.get(p.team or "")
-        opp = g.opponent if g else None
-        if opp:
-            d = dvp_map.get((opp, p.position))
-            if d and d.rank:
-                # Assume higher rank = easier (more points allowed). Thresholds: top 10 easy, bottom 10 tough
-                tag = None
-                if d.rank <= 10:
-                    tag = "🔥 Easy matchup"
-                elif d.rank >= 23:
-                    tag = "🧊 Tough matchup"
-                if tag:
-                    matchup_cards.append({"type":"matchup","player":p.name,"team":p.team,"position":p.position,"opponent":opp,"rank":d.rank,"fp_allowed":d.fp_allowed,"tag":tag})
-    return {"injuries": injury_cards, "byes": bye_cards, "weather": weather_cards, "late_swap": swap_cards, "waivers": waiver_cards, "trade": trade_cards, "matchups": matchup_cards}
-
-
-@router.post("/admin/update-everything")
-def update_everything(week: int, body: Dict[str, Any] | None = None, session: Session = Depends(get_session)) -> Dict[str, Any]:
+async def dashboard_cards(request: Request, league_id: int = Depends(league_scope), session: AsyncSession = Depends(get_async_session)) -> Any:
+    # Served from the per-league, per-week snapshot (services/dashboard.py); unchanged data -> 304
+    week = await current_week_async(session, league_id)
+    # In-memory hit: no further queries; a miss reads (or rebuilds) the snapshot
+    tag, sections = await session.run_sync(lambda s: dashboard_payload(s, week, league_id))
+    etag = f'"{tag}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(sections, headers=headers)
+
+
+@router.post("/admin/update-everything", status_code=202)
+def update_everything(
+    week: int, body: Dict[str, Any] | None = None, league_id: int = Depends(league_scope), session: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    # Runs as a background job; poll /api/jobs/{id} or stream /api/jobs/{id}/events
     body = body or {}
-    # Ingest
-    c_fp = fp_provider.fetch_projections(session, week)
-    c_espn = espn_provider.fetch_projections(session, week)
-    c_sd_proj = sdata.fetch_projections(session, week)
+    params = {"schedule_csv": body.get("schedule_csv")} if body.get("schedule_csv") else {}
     try:
-        from ingest.providers import yahoo as yahoo_provider
-        c_yahoo_proj = yahoo_provider.fetch_projections(session, week)
-    except Exception:
-        c_yahoo_proj = 0
-    injuries_provider.fetch_injuries(session, week)
-    adp_fp = adp_provider.fetch_adp(session)
-    adp_es = espn_provider.fetch_adp(session)
-    try:
-      dvp_count = dvp_provider.fetch_dvp(session)
-    except Exception:
-      dvp_count = 0
-    # Optional SportsData.io injuries
-    sd_inj = 0
-    try:
-        sd_inj = sdata.fetch_injuries(session, week)
-    except Exception:
-        sd_inj = 0
-    session.commit()
-    # Optional schedule import
-    sched_csv = body.get("schedule_csv")
-    imported = 0
-    if sched_csv:
-        lines = [ln.strip() for ln in sched_csv.strip().splitlines() if ln.strip()]
-        header = [h.strip().lower() for h in lines[0].split(",")]
-        from datetime import datetime
-        for line in lines[1:]:
-            cols=[c.strip() for c in line.split(",")]
-            row=dict(zip(header, cols))
-            team=row.get('team'); opp=row.get('opponent'); home=row.get('home','1') in ('1','true','TRUE','yes'); ko=row.get('kickoff_iso')
-            dt=None
-            if ko:
-                try: dt=datetime.fromisoformat(ko)
-                except: dt=None
-            if team:
-                upsert_game(session, week=week, team=team.upper(), opponent=(opp or None), home=home, kickoff_utc=dt)
-                imported+=1
-        session.commit()
-    # Blend
-    blended = blend_projections(session, week)
-    for pid, data_b in blended.items():
-        row = session.exec(select(Projection).where(Projection.player_id == pid, Projection.week == week, Projection.source == "blended")).first()
-        if not row:
-            session.add(Projection(player_id=pid, week=week, source="blended", expected=data_b["expected"], stdev=1.5))
-        else:
-            row.expected = data_b["expected"]
-    session.commit()
-    # Weather: run async fetch from thread context safely
-    import anyio
-    anyio.from_thread.run(fetch_weather_for_week, session, week)
-    # Optimize
-    result = optimize_lineup(session, week=week, objective="risk", lam=0.35, stack_bonus=True)
-    return {"ok": True, "counts": {"fp_proj": c_fp, "espn_proj": c_espn, "sportsdata_proj": c_sd_proj, "yahoo_proj": c_yahoo_proj, "adp_fp": adp_fp, "adp_espn": adp_es, "dvp": dvp_count, "sportsdata_inj": sd_inj, "schedule_imported": imported, "blended": len(blended)}, "lineup": result}
+        job = enqueue(session, UPDATE_EVERYTHING, week=week, params=params, league_id=league_id)
+    except DuplicateJob as e:
+        raise HTTPException(status_code=409, detail={"error": "already running", "job_id": e.job_id})
+    return {"ok": True, "job_id": job.id, "status": job.status.value}
+
+
+@router.get("/jobs")
+def list_jobs(kind: str | None = None, league_id: int | None = None, limit: int = 20, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    stmt = select(Job).order_by(Job.id.desc()).limit(max(1, min(limit, 200)))
+    if kind:
+        stmt = stmt.where(Job.kind == kind)
+    if league_id is not None:
+        stmt = stmt.where(Job.league_id == league_id)
+    return {"jobs": [job_to_dict(j) for j in session.exec(stmt).all()]}
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: int, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    job = session.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job_to_dict(job)
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: int, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    job = request_cancel(session, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job_to_dict(job)
+
+
+def _job_snapshot(job_id: int) -> Dict[str, Any] | None:
+    # Sync DB read for the SSE poll; run via ``asyncio.to_thread`` so it stays off the event loop.
+    with Session(engine) as session:
+        job = session.get(Job, job_id)
+        return job_to_dict(job) if job is not None else None
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: int) -> StreamingResponse:
+    """Server-sent events: one ``data:`` line per change of the job, until it finishes."""
+    if await asyncio.to_thread(_job_snapshot, job_id) is None:
+        raise HTTPException(status_code=404, detail="job not found")
+
+    async def stream():
+        last = None
+        while True:
+            data = await asyncio.to_thread(_job_snapshot, job_id)
+            if data is None:
+                return
+            payload = json.dumps(data)
+            if payload != last:
+                last = payload
+                yield f"data: {payload}\n\n"
+            if data["status"] in {s.value for s in TERMINAL}:
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/scheduler/status")
+def scheduler_status(limit: int = 20, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    """Whether this process leads the scheduler, plus the latest recorded cron runs."""
+    runs = session.exec(select(ScheduledRun).order_by(ScheduledRun.id.desc()).limit(max(1, min(limit, 200)))).all()
+    return {
+        "instance": INSTANCE,
+        "leader": elector.is_leader,
+        "runs": [
+            {"id": r.id, "job": r.job, "scheduled_for": r.scheduled_for.isoformat(), "instance": r.instance, "status": r.status,
+             "error": r.error, "started_at": r.started_at.isoformat(), "duration_ms": r.duration_ms}
+            for r in runs
+        ],
+    }
+
+
+@router.get("/pipeline/runs")
+def pipeline_runs(pipeline: str | None = None, week: int | None = None, limit: int = 20, session: Session = Depends(get_session)) -> Dict[str, Any]:
+    """Recent stage-graph runs with per-stage status and timings."""
+    stmt = select(PipelineRun).order_by(PipelineRun.id.desc()).limit(max(1, min(limit, 200)))
+    if pipeline:
+        stmt = stmt.where(PipelineRun.pipeline == pipeline)
+    if week is not None:
+        stmt = stmt.where(PipelineRun.week == week)
+    return {"runs": [run_to_dict(r) for r in session.exec(stmt).all()]}
 
 
 @router.post("/admin/backfill-teams")
@@ -0,0 +1,179 @@
+"""
+In-process caches.
+
+``TaggedCache`` memoizes values derived from our own tables (VORP, dashboard
+payloads). Entries carry (data kind, week) tags and are evicted by the
+invalidation bus (see ``invalidation.py``) when any worker writes that data.
+
+``SWRCache`` is a stale-while-revalidate cache for slow external reads (ESPN
+standings, league JSON).
+
+``swr.get(key, loader, ttl)`` returns ``(value, freshness)``:
+
+- fresh entry: served from memory;
+- stale entry: served from memory right away while one background refresh runs;
+- missing entry (or older than ``max_stale``, or ``force=True``): loaded inline.
+
+Loads are single-flight per key: concurrent callers share one upstream fetch.
+A failed refresh keeps the last good value (the error is reported in the
+freshness metadata); a failed first load raises to every waiting caller.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+
+Tag = Tuple[str, Optional[int]]  # (data kind, week or None for any week)
+
+
+class TaggedCache:
+    def __init__(self, max_entries: int = 256):
+        self._entries: Dict[Hashable, Tuple[Any, FrozenSet[Tag]]] = {}
+        self._lock = threading.Lock()
+        self._max = max_entries
+        # Bumped by every eviction; a load that overlapped one is not stored
+        self._gen = 0
+
+    def get(self, key: Hashable, tags: Iterable[Tag], loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            hit = self._entries.get(key)
+            gen = self._gen
+        if hit is not None:
+            return hit[0]
+        value = loader()
+        with self._lock:
+            if self._gen == gen:
+                if len(self._entries) >= self._max:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = (value, frozenset(tags))
+        return value
+
+    def evict(self, kind: str, week: Optional[int] = None) -> int:
+        """Drop entries tagged with ``kind`` for ``week`` (every week if None)."""
+        with self._lock:
+            self._gen += 1
+            doomed = [
+                key for key, (_, tags) in self._entries.items()
+                if any(k == kind and (week is None or w is None or w == week) for k, w in tags)
+            ]
+            for key in doomed:
+                del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._gen += 1
+            self._entries.clear()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float  # monotonic
+    fetched_wall: datetime
+    ttl: float
+    last_error: Optional[str] = None
+
+
+class SWRCache:
+    def __init__(self, max_workers: int = 4):
+        self._entries: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="swr")
+
+    def _run(self, key: str, loader: Callable[[], Any], ttl: float, fut: Future) -> None:
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.last_error = f"{e.__class__.__name__}: {e}"
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            return
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic(), datetime.utcnow(), ttl)
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+
+    def _start(self, key: str, loader: Callable[[], Any], ttl: float, background: bool) -> Tuple[Future, bool]:
+        """Return the in-flight load for ``key``, starting one if needed; the flag says
+        whether the caller owns (must run) it."""
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut, False
+            fut = self._inflight[key] = Future()
+        if background:
+            self._pool.submit(self._run, key, loader, ttl, fut)
+            return fut, False
+        return fut, True
+
+    def _load(self, key: str, loader: Callable[[], Any], ttl: float) -> Any:
+        fut, owner = self._start(key, loader, ttl, background=False)
+        if owner:
+            self._run(key, loader, ttl, fut)
+        return fut.result()
+
+    def freshness(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            refreshing = key in self._inflight
+        if entry is None:
+            return {"key": key, "cached": False, "refreshing": refreshing}
+        age = time.monotonic() - entry.fetched_at
+        return {
+            "key": key,
+            "cached": True,
+            "fetched_at": entry.fetched_wall.isoformat() + "Z",
+            "expires_at": (entry.fetched_wall + timedelta(seconds=entry.ttl)).isoformat() + "Z",
+            "age_s": round(age, 3),
+            "ttl_s": entry.ttl,
+            "stale": age > entry.ttl,
+            "refreshing": refreshing,
+            "last_error": entry.last_error,
+        }
+
+    def get(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: float,
+        max_stale: Optional[float] = None,
+        force: bool = False,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+        age = None if entry is None else time.monotonic() - entry.fetched_at
+        if entry is None or force or (max_stale is not None and age > max_stale):
+            try:
+                self._load(key, loader, ttl)
+            except Exception:
+                if entry is None:
+                    raise
+                # Upstream down: fall back to the last good value
+        elif age > entry.ttl:
+            self._start(key, loader, ttl, background=True)
+        with self._lock:
+            value = self._entries.get(key, entry).value
+        return value, self.freshness(key)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+derived = TaggedCache()
+swr = SWRCache()
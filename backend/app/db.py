@@ -1,11 +1,17 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
+import logging
+from pathlib import Path
 import time
+from typing import Any, Callable, Hashable, Optional
+from sqlalchemy import event, text
 from sqlalchemy.exc import OperationalError
-from sqlalchemy import text
 import socket
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .settings import get_settings
 
@@ -14,6 +20,41 @@ settings = get_settings()
 engine = create_engine(settings.database_url, echo=False, pool_pre_ping=True)
 
 
+def _async_pool_kwargs() -> dict:
+    if ":memory:" in settings.database_url:
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_s,
+        "pool_recycle": settings.db_pool_recycle_s,
+    }
+
+
+# Read-heavy endpoints run on the event loop with this engine; no pre-ping, stale
+# connections are recycled by age instead
+async_engine = create_async_engine(settings.async_database_url, echo=False, **_async_pool_kwargs())
+
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+# Serializes migrations when several API workers boot at once
+MIGRATION_LOCK_KEY = 727140002
+
+
+def run_migrations(bind=None, revision: str = "head") -> None:
+    """``alembic upgrade <revision>`` on ``bind`` (default: the app engine)."""
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.set_main_option("script_location", str(ALEMBIC_INI.parent / "backend" / "migrations"))
+    with (bind or engine).begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:k)").bindparams(k=MIGRATION_LOCK_KEY))
+        cfg.attributes["connection"] = conn
+        command.upgrade(cfg, revision)
+
+
 def init_db() -> None:
     # Retry to allow Postgres to become reachable in containers
     last_err: Exception | None = None
@@ -29,7 +70,7 @@ def init_db() -> None:
     # Then, wait for DB to accept connections
     for _ in range(60):
         try:
-            SQLModel.metadata.create_all(engine)
+            run_migrations()
             return
         except OperationalError as e:
             last_err = e
@@ -41,17 +82,65 @@ def init_db() -> None:
 
 def ensure_db() -> None:
     try:
-        SQLModel.metadata.create_all(engine)
+        run_migrations()
     except Exception:
         pass
 
 
+log = logging.getLogger(__name__)
+
+_AFTER_COMMIT = "_after_commit"
+_COMMITTED = "_committed"
+
+
+def after_commit(session: Session, fn: Callable[[Session], None], key: Optional[Hashable] = None) -> Any:
+    """Run ``fn(short_session)`` once ``session``'s outermost transaction commits.
+
+    All callbacks of one commit share a short transaction of their own, in
+    registration order; nothing runs if the transaction rolls back. For bookkeeping
+    on shared rows (cache epochs, dashboard dirty marks) that should not stay locked
+    for the length of a writer's transaction, and for change events, whose ids should
+    not stay uncommitted that long. With ``key`` only the first callback
+    registered under it per transaction is kept; the registered one is returned so
+    callers can accumulate into it. A failing callback is logged, never raised into
+    the caller, whose data is already committed.
+    """
+    pending = session.info.setdefault(_AFTER_COMMIT, {})
+    return pending.setdefault(object() if key is None else key, fn)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _mark_committed(session: OrmSession) -> None:
+    session.info[_COMMITTED] = True
+
+
+@event.listens_for(OrmSession, "after_transaction_end")
+def _run_after_commit(session: OrmSession, transaction) -> None:
+    committed = session.info.pop(_COMMITTED, False)
+    # Savepoints end here too; only the outermost transaction decides
+    if transaction.nested or transaction.parent is not None:
+        return
+    fns = session.info.pop(_AFTER_COMMIT, None)
+    if not fns or not committed:
+        return
+    bind = session.get_bind()
+    if bind is async_engine.sync_engine:
+        bind = engine
+    try:
+        with Session(bind, expire_on_commit=False) as short:
+            for fn in fns.values():
+                fn(short)
+            short.commit()
+    except Exception:
+        log.exception("after-commit work failed")
+
+
 def get_session() -> Session:
-    # Simple, robust dependency: open a session, try a lightweight ping, and yield.
+    # No per-request ping: the pool already checks connections on checkout
     with Session(engine) as session:
-        try:
-            session.exec(text("SELECT 1"))
-        except Exception:
-            # Let route logic handle transient DB readiness; do not raise here
-            pass
+        yield session
+
+
+async def get_async_session() -> AsyncSession:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
@@ -0,0 +1,184 @@
+"""
+Cross-worker cache invalidation.
+
+Writers call ``publish(session, kind, ..., week=...)`` inside their transaction
+(``mark_dashboard_dirty`` does this for every data write). On Postgres that queues
+a ``pg_notify`` delivered at commit. The ``CacheEpoch`` bumps are collected and
+applied in one short transaction right after the writer commits (``db.after_commit``,
+which sends a second notification), so the shared epoch rows are never locked
+while a long writer transaction is still fetching or writing. Every process runs
+one ``InvalidationBus`` thread:
+
+- Postgres: LISTEN on ``cache_invalidate`` and evict on each notification;
+- otherwise (SQLite), or while LISTEN is down: poll ``CacheEpoch`` every
+  ``cache_epoch_poll_s`` and evict the kinds/weeks whose epoch moved.
+
+The publishing process also evicts locally right away, and again when its own
+notification (or epoch change) comes back after commit.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from .cache import derived
+from .db import after_commit, engine
+from .models import CacheEpoch
+from .settings import get_settings
+
+
+CHANNEL = "cache_invalidate"
+ALL_WEEKS = 0
+
+Subscriber = Callable[[str, Optional[int]], object]
+
+
+def _bump(session: Session, kind: str, week: int) -> None:
+    stmt = (
+        update(CacheEpoch)
+        .where(CacheEpoch.kind == kind, CacheEpoch.week == week)
+        .values(epoch=CacheEpoch.epoch + 1, updated_at=datetime.utcnow())
+    )
+    if session.exec(stmt).rowcount:
+        return
+    try:
+        with session.begin_nested():
+            session.add(CacheEpoch(kind=kind, week=week, epoch=1))
+    except IntegrityError:
+        # Another writer created it first
+        session.exec(stmt)
+
+
+def _notify(session: Session, kinds: List[str], week: Optional[int]) -> None:
+    if session.get_bind().dialect.name == "postgresql":
+        payload = json.dumps({"kinds": kinds, "week": week})
+        session.exec(text("SELECT pg_notify(:ch, :payload)").bindparams(ch=CHANNEL, payload=payload))
+
+
+class _EpochFlush:
+    """Kinds published during one transaction, bumped after it commits."""
+
+    def __init__(self) -> None:
+        self.pending: Dict[Optional[int], set] = {}
+
+    def __call__(self, session: Session) -> None:
+        # Sorted, so concurrent flushes lock the epoch rows in the same order
+        for kind, week in sorted((k, ALL_WEEKS if w is None else w) for w, kinds in self.pending.items() for k in kinds):
+            _bump(session, kind, week)
+        for week, kinds in self.pending.items():
+            _notify(session, sorted(kinds), week)
+
+
+def publish(session: Session, *kinds: str, week: Optional[int] = None) -> None:
+    """Announce that ``kinds`` changed for ``week`` (all weeks if None). Does not commit;
+    the epochs move once the caller commits (nothing happens on rollback)."""
+    if not kinds:
+        return
+    _notify(session, sorted(set(kinds)), week)
+    # One epoch flush per commit, however many writes publish the same kinds
+    flush = after_commit(session, _EpochFlush(), key="cache_epochs")
+    flush.pending.setdefault(week, set()).update(kinds)
+    bus.dispatch(kinds, week)
+
+
+class InvalidationBus:
+    def __init__(self) -> None:
+        self._subscribers: List[Subscriber] = []
+        self._epochs: Optional[Dict[Tuple[str, int], int]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.mode: Optional[str] = None  # "listen" or "poll" once started
+
+    def subscribe(self, fn: Subscriber) -> None:
+        self._subscribers.append(fn)
+
+    def dispatch(self, kinds, week: Optional[int]) -> None:
+        for kind in kinds:
+            for fn in self._subscribers:
+                fn(kind, week)
+
+    def _evict_all(self) -> None:
+        # Used when notifications may have been missed
+        for fn in self._subscribers:
+            fn("*", None)
+
+    def poll_once(self) -> int:
+        """Evict whatever changed since the previous poll; returns how many (kind, week) moved."""
+        with Session(engine) as session:
+            rows = session.exec(select(CacheEpoch.kind, CacheEpoch.week, CacheEpoch.epoch)).all()
+        current = {(k, w): e for k, w, e in rows}
+        previous, self._epochs = self._epochs, current
+        if previous is None:
+            return 0
+        moved = [key for key, epoch in current.items() if previous.get(key) != epoch]
+        for kind, week in moved:
+            self.dispatch([kind], None if week == ALL_WEEKS else week)
+        return len(moved)
+
+    def _poll_loop(self) -> None:
+        interval = get_settings().cache_epoch_poll_s
+        while not self._stop.wait(interval):
+            try:
+                self.poll_once()
+            except Exception:
+                pass
+
+    def _listen_loop(self) -> None:
+        import psycopg
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(dsn, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    self.mode = "listen"
+                    self._evict_all()
+                    while not self._stop.is_set():
+                        for note in conn.notifies(timeout=5.0):
+                            msg = json.loads(note.payload)
+                            self.dispatch(msg.get("kinds") or [], msg.get("week"))
+            except Exception:
+                # Fall back to epoch polling until LISTEN works again
+                self.mode = "poll"
+                try:
+                    self.poll_once()
+                except Exception:
+                    pass
+                self._stop.wait(get_settings().cache_epoch_poll_s)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        try:
+            self.poll_once()  # baseline epochs
+        except Exception:
+            pass
+        if engine.dialect.name == "postgresql":
+            self.mode, target = "listen", self._listen_loop
+        else:
+            self.mode, target = "poll", self._poll_loop
+        self._thread = threading.Thread(target=target, name="cache-invalidation", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+
+def _evict_derived(kind: str, week: Optional[int]) -> None:
+    if kind == "*":
+        derived.clear()
+    else:
+        derived.evict(kind, week)
+
+
+bus = InvalidationBus()
+bus.subscribe(_evict_derived)
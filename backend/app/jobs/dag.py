@@ -0,0 +1,181 @@
+"""
+Small dependency-graph runner for the weekly refresh.
+
+A pipeline is a list of ``Stage``s. Stages whose dependencies are done run
+concurrently on a thread pool, each in its own session and transaction. A stage
+with an ``inputs`` function is skipped when the fingerprint of its inputs matches
+the last run that built it; a failed stage blocks everything downstream while
+independent branches carry on. Every run is stored as a ``PipelineRun`` row with
+per-stage status, start offset and duration.
+
+SQLite allows a single writer, so there stages run one at a time in dependency order.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, select
+
+from ..db import engine
+from ..models import PipelineRun
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Session, int], Any]
+    deps: Tuple[str, ...] = ()
+    # Returns anything JSON-serialisable describing what the stage reads; None = always run
+    inputs: Optional[Callable[[Session, int], Any]] = None
+
+
+@dataclass
+class _Outcome:
+    status: str
+    fingerprint: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    started_ms: float = 0.0
+    duration_ms: float = 0.0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def fingerprint(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _check_graph(stages: Sequence[Stage]) -> None:
+    names = {s.name for s in stages}
+    if len(names) != len(stages):
+        raise ValueError("duplicate stage names")
+    for s in stages:
+        missing = [d for d in s.deps if d not in names]
+        if missing:
+            raise ValueError(f"stage {s.name!r} depends on unknown {missing}")
+    # Kahn's algorithm, only to reject cycles up front
+    indeg = {s.name: len(s.deps) for s in stages}
+    ready = [n for n, d in indeg.items() if d == 0]
+    seen = 0
+    while ready:
+        n = ready.pop()
+        seen += 1
+        for s in stages:
+            if n in s.deps:
+                indeg[s.name] -= 1
+                if indeg[s.name] == 0:
+                    ready.append(s.name)
+    if seen != len(stages):
+        raise ValueError("stage graph has a cycle")
+
+
+def last_fingerprints(session: Session, pipeline: str, week: Optional[int], lookback: int = 20) -> Dict[str, str]:
+    """Newest fingerprint per stage from recent runs where the stage ran or was skipped."""
+    runs = session.exec(
+        select(PipelineRun).where(PipelineRun.pipeline == pipeline, PipelineRun.week == week).order_by(PipelineRun.id.desc()).limit(lookback)
+    ).all()
+    prints: Dict[str, str] = {}
+    for run in runs:
+        for st in run.stages or []:
+            if st.get("fingerprint") and st.get("status") in ("succeeded", "skipped"):
+                prints.setdefault(st["name"], st["fingerprint"])
+    return prints
+
+
+def _execute(stage: Stage, week: int, previous: Optional[str], force: bool, t0: float) -> _Outcome:
+    started = (time.perf_counter() - t0) * 1000
+    t = time.perf_counter()
+    fp = None
+    try:
+        with Session(engine) as session:
+            if stage.inputs is not None:
+                fp = fingerprint(stage.inputs(session, week))
+                if not force and fp == previous:
+                    return _Outcome("skipped", fp, started_ms=started, duration_ms=(time.perf_counter() - t) * 1000)
+            result = stage.run(session, week)
+            session.commit()
+    except Exception as e:
+        return _Outcome("failed", fp, error=f"{e.__class__.__name__}: {e}", started_ms=started, duration_ms=(time.perf_counter() - t) * 1000)
+    return _Outcome("succeeded", fp, result=result, started_ms=started, duration_ms=(time.perf_counter() - t) * 1000)
+
+
+def run_pipeline(
+    pipeline: str,
+    stages: Sequence[Stage],
+    week: int,
+    force: bool = False,
+    max_workers: int = 4,
+) -> PipelineRun:
+    """Run ``stages`` for ``week`` and return the stored ``PipelineRun``."""
+    _check_graph(stages)
+    if engine.dialect.name == "sqlite":
+        max_workers = 1
+    with Session(engine) as session:
+        previous = last_fingerprints(session, pipeline, week)
+        run = PipelineRun(pipeline=pipeline, week=week)
+        session.add(run)
+        session.commit()
+        run_id = run.id
+
+    by_name = {s.name: s for s in stages}
+    order = {s.name: i for i, s in enumerate(stages)}
+    outcomes: Dict[str, _Outcome] = {}
+    pending = dict(by_name)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=f"dag-{pipeline}") as pool:
+        running: Dict[Future, str] = {}
+        while pending or running:
+            for name in sorted(pending, key=order.get):
+                stage = pending[name]
+                dep_status = [outcomes[d].status if d in outcomes else None for d in stage.deps]
+                if any(s in ("failed", "blocked") for s in dep_status):
+                    outcomes[name] = _Outcome("blocked", started_ms=(time.perf_counter() - t0) * 1000)
+                    del pending[name]
+                elif all(s is not None for s in dep_status):
+                    running[pool.submit(_execute, stage, week, previous.get(name), force, t0)] = name
+                    del pending[name]
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                outcomes[running.pop(fut)] = fut.result()
+
+    entries: List[Dict[str, Any]] = []
+    for s in stages:
+        o = outcomes[s.name]
+        entry = {"name": s.name, "deps": list(s.deps), "status": o.status, "started_ms": round(o.started_ms, 1), "duration_ms": round(o.duration_ms, 1)}
+        if o.fingerprint:
+            entry["fingerprint"] = o.fingerprint
+        if o.result is not None:
+            entry["result"] = o.result
+        if o.error:
+            entry["error"] = o.error
+        entries.append(entry)
+    with Session(engine) as session:
+        run = session.get(PipelineRun, run_id)
+        run.stages = entries
+        run.status = "failed" if any(o.status in ("failed", "blocked") for o in outcomes.values()) else "succeeded"
+        run.finished_at = datetime.utcnow()
+        run.duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+        session.commit()
+        session.refresh(run)
+        return run
+
+
+def run_to_dict(run: PipelineRun) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "pipeline": run.pipeline,
+        "week": run.week,
+        "status": run.status,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "duration_ms": run.duration_ms,
+        "stages": run.stages,
+    }
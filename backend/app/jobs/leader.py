@@ -0,0 +1,145 @@
+"""
+Scheduler leadership for multi-worker deployments.
+
+Every API process starts the APScheduler, but cron jobs only run in the process
+holding a Postgres session-level advisory lock. The lock lives on a dedicated
+connection, so when the leader dies (or its connection drops) Postgres releases it
+and the next follower to poll (every ``leader_poll_s``) takes over. On other
+databases (SQLite in tests and local runs) the single process is always leader.
+
+Each run is recorded as a ``ScheduledRun`` row keyed by (job, minute slot).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import socket
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from ..db import engine
+from ..models import ScheduledRun
+from ..settings import get_settings
+
+
+INSTANCE = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderElector:
+    def __init__(self, bind: Engine, key: int):
+        self.bind = bind
+        self.key = key
+        self.is_leader = False
+        self._conn: Optional[Connection] = None
+
+    def _drop(self) -> None:
+        conn, self._conn = self._conn, None
+        self.is_leader = False
+        if conn is not None:
+            # Never hand a lock-holding connection back to the pool
+            try:
+                conn.invalidate()
+                conn.close()
+            except Exception:
+                pass
+
+    def try_acquire(self) -> bool:
+        """Take (or confirm) leadership; returns whether this process leads."""
+        if self.bind.dialect.name != "postgresql":
+            self.is_leader = True
+            return True
+        if self._conn is not None:
+            try:
+                self._conn.exec_driver_sql("SELECT 1")
+                self._conn.commit()
+                return True
+            except Exception:
+                self._drop()
+        try:
+            conn = self.bind.connect()
+            got = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": self.key}).scalar()
+            conn.commit()
+        except Exception:
+            self.is_leader = False
+            return False
+        if got:
+            self._conn = conn
+            self.is_leader = True
+        else:
+            conn.close()
+            self.is_leader = False
+        return self.is_leader
+
+    def release(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": self.key})
+                self._conn.commit()
+            except Exception:
+                pass
+        self._drop()
+
+    async def run(self) -> None:
+        poll = get_settings().leader_poll_s
+        while True:
+            await asyncio.to_thread(self.try_acquire)
+            await asyncio.sleep(poll)
+
+
+elector = LeaderElector(engine, get_settings().scheduler_lock_key)
+
+
+def _claim_slot(job: str, slot: datetime) -> Optional[int]:
+    with Session(engine) as session:
+        run = ScheduledRun(job=job, scheduled_for=slot, instance=INSTANCE)
+        session.add(run)
+        try:
+            session.commit()
+        except IntegrityError:
+            return None
+        return run.id
+
+
+def _finish(run_id: int, status: str, error: Optional[str], duration_ms: float) -> None:
+    with Session(engine) as session:
+        run = session.get(ScheduledRun, run_id)
+        run.status = status
+        run.error = error
+        run.finished_at = datetime.utcnow()
+        run.duration_ms = round(duration_ms, 1)
+        session.commit()
+
+
+def leader_only(name: str, who: LeaderElector = elector) -> Callable[[Callable[[], Awaitable[Any]]], Callable[[], Awaitable[Optional[str]]]]:
+    """Wrap a cron coroutine: run it only on the leader, once per minute slot, and record it.
+
+    The wrapper returns the run status, or None when the run was not this process's.
+    """
+    def deco(fn: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Optional[str]]]:
+        @functools.wraps(fn)
+        async def wrapper() -> Optional[str]:
+            if not who.is_leader:
+                return None
+            slot = datetime.utcnow().replace(second=0, microsecond=0)
+            run_id = await asyncio.to_thread(_claim_slot, name, slot)
+            if run_id is None:
+                return None
+            t0 = time.perf_counter()
+            status, error = "succeeded", None
+            try:
+                await fn()
+            except Exception as e:
+                status, error = "failed", f"{e.__class__.__name__}: {e}\n{traceback.format_exc(limit=5)}"
+            await asyncio.to_thread(_finish, run_id, status, error, (time.perf_counter() - t0) * 1000)
+            return status
+        return wrapper
+    return deco
@@ -0,0 +1,214 @@
+"""
+Job handlers for long-running admin pipelines (see ``jobs.queue``).
+
+``update_everything`` is the staged version of what ``POST /api/admin/update-everything``
+used to do inline: ingest -> schedule -> blend -> weather -> optimize -> dashboard.
+Each stage commits its own work, so a cancelled or failed job keeps what earlier
+stages wrote.
+
+``league_recompute`` re-optimizes one league's lineup and rebuilds its dashboard
+after the shared data changed; the scheduler queues one per league.
+
+``weekly_stages`` is the Friday refresh expressed as a dependency graph for ``jobs.dag``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from ..db import engine
+from ..models import DEFAULT_LEAGUE, Game, PipelineRun, Player, Projection
+from ..settings import get_settings
+from ..services.changes import record_lineup_change
+from ..services.dashboard import mark_dashboard_dirty, refresh_dashboard
+from ..services.leagues import risk_lambda
+from ..services.optimizer import optimize_lineup
+from ..services.projections import BLENDED, get_weights, write_blended
+from ..services.results import result_writer
+from ..services.schedule import ensure_games, fetch_weather_for_week, upsert_game
+from ..services import sportsdata as sdata
+from ingest.providers import adp as adp_provider
+from ingest.providers import dvp as dvp_provider
+from ingest.providers import espn as espn_provider
+from ingest.providers import fantasypros as fp_provider
+from ingest.providers import injuries as injuries_provider
+from ingest.util import PlayerResolver
+from .dag import Stage, run_pipeline
+from .queue import JobContext, register
+
+
+UPDATE_EVERYTHING = "update_everything"
+LEAGUE_RECOMPUTE = "league_recompute"
+
+
+def import_schedule_csv(session: Session, week: int, csv_text: str) -> int:
+    """``team,opponent,home,kickoff_iso`` rows -> Game upserts. Does not commit."""
+    lines = [ln.strip() for ln in csv_text.strip().splitlines() if ln.strip()]
+    if not lines:
+        return 0
+    header = [h.strip().lower() for h in lines[0].split(",")]
+    imported = 0
+    for line in lines[1:]:
+        row = dict(zip(header, [c.strip() for c in line.split(",")]))
+        team = row.get("team")
+        if not team:
+            continue
+        home = row.get("home", "1") in ("1", "true", "TRUE", "yes")
+        kickoff: Optional[datetime] = None
+        if row.get("kickoff_iso"):
+            try:
+                kickoff = datetime.fromisoformat(row["kickoff_iso"])
+            except ValueError:
+                kickoff = None
+        upsert_game(session, week=week, team=team.upper(), opponent=(row.get("opponent") or None), home=home, kickoff_utc=kickoff)
+        imported += 1
+    mark_dashboard_dirty(session, "schedule", week=week)
+    return imported
+
+
+def _safe(fn, *args) -> int:
+    # Optional providers: a missing key or scrape failure counts as zero rows
+    try:
+        return fn(*args)
+    except Exception:
+        return 0
+
+
+@register(UPDATE_EVERYTHING)
+def update_everything(ctx: JobContext) -> Dict[str, Any]:
+    week = ctx.week
+    counts: Dict[str, Any] = {}
+    with Session(engine) as session:
+        with ctx.stage("ingest") as out:
+            from ingest.providers import yahoo as yahoo_provider
+            counts["fp_proj"] = fp_provider.fetch_projections(session, week)
+            counts["espn_proj"] = espn_provider.fetch_projections(session, week)
+            counts["sportsdata_proj"] = sdata.fetch_projections(session, week)
+            counts["yahoo_proj"] = _safe(yahoo_provider.fetch_projections, session, week)
+            # Injury report (SportsData.io when configured); only status changes are written
+            counts["sportsdata_inj"] = injuries_provider.fetch_injuries(session, week)
+            counts["adp_fp"] = adp_provider.fetch_adp(session)
+            counts["adp_espn"] = espn_provider.fetch_adp(session)
+            counts["dvp"] = _safe(dvp_provider.fetch_dvp, session)
+            session.commit()
+            out.update(counts)
+
+        sched_csv = ctx.params.get("schedule_csv")
+        if sched_csv:
+            with ctx.stage("schedule") as out:
+                counts["schedule_imported"] = out["imported"] = import_schedule_csv(session, week, sched_csv)
+                session.commit()
+        else:
+            counts["schedule_imported"] = 0
+            ctx.skip("schedule", "no schedule_csv")
+
+        with ctx.stage("blend") as out:
+            # Only players whose source projections changed
+            counts["blended"] = out["blended"] = write_blended(session, week)
+            session.commit()
+
+        with ctx.stage("weather") as out:
+            out["games"] = asyncio.run(fetch_weather_for_week(session, week))
+
+        lineup = _recompute_league(ctx, session)
+
+    return {"ok": True, "counts": counts, "lineup": lineup}
+
+
+def _recompute_league(ctx: JobContext, session: Session) -> Dict[str, Any]:
+    week, league_id = ctx.week, ctx.league_id
+    with ctx.stage("optimize") as out:
+        lineup = optimize_lineup(session, week=week, objective="risk", lam=risk_lambda(session, league_id), stack_bonus=True, league_id=league_id)
+        if league_id == DEFAULT_LEAGUE:
+            # The change feed / Slack alerts follow the default league
+            record_lineup_change(session, week, lineup)
+        session.commit()
+        out["starters"] = len(lineup.get("starters") or [])
+
+    with ctx.stage("dashboard") as out:
+        out["etag"] = refresh_dashboard(session, week, league_id=league_id).etag
+    return lineup
+
+
+@register(LEAGUE_RECOMPUTE)
+def league_recompute(ctx: JobContext) -> Dict[str, Any]:
+    with Session(engine) as session:
+        lineup = _recompute_league(ctx, session)
+    result_writer.submit("lineup", lineup, league_id=ctx.league_id, week=ctx.week, objective="risk")
+    return {"ok": True, "league_id": ctx.league_id, "starters": len(lineup.get("starters") or [])}
+
+
+# --- Weekly refresh graph (Friday cron) -------------------------------------
+
+WEEKLY = "weekly_refresh"
+
+
+def _source_window(session: Session, week: int) -> Dict[str, Any]:
+    # Upstream feeds can't be diffed without fetching them; treat them as unchanged
+    # within one refresh window
+    return {"week": week, "window": int(time.time() // max(1.0, get_settings().pipeline_source_refresh_s))}
+
+
+def _player_teams(session: Session, week: int) -> List[str]:
+    return sorted(t for t in session.exec(select(Player.team).distinct()).all() if t)
+
+
+def _source_projection_state(session: Session, week: int) -> Dict[str, Any]:
+    count, newest = session.exec(
+        select(func.count(Projection.id), func.max(Projection.updated_at)).where(Projection.week == week, Projection.source != BLENDED)
+    ).one()
+    return {"rows": count, "newest": newest, "weights": get_weights(session)}
+
+
+def _weather_inputs(session: Session, week: int) -> Dict[str, Any]:
+    games = session.exec(select(Game.team, Game.lat, Game.lon, Game.kickoff_utc).where(Game.week == week).order_by(Game.team)).all()
+    window = int(time.time() // max(1.0, get_settings().weather_cache_ttl_s))
+    return {"games": [list(g) for g in games], "window": window}
+
+
+def _ensure_games(session: Session, week: int) -> int:
+    added = ensure_games(session, week, _player_teams(session, week))
+    if added:
+        mark_dashboard_dirty(session, "schedule", week=week)
+    return added
+
+
+def _dashboard(session: Session, week: int) -> str:
+    return refresh_dashboard(session, week).etag
+
+
+def weekly_stages(resolver: Optional[PlayerResolver] = None) -> List[Stage]:
+    """The weekly graph; every player-creating source stage resolves names through ``resolver``.
+
+    Source stages run concurrently in their own sessions, so each building a private
+    resolver would let two of them insert the same new player.
+    """
+    r = resolver
+    return [
+        Stage("fantasypros", lambda s, w: fp_provider.fetch_projections(s, w, resolver=r), inputs=_source_window),
+        Stage("espn", lambda s, w: espn_provider.fetch_projections(s, w), inputs=_source_window),
+        Stage("injuries", lambda s, w: injuries_provider.fetch_injuries(s, w, resolver=r), inputs=_source_window),
+        Stage("adp", lambda s, w: adp_provider.fetch_adp(s, resolver=r), inputs=_source_window),
+        Stage("espn_adp", lambda s, w: espn_provider.fetch_adp(s, resolver=r), inputs=_source_window),
+        Stage("dvp", lambda s, w: dvp_provider.fetch_dvp(s), inputs=_source_window),
+        # ADP scrapes fill in player teams, which decide the game rows
+        Stage("games", _ensure_games, deps=("adp", "espn_adp"), inputs=lambda s, w: _player_teams(s, w)),
+        Stage("blend", lambda s, w: write_blended(s, w), deps=("fantasypros", "espn"), inputs=_source_projection_state),
+        Stage("weather", lambda s, w: asyncio.run(fetch_weather_for_week(s, w)), deps=("games",), inputs=_weather_inputs),
+        # Incremental already (dirty sections only), so no fingerprint
+        Stage("dashboard", _dashboard, deps=("blend", "injuries", "dvp", "weather")),
+    ]
+
+
+def run_weekly_refresh(week: int, force: bool = False) -> PipelineRun:
+    # One name index per run, shared by the concurrent source stages (as in ingest.update).
+    # SQLite runs stages one at a time, and its single writer lock would block the
+    # shared resolver's own commits, so there each stage resolves in its own transaction.
+    resolver = None if engine.dialect.name == "sqlite" else PlayerResolver.shared(engine)
+    return run_pipeline(WEEKLY, weekly_stages(resolver), week, force=force, max_workers=get_settings().pipeline_workers)
@@ -0,0 +1,310 @@
+"""
+Database-backed job queue with in-process workers.
+
+``enqueue`` inserts a ``Job`` row and wakes the worker threads; workers claim
+queued jobs (``FOR UPDATE SKIP LOCKED`` on Postgres), run the handler registered
+for the job's ``kind`` and record progress per stage. Handlers receive a
+``JobContext`` and wrap each step in ``ctx.stage(name)``, which stores start/end
+times and durations on the job and is where cancellation is honoured.
+
+A unique partial index allows one queued/running job per (kind, week, league),
+so a second ``enqueue`` for the same week and league raises ``DuplicateJob``.
+
+Claims are fair across leagues: the next job comes from the league with the
+fewest running jobs, oldest first within that, so one league queueing many
+recomputes cannot starve the others.
+
+A claimed job records its ``owner`` (the process ``INSTANCE``); every stage
+update and a per-process heartbeat thread keep its ``updated_at`` fresh. Any
+process fails running jobs whose heartbeat is older than ``job_lease_s``: their
+owner died, and the active-job index would otherwise block the kind/week forever.
+Jobs of live processes, including other API workers and replicas, are left alone.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from ..db import engine
+from ..models import DEFAULT_LEAGUE, Job, JobStatus
+from ..settings import get_settings
+from .leader import INSTANCE
+
+
+ACTIVE = (JobStatus.queued, JobStatus.running)
+TERMINAL = (JobStatus.succeeded, JobStatus.failed, JobStatus.cancelled)
+
+
+class DuplicateJob(Exception):
+    def __init__(self, job_id: Optional[int]):
+        super().__init__(f"job {job_id} is already queued or running")
+        self.job_id = job_id
+
+
+class JobCancelled(Exception):
+    pass
+
+
+Handler = Callable[["JobContext"], Optional[Dict[str, Any]]]
+HANDLERS: Dict[str, Handler] = {}
+
+
+def register(kind: str) -> Callable[[Handler], Handler]:
+    def deco(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+    return deco
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    def iso(dt: Optional[datetime]) -> Optional[str]:
+        return dt.isoformat() if dt else None
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "week": job.week,
+        "league_id": job.league_id,
+        "status": job.status.value if isinstance(job.status, JobStatus) else job.status,
+        "params": job.params,
+        "stages": job.stages,
+        "result": job.result,
+        "error": job.error,
+        "cancel_requested": job.cancel_requested,
+        "owner": job.owner,
+        "updated_at": iso(job.updated_at),
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+    }
+
+
+def enqueue(
+    session: Session, kind: str, week: Optional[int] = None, params: Optional[Dict[str, Any]] = None, league_id: int = DEFAULT_LEAGUE
+) -> Job:
+    """Insert a queued job and wake the workers; raises ``DuplicateJob`` if one is active."""
+    if kind not in HANDLERS:
+        raise KeyError(f"no handler registered for job kind {kind!r}")
+    job = Job(kind=kind, week=week, league_id=league_id, params=params or {})
+    session.add(job)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        active = session.exec(
+            select(Job.id).where(Job.kind == kind, Job.week == week, Job.league_id == league_id, Job.status.in_(ACTIVE))
+        ).first()
+        raise DuplicateJob(active)
+    session.refresh(job)
+    runner.wake()
+    return job
+
+
+def request_cancel(session: Session, job_id: int) -> Optional[Job]:
+    """Queued jobs are cancelled at once; running ones stop at their next stage boundary."""
+    job = session.get(Job, job_id)
+    if job is None:
+        return None
+    if job.status == JobStatus.queued:
+        job.status = JobStatus.cancelled
+        job.finished_at = datetime.utcnow()
+    elif job.status == JobStatus.running:
+        job.cancel_requested = True
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+class JobContext:
+    def __init__(self, job_id: int, kind: str, week: Optional[int], params: Dict[str, Any], league_id: int = DEFAULT_LEAGUE):
+        self.job_id = job_id
+        self.kind = kind
+        self.week = week
+        self.params = params
+        self.league_id = league_id
+        self.stages: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _save(self, **fields: Any) -> None:
+        # Progress goes through its own short transaction so it is visible while work continues
+        with Session(engine) as s:
+            job = s.get(Job, self.job_id)
+            with self._lock:
+                job.stages = [dict(st) for st in self.stages]
+            for k, v in fields.items():
+                setattr(job, k, v)
+            job.updated_at = datetime.utcnow()
+            s.commit()
+
+    def cancelled(self) -> bool:
+        with Session(engine) as s:
+            return bool(s.exec(select(Job.cancel_requested).where(Job.id == self.job_id)).first())
+
+    def check_cancel(self) -> None:
+        if self.cancelled():
+            raise JobCancelled()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Run one stage: checks for cancellation first, then records timing and status.
+
+        The yielded dict can be filled with stage output (stored under ``result``).
+        """
+        self.check_cancel()
+        entry: Dict[str, Any] = {"name": name, "status": "running", "started_at": datetime.utcnow().isoformat()}
+        out: Dict[str, Any] = {}
+        with self._lock:
+            self.stages.append(entry)
+        self._save()
+        t0 = time.perf_counter()
+        try:
+            yield out
+        except BaseException as e:
+            entry.update(status="failed", error=f"{e.__class__.__name__}: {e}")
+            raise
+        else:
+            entry["status"] = "succeeded"
+        finally:
+            entry["duration_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            entry["finished_at"] = datetime.utcnow().isoformat()
+            if out:
+                entry["result"] = out
+            self._save()
+
+    def skip(self, name: str, reason: str) -> None:
+        with self._lock:
+            self.stages.append({"name": name, "status": "skipped", "reason": reason, "duration_ms": 0.0})
+        self._save()
+
+
+def _claim(session: Session) -> Optional[Job]:
+    running = aliased(Job)
+    busy = (
+        select(func.count(running.id))
+        .where(running.league_id == Job.league_id, running.status == JobStatus.running)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(Job)
+        .where(Job.status == JobStatus.queued)
+        .order_by(busy, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = session.exec(stmt).first()
+    if job is None:
+        session.rollback()
+        return None
+    job.status = JobStatus.running
+    job.started_at = job.updated_at = datetime.utcnow()
+    job.owner = INSTANCE
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def run_job(job_id: int) -> None:
+    with Session(engine) as session:
+        job = session.get(Job, job_id)
+        ctx = JobContext(job.id, job.kind, job.week, dict(job.params or {}), job.league_id)
+        handler = HANDLERS.get(job.kind)
+    status, result, error = JobStatus.succeeded, None, None
+    try:
+        if handler is None:
+            raise KeyError(f"no handler registered for job kind {ctx.kind!r}")
+        result = handler(ctx)
+    except JobCancelled:
+        status = JobStatus.cancelled
+    except Exception as e:
+        status, error = JobStatus.failed, f"{e.__class__.__name__}: {e}\n{traceback.format_exc(limit=5)}"
+    ctx._save(status=status, result=result, error=error, finished_at=datetime.utcnow())
+
+
+class JobRunner:
+    """Worker threads polling the job table; ``wake`` skips the poll delay after an enqueue."""
+
+    def __init__(self) -> None:
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        with self._start_lock:
+            if self._threads:
+                return
+            self._recover()
+            settings = get_settings()
+            for i in range(max(1, settings.job_workers)):
+                t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            t = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def wake(self) -> None:
+        self.ensure_started()
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _recover(self) -> int:
+        """Fail running jobs whose owner stopped heartbeating (it died mid-job); returns how many."""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=get_settings().job_lease_s)
+        with Session(engine) as session:
+            stale = session.exec(
+                select(Job).where(Job.status == JobStatus.running, or_(Job.updated_at == None, Job.updated_at < cutoff))  # noqa: E711
+            ).all()
+            for job in stale:
+                job.status = JobStatus.failed
+                job.error = f"interrupted: no heartbeat from {job.owner or 'unknown owner'} since {job.updated_at or job.started_at}"
+                job.finished_at = now
+            session.commit()
+        return len(stale)
+
+    def _heartbeat(self) -> None:
+        # Keeps this process's jobs alive through long stages, and reaps jobs of dead ones
+        interval = get_settings().job_lease_s / 4
+        while not self._stop.wait(interval):
+            try:
+                with Session(engine) as session:
+                    session.execute(
+                        update(Job).where(Job.owner == INSTANCE, Job.status == JobStatus.running).values(updated_at=datetime.utcnow())
+                    )
+                    session.commit()
+                self._recover()
+            except Exception:
+                pass
+
+    def _loop(self) -> None:
+        poll = get_settings().job_poll_s
+        while not self._stop.is_set():
+            try:
+                # SQLite has no SKIP LOCKED; serialise claims within the process
+                with self._claim_lock, Session(engine) as session:
+                    job = _claim(session)
+            except Exception:
+                job = None
+            if job is None:
+                self._wake.wait(poll)
+                self._wake.clear()
+                continue
+            run_job(job.id)
+
+
+runner = JobRunner()
@@ -1,71 +1,74 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlmodel import Session, select
+from sqlmodel import Session
 
-from ..services.alerts import send_slack_message
+from ..services.alerts import send_slack_message, dispatch_change_alerts
+from ..services.changes import record_lineup_change
 from ..db import engine
-from ..models import SettingsRow, Player
-from ..services.projections import blend_projections
+from ..models import DEFAULT_LEAGUE
+from ..services.leagues import current_week, league_ids, risk_lambda
 from ..services.optimizer import optimize_lineup
-from ..services.schedule import upsert_game, fetch_weather_for_week
-from ingest.providers import fantasypros as fp_provider
-from ingest.providers import espn as espn_provider
+from ..services.schedule import fetch_weather_for_week
 from ingest.providers import injuries as injuries_provider
-from ingest.providers import adp as adp_provider
+from .leader import elector, leader_only
+from .pipelines import LEAGUE_RECOMPUTE, run_weekly_refresh
+from .queue import DuplicateJob, enqueue
+
+
+def enqueue_league_recomputes(skip_default: bool = False) -> int:
+    """Queue a ``league_recompute`` job per league for its current week; the queue
+    interleaves leagues fairly. Leagues with one already active are skipped."""
+    queued = 0
+    with Session(engine) as session:
+        for league_id in league_ids(session):
+            if skip_default and league_id == DEFAULT_LEAGUE:
+                continue
+            try:
+                enqueue(session, LEAGUE_RECOMPUTE, week=current_week(session, league_id), league_id=league_id)
+                queued += 1
+            except DuplicateJob:
+                pass
+    return queued
 
 
 def setup_scheduler() -> AsyncIOScheduler:
     sched = AsyncIOScheduler()
+    # Every process schedules, only the advisory-lock holder runs (see jobs.leader)
+    asyncio.get_running_loop().create_task(elector.run())
 
+    @leader_only("weekly_friday")
     async def weekly_friday():
-        # Auto-ingest for upcoming week, blend projections, make sure weather is fetched
-        with Session(engine) as session:
-            settings = session.get(SettingsRow, 1)
-            data = settings.data if settings else {}
-            week = int(data.get("current_week", 1))
-            # Ingest projections and injuries
-            fp_provider.fetch_projections(session, week)
-            espn_provider.fetch_projections(session, week)
-            injuries_provider.fetch_injuries(session, week)
-            # Both ADPs
-            adp_provider.fetch_adp(session)
-            espn_provider.fetch_adp(session)
-            session.commit()
-            # Blend and upsert 'blended'
-            blended = blend_projections(session, week)
-            from ..models import Projection
-            for pid, data_b in blended.items():
-                row = session.exec(select(Projection).where(Projection.player_id == pid, Projection.week == week, Projection.source == "blended")).first()
-                if not row:
-                    session.add(Projection(player_id=pid, week=week, source="blended", expected=data_b["expected"], stdev=1.5))
-                else:
-                    row.expected = data_b["expected"]
-            # Ensure game rows for weather by team seen in players
-            teams = {p.team for p in session.exec(select(Player)).all() if p.team}
-            for team in teams:
-                upsert_game(session, week=week, team=team, opponent=None, home=True, kickoff_utc=None)
-            session.commit()
-        # Update weather asynchronously after committing games
+        # Auto-ingest for the upcoming week as a stage graph (see pipelines.weekly_stages):
+        # sources, ADP, DvP and weather run concurrently; unchanged stages are skipped
+        # Shared data is refreshed once per distinct week, then every league recomputes
         with Session(engine) as session:
-            await fetch_weather_for_week(session, week)
-        await send_slack_message(f"Auto-ingest complete for week {week}. Weather updated. Review draft/waivers if applicable.")
+            weeks = sorted({current_week(session, league_id) for league_id in league_ids(session)} or {1})
+        for week in weeks:
+            run = await asyncio.to_thread(run_weekly_refresh, week)
+            took = ", ".join(f"{st['name']} {st['status']} {st['duration_ms'] / 1000:.1f}s" for st in run.stages)
+            await send_slack_message(f"Auto-ingest {run.status} for week {week} in {run.duration_ms / 1000:.1f}s ({took}). Review draft/waivers if applicable.")
+        await asyncio.to_thread(enqueue_league_recomputes)
 
+    @leader_only("sunday_check")
     async def sunday_check():
-        # Coach mode: refresh injuries/weather, re-optimize and notify
+        # Coach mode: refresh injuries/weather, re-optimize and notify (default league);
+        # the other leagues get a recompute job each
         with Session(engine) as session:
-            settings = session.get(SettingsRow, 1)
-            data = settings.data if settings else {}
-            week = int(data.get("current_week", 1))
+            week = current_week(session)
             injuries_provider.fetch_injuries(session, week)
             session.commit()
         with Session(engine) as session:
             await fetch_weather_for_week(session, week)
         with Session(engine) as session:
-            result = optimize_lineup(session, week=week, objective="risk", lam=0.35, stack_bonus=True)
-        starters = ", ".join(f"{s['position']} {s['name']}" for s in result.get('starters', []))
-        await send_slack_message(f"Coach Mode Week {week}: Risk-adjusted lineup set: {starters}")
+            result = optimize_lineup(session, week=week, objective="risk", lam=risk_lambda(session), stack_bonus=True)
+            record_lineup_change(session, week, result)
+            session.commit()
+            # Only post when injuries, projections or the lineup actually changed
+            await dispatch_change_alerts(session, header=f"Coach Mode Week {week}: changes since last check")
+        await asyncio.to_thread(enqueue_league_recomputes, True)
 
     # Default cron: Friday 10:00 and Sunday 11:00 (UTC by default)
     sched.add_job(weekly_friday, "cron", day_of_week="fri", hour=10, minute=0)
@@ -8,10 +8,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .db import init_db
-from .models import SettingsRow, Player
+from .models import DEFAULT_LEAGUE, SettingsRow, Player
+from .services.leagues import get_settings_row
 from sqlmodel import select
 from .api.routes import router
 from .jobs.scheduler import setup_scheduler
+from .jobs.queue import runner as job_runner
+from .jobs.leader import elector
+from .invalidation import bus as invalidation_bus
+from .services.results import result_writer
 from sqlmodel import Session
 from .db import engine
 
@@ -32,15 +37,19 @@ async def _background_bootstrap() -> None:
     try:
         init_db()
         with Session(engine) as session:
-            if not session.get(SettingsRow, 1):
+            if not get_settings_row(session, DEFAULT_LEAGUE):
                 data_path = Path(__file__).parent / "data" / "scoring.json"
                 data = json.loads(data_path.read_text())
-                session.add(SettingsRow(id=1, data=data))
+                session.add(SettingsRow(league_id=DEFAULT_LEAGUE, data=data))
                 session.commit()
             has_player = session.exec(select(Player)).first()
             if not has_player:
                 from .seeds.seed import run as seed_run
                 seed_run()
+        # Pick up jobs queued before a restart
+        job_runner.ensure_started()
+        # Evict in-process caches when other workers write
+        invalidation_bus.start()
     except Exception:
         # swallow; endpoints can proceed once DB comes up
         pass
@@ -50,3 +59,11 @@ async def _background_bootstrap() -> None:
 async def on_startup() -> None:
     setup_scheduler()
     asyncio.get_running_loop().create_task(_background_bootstrap())
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    # Hand scheduler leadership over right away instead of waiting for the connection to drop
+    elector.release()
+    # Saved results still in the write-behind buffer
+    result_writer.stop()
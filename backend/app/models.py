@@ -4,9 +4,14 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import Index, UniqueConstraint, text
 from sqlmodel import Field, SQLModel, Column, JSON
 
 
+# League every pre-multi-league row belongs to (migration 0004 seeds it)
+DEFAULT_LEAGUE = 1
+
+
 class RosterStatus(str, Enum):
     start = "start"
     bench = "bench"
@@ -23,69 +28,162 @@ class Player(SQLModel, table=True):
     bye_week: Optional[int] = Field(default=None)
 
 
+class League(SQLModel, table=True):
+    """A fantasy league served by this deployment; rosters, settings and results are
+    scoped to it, players and projections are shared."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = ""
+    # ESPN ids for the league import; None falls back to the LEAGUE_ID/TEAM_ID env vars
+    espn_league_id: Optional[str] = None
+    espn_team_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class Roster(SQLModel, table=True):
+    __table_args__ = (
+        Index("uq_roster_league_id_player_id", "league_id", "player_id", unique=True),
+        Index("ix_roster_league_id_my_team_status", "league_id", "my_team", "status"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
+    league_id: int = Field(default=DEFAULT_LEAGUE, foreign_key="league.id")
     player_id: int = Field(foreign_key="player.id")
     status: RosterStatus
     acquisition_cost: Optional[float] = Field(default=None)
     my_team: bool = Field(default=True)
+    # ESPN team id of the league team holding the player (LeagueTeam.id within
+    # league_id); None = free agent / unknown
+    league_team_id: Optional[int] = Field(default=None, index=True)
+
+
+class LeagueTeam(SQLModel, table=True):
+    """A fantasy team in a league, keyed by its ESPN team id within the league."""
+    league_id: int = Field(default=DEFAULT_LEAGUE, primary_key=True, foreign_key="league.id")
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    name: str = ""
+    abbrev: Optional[str] = None
+    is_mine: bool = False
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Projection(SQLModel, table=True):
+    __table_args__ = (Index("uq_projection_week_source_player_id", "week", "source", "player_id", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
     player_id: int = Field(foreign_key="player.id", index=True)
-    week: int = Field(index=True)
+    week: int
     source: str = Field(index=True)
     expected: float
     stdev: Optional[float] = Field(default=None)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ProjectionHistory(SQLModel, table=True):
+    """Append-only log of projection values; ``Projection`` holds only the current one."""
+    __table_args__ = (
+        Index(
+            "ix_projectionhistory_season_week_source_player_id_recorded_at",
+            "season", "week", "source", "player_id", "recorded_at",
+            postgresql_include=["expected", "stdev"],
+        ),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    season: int
+    week: int
+    source: str
+    player_id: int = Field(foreign_key="player.id")
+    expected: float
+    stdev: Optional[float] = Field(default=None)
+    recorded_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ActualPoints(SQLModel, table=True):
+    """Fantasy points a player actually scored in a week; what backtests score lineups against."""
+    __table_args__ = (Index("uq_actualpoints_season_week_player_id", "season", "week", "player_id", unique=True),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    season: int
+    week: int
+    player_id: int = Field(foreign_key="player.id")
+    points: float
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class Injury(SQLModel, table=True):
+    __table_args__ = (Index("uq_injury_week_player_id", "week", "player_id", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
     player_id: int = Field(foreign_key="player.id", index=True)
-    week: int = Field(index=True)
+    week: int
     status: str
     note: Optional[str] = Field(default=None)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ChangeEvent(SQLModel, table=True):
+    """Append-only log of detected data changes; ``id`` doubles as the consumer cursor."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(index=True)
+    week: Optional[int] = Field(default=None, index=True)
+    player_id: Optional[int] = Field(default=None, foreign_key="player.id", index=True)
+    data: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ChangeCursor(SQLModel, table=True):
+    """Last ``ChangeEvent.id`` each consumer (e.g. Slack alerts) has processed."""
+    consumer: str = Field(primary_key=True)
+    last_id: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class ADP(SQLModel, table=True):
+    __table_args__ = (Index("uq_adp_player_id_source", "player_id", "source", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
-    player_id: int = Field(foreign_key="player.id", index=True)
+    player_id: int = Field(foreign_key="player.id")
     source: str = Field(index=True)
     rank: float
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class SettingsRow(SQLModel, table=True):
-    id: int = Field(default=1, primary_key=True)
+    """Scoring, weights and ``current_week`` for one league (see services/leagues.py)."""
+    __table_args__ = (Index("uq_settingsrow_league_id", "league_id", unique=True),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    league_id: int = Field(default=DEFAULT_LEAGUE, foreign_key="league.id")
     data: dict = Field(sa_column=Column(JSON))
 
 
 class LineupResult(SQLModel, table=True):
+    __table_args__ = (Index("ix_lineupresult_league_id_week", "league_id", "week"),)
     id: Optional[int] = Field(default=None, primary_key=True)
+    league_id: int = DEFAULT_LEAGUE
     week: int
     objective: str
     results_json: dict = Field(sa_column=Column(JSON))
+    # sha1 of results_json; identical results are stored once (see services/results.py)
+    content_hash: str = Field(default="", index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class WaiverRec(SQLModel, table=True):
+    __table_args__ = (Index("ix_waiverrec_league_id_week", "league_id", "week"),)
     id: Optional[int] = Field(default=None, primary_key=True)
+    league_id: int = DEFAULT_LEAGUE
     week: int
     data: dict = Field(sa_column=Column(JSON))
+    content_hash: str = Field(default="", index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class TradeEval(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    league_id: int = Field(default=DEFAULT_LEAGUE, index=True)
     data: dict = Field(sa_column=Column(JSON))
+    content_hash: str = Field(default="", index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Game(SQLModel, table=True):
+    __table_args__ = (Index("uq_game_week_team", "week", "team", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
-    week: int = Field(index=True)
+    week: int
     team: str = Field(index=True)
     opponent: Optional[str] = None
     home: bool = True
@@ -97,8 +195,9 @@ class Game(SQLModel, table=True):
 
 
 class DVP(SQLModel, table=True):
+    __table_args__ = (Index("uq_dvp_team_position", "team", "position", unique=True),)
     id: Optional[int] = Field(default=None, primary_key=True)
-    team: str = Field(index=True)
+    team: str
     position: str = Field(index=True)
     rank: Optional[int] = None  # 1 = toughest or easiest depending on convention; we'll use 1 = easiest (most points allowed)
     fp_allowed: Optional[float] = None
@@ -110,3 +209,86 @@ class User(SQLModel, table=True):
     email: str = Field(index=True, unique=True)
     password_hash: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DashboardSnapshot(SQLModel, table=True):
+    """Precomputed ``/api/dashboard/cards`` payload for one league and week (see services/dashboard.py)."""
+    league_id: int = Field(default=DEFAULT_LEAGUE, primary_key=True, foreign_key="league.id")
+    week: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    sections: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    dirty: list = Field(default_factory=list, sa_column=Column(JSON))
+    etag: str = ""
+    built_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+class Job(SQLModel, table=True):
+    """Background job (see jobs/queue.py); ``stages`` records per-stage progress and timings."""
+    __table_args__ = (
+        # At most one queued/running job per kind, week and league
+        Index(
+            "uq_job_active_kind_week_league_id", "kind", "week", "league_id", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(index=True)
+    week: Optional[int] = Field(default=None, index=True)
+    league_id: int = Field(default=DEFAULT_LEAGUE, index=True)
+    status: JobStatus = Field(default=JobStatus.queued, index=True)
+    params: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    stages: list = Field(default_factory=list, sa_column=Column(JSON))
+    result: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    # Process running the job and its last heartbeat; a stale heartbeat means the owner died
+    owner: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class PipelineRun(SQLModel, table=True):
+    """One execution of a stage graph (see ``jobs.dag``); ``stages`` holds per-stage
+    status, timings and input fingerprints."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    pipeline: str = Field(index=True)
+    week: Optional[int] = Field(default=None, index=True)
+    status: str = "running"
+    stages: list = Field(default_factory=list, sa_column=Column(JSON))
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+
+
+class ScheduledRun(SQLModel, table=True):
+    """One firing of a cron job on the scheduler leader; the unique key keeps a
+    slot from running twice even if two processes briefly both think they lead."""
+    __table_args__ = (UniqueConstraint("job", "scheduled_for", name="uq_scheduledrun_job_slot"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job: str = Field(index=True)
+    scheduled_for: datetime
+    instance: str
+    status: str = "running"
+    error: Optional[str] = None
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+
+
+class CacheEpoch(SQLModel, table=True):
+    """Change counter per data kind and week (0 = every week); workers that cannot
+    LISTEN poll it to evict their in-process caches."""
+    kind: str = Field(primary_key=True)
+    week: int = Field(default=0, primary_key=True, sa_column_kwargs={"autoincrement": False})
+    epoch: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
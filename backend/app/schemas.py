@@ -36,3 +36,11 @@ class TradeResponse(BaseModel):
     delta_their: float
     rationale: str
 
+
+
+class LeagueIn(BaseModel):
+    name: str
+    espn_league_id: Optional[str] = None
+    espn_team_id: Optional[str] = None
+    # Settings for the new league; a copy of the default league's when omitted
+    data: Optional[Dict[str, Any]] = None
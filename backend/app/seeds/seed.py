@@ -4,7 +4,8 @@ from datetime import datetime
 from sqlmodel import Session, select
 
 from ..db import engine
-from ..models import Player, Roster, RosterStatus, Projection, ADP
+from ..models import DEFAULT_LEAGUE, Player, Roster, RosterStatus, Projection, ADP
+from ..services.projection_history import append_history
 
 
 def run() -> None:
@@ -36,7 +37,7 @@ def run() -> None:
         # Add roster: mark top as my team, others as FA
         my_ids = {players[i].id for i in range(min(9, len(players)))}
         for p in players:
-            r = session.exec(select(Roster).where(Roster.player_id == p.id)).first()
+            r = session.exec(select(Roster).where(Roster.league_id == DEFAULT_LEAGUE, Roster.player_id == p.id)).first()
             if not r:
                 r = Roster(player_id=p.id, status=RosterStatus.start if p.position in {"QB","RB","WR","TE","K","DST"} else RosterStatus.bench, my_team=(p.id in my_ids))
                 if not r.my_team:
@@ -44,6 +45,7 @@ def run() -> None:
                 session.add(r)
         # Add simple projections for week 1
         week = 1
+        history = {}  # source -> rows, appended once per source
         for p in players:
             for src, exp in [("espn", 10.0), ("fantasypros", 9.0)]:
                 base = 0.0
@@ -63,6 +65,9 @@ def run() -> None:
                 pr = session.exec(select(Projection).where(Projection.player_id == p.id, Projection.week == week, Projection.source == src)).first()
                 if not pr:
                     session.add(Projection(player_id=p.id, week=week, source=src, expected=exp_val, stdev=2.0))
+                    history.setdefault(src, []).append((p.id, exp_val, 2.0))
+        for src, rows in history.items():
+            append_history(session, week, src, rows)
         # ADP
         for i, p in enumerate(players, start=1):
             a = session.exec(select(ADP).where(ADP.player_id == p.id)).first()
@@ -3,18 +3,21 @@ from __future__ import annotations
 import json
 import smtplib
 from email.mime.text import MIMEText
-from typing import Optional
+from typing import List, Optional, Sequence
 
-import httpx
+from sqlmodel import Session, select
 
+from ingest.transport import async_http_client
+from ..models import ChangeEvent, Player
 from ..settings import get_settings
+from .changes import changes_since, collapse, get_cursor, set_cursor
 
 
 async def send_slack_message(text: str) -> bool:
     settings = get_settings()
     if not settings.slack_webhook_url:
         return False
-    async with httpx.AsyncClient(timeout=10) as client:
+    async with async_http_client(timeout=10) as client:
         r = await client.post(settings.slack_webhook_url, json={"text": text})
         return r.status_code // 100 == 2
 
@@ -33,3 +36,51 @@ def send_sms_via_email(to_number_at_gateway: str, text: str) -> bool:
         server.sendmail(settings.smtp_from, [to_number_at_gateway], msg.as_string())
     return True
 
+
+
+def format_changes(session: Session, events: Sequence[ChangeEvent]) -> List[str]:
+    pids = {e.player_id for e in events if e.player_id is not None}
+    names = dict(session.exec(select(Player.id, Player.name).where(Player.id.in_(pids))).all()) if pids else {}
+    lines: List[str] = []
+    for e in events:
+        d = e.data or {}
+        name = names.get(e.player_id, f"#{e.player_id}")
+        if e.kind == "injury":
+            note = f" ({d['note']})" if d.get("note") else ""
+            lines.append(f"• {name}: {d.get('old')} → {d.get('new')}{note}")
+        elif e.kind == "projection":
+            lines.append(f"• {name}: projection {d.get('old')} → {d.get('new')} (wk {e.week})")
+        elif e.kind == "lineup":
+            parts = []
+            if d.get("added"):
+                parts.append("in " + ", ".join(d["added"]))
+            if d.get("removed"):
+                parts.append("out " + ", ".join(d["removed"]))
+            lines.append(f"• Lineup wk {e.week}: " + "; ".join(parts))
+        else:
+            lines.append(f"• {e.kind}: {d}")
+    return lines
+
+
+async def dispatch_change_alerts(session: Session, consumer: str = "slack", header: Optional[str] = None, limit: int = 500) -> int:
+    """Post new change events as one deduplicated Slack message; returns lines sent.
+
+    Reads events past the consumer's cursor, collapses repeats for the same player
+    (see ``changes.collapse``) and posts nothing when the batch nets out to no
+    change. The cursor only advances once the message went out, so failed posts are
+    retried on the next run; without a Slack webhook nothing is read or consumed.
+    """
+    if not get_settings().slack_webhook_url:
+        return 0
+    cursor = get_cursor(session, consumer)
+    events = changes_since(session, cursor, limit=limit)
+    if not events:
+        return 0
+    lines = format_changes(session, collapse(events))
+    if lines:
+        text = "\n".join(([header] if header else []) + lines)
+        if not await send_slack_message(text):
+            return 0
+    set_cursor(session, consumer, events[-1].id)
+    session.commit()
+    return len(lines)
@@ -0,0 +1,271 @@
+"""
+Offline backtester for the blend weights and the lineup risk setting.
+
+Replays the played weeks of a season: each week's source projections as they
+stood at lock (``projections_as_of`` at the week's first kickoff when the
+schedule has it, else the latest history) are blended with every candidate
+configuration, and the lineup picked from the league's roster is scored against
+``ActualPoints``. Regret is the gap to the hindsight-optimal lineup (same
+players, picked on actual points).
+
+The grid is every blend weight vector on the simplex at ``step`` (shared by all
+positions) times every risk lambda, plus the league's current settings as the
+baseline. Evaluation is vectorized: weeks are padded into one ``weeks x players
+x sources`` block, ``blend_matrix`` blends a whole chunk of configurations at
+once, and lineups are filled slot by slot with an argmax over the player axis.
+With one FLEX filled after the positional slots that picks the same starters as
+the ILP in services/optimizer.py (stack bonus aside). Injury penalties are left
+out: injury status is not kept per season. Chunks of the grid run on a process
+pool.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from ..models import DEFAULT_LEAGUE, ActualPoints, Game, Player, Roster, RosterStatus
+from ..settings import get_settings
+from .leagues import league_settings, risk_lambda, save_league_settings
+from .optimizer import FLEX_POS, LINEUP_SLOTS
+from .projection_history import projections_as_of
+from .projections import BLENDED, DEFAULT_ERROR_PRIOR, DEFAULT_WEIGHTS, SOURCE_ERROR_PRIOR, blend_matrix, get_weights, position_weights, write_blended
+
+
+POSITIONS = [slot for slot, _ in LINEUP_SLOTS if slot != "FLEX"]
+POS_INDEX = {p: i for i, p in enumerate(POSITIONS)}
+FLEX_INDEX = [POS_INDEX[p] for p in sorted(FLEX_POS)]
+
+DEFAULT_LAMBDAS = (0.0, 0.2, 0.35, 0.5)
+# Array cells (configs x weeks x players x sources) evaluated per chunk
+CHUNK_CELLS = 4_000_000
+
+
+@dataclass
+class SeasonData:
+    season: int
+    weeks: List[int]
+    sources: List[str]
+    pos: np.ndarray  # weeks x players, index into POSITIONS; -1 pads
+    values: np.ndarray  # weeks x players x sources, NaN where a source is missing
+    stdevs: np.ndarray  # weeks x players x sources
+    actual: np.ndarray  # weeks x players, 0 where not recorded
+
+
+def lock_time(session: Session, season: int, week: int) -> datetime:
+    # The schedule only covers the current season
+    if season == get_settings().season:
+        kickoff = session.exec(select(func.min(Game.kickoff_utc)).where(Game.week == week)).one()
+        if kickoff is not None:
+            return kickoff
+    return datetime.utcnow()
+
+
+def load_season(
+    session: Session, season: int, weeks: Iterable[int], pool: str = "roster", league_id: int = DEFAULT_LEAGUE
+) -> SeasonData:
+    """Projections at lock and actual points for the weeks that have both.
+
+    ``pool="roster"`` replays the league's current roster (the players the
+    optimizer would consider); ``pool="all"`` every projected player.
+    """
+    members = None
+    if pool == "roster":
+        members = set(session.exec(
+            select(Roster.player_id).where(
+                Roster.league_id == league_id,
+                Roster.my_team == True,  # noqa: E712
+                Roster.status.in_([RosterStatus.start, RosterStatus.bench, RosterStatus.ir]),
+            )
+        ).all())
+    played = []
+    for week in weeks:
+        actual = dict(session.exec(
+            select(ActualPoints.player_id, ActualPoints.points).where(ActualPoints.season == season, ActualPoints.week == week)
+        ).all())
+        if not actual:
+            continue
+        rows = [
+            r for r in projections_as_of(session, week, lock_time(session, season, week), season=season)
+            if r.source != BLENDED and (members is None or r.player_id in members)
+        ]
+        if rows:
+            played.append((week, rows, actual))
+    pids = {r.player_id for _, rows, _ in played for r in rows}
+    positions = dict(session.exec(select(Player.id, Player.position).where(Player.id.in_(pids))).all()) if pids else {}
+    sources = sorted({r.source for _, rows, _ in played for r in rows})
+    src_col = {s: i for i, s in enumerate(sources)}
+
+    # Each week's players in rows of its own block, padded to the busiest week
+    week_players = [sorted({r.player_id for r in rows if positions.get(r.player_id) in POS_INDEX}) for _, rows, _ in played]
+    shape = (len(played), max((len(p) for p in week_players), default=0))
+    pos = np.full(shape, -1, dtype=np.int64)
+    actual_pts = np.zeros(shape)
+    values = np.full(shape + (len(sources),), np.nan)
+    stdevs = np.zeros(shape + (len(sources),))
+    for w, ((_, rows, actual), players) in enumerate(zip(played, week_players)):
+        row_of = {pid: i for i, pid in enumerate(players)}
+        for pid, i in row_of.items():
+            pos[w, i] = POS_INDEX[positions[pid]]
+            actual_pts[w, i] = actual.get(pid, 0.0)
+        for r in rows:
+            i = row_of.get(r.player_id)
+            if i is not None:
+                values[w, i, src_col[r.source]] = r.expected
+                stdevs[w, i, src_col[r.source]] = r.stdev if r.stdev is not None else SOURCE_ERROR_PRIOR.get(r.source, DEFAULT_ERROR_PRIOR)
+    return SeasonData(season, [w for w, _, _ in played], sources, pos, values, stdevs, actual_pts)
+
+
+def weight_grid(n_sources: int, step: float) -> np.ndarray:
+    """Every weight vector on the simplex with spacing ``step``: ``n x n_sources``."""
+    k = max(1, round(1 / step))
+    return np.array([c for c in itertools.product(range(k + 1), repeat=n_sources) if sum(c) == k], dtype=float) / k
+
+
+def lineup_points(score: np.ndarray, pos: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """Actual points of the lineup that maximizes ``score`` (``... x weeks x players``) per week."""
+    score = np.where(np.isnan(score) | (pos < 0), -np.inf, score)
+    actual = np.broadcast_to(actual, score.shape)
+    total = np.zeros(score.shape[:-1])
+    for slot, count in LINEUP_SLOTS:
+        eligible = np.isin(pos, FLEX_INDEX) if slot == "FLEX" else pos == POS_INDEX[slot]
+        for _ in range(count):
+            masked = np.where(eligible, score, -np.inf)
+            best = masked.argmax(axis=-1)[..., None]
+            picked = np.take_along_axis(masked, best, -1) > -np.inf
+            total += np.where(picked, np.take_along_axis(actual, best, -1), 0.0)[..., 0]
+            # A starter can't fill a later slot
+            np.put_along_axis(score, best, np.where(picked, -np.inf, np.take_along_axis(score, best, -1)), -1)
+    return total
+
+
+def optimal_points(data: SeasonData) -> np.ndarray:
+    """Hindsight-optimal lineup points per week."""
+    return lineup_points(data.actual, data.pos, data.actual)
+
+
+def evaluate(data: SeasonData, weights: np.ndarray, lams: np.ndarray) -> np.ndarray:
+    """Points per config and week for ``weights`` (``configs x positions x sources``) and ``lams``."""
+    player_weights = weights[:, np.maximum(data.pos, 0)]  # configs x weeks x players x sources
+    expected, stdev = blend_matrix(data.values, data.stdevs, player_weights)
+    return lineup_points(expected - lams[:, None, None] * stdev, data.pos, data.actual)
+
+
+_DATA: Optional[SeasonData] = None
+
+
+def _init_worker(data: SeasonData) -> None:
+    global _DATA
+    _DATA = data
+
+
+def _evaluate_chunk(chunk: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    return evaluate(_DATA, *chunk)
+
+
+def run_grid(data: SeasonData, weights: np.ndarray, lams: np.ndarray, workers: int = 1) -> np.ndarray:
+    """``evaluate`` over the whole grid in chunks, on ``workers`` processes."""
+    per = max(1, CHUNK_CELLS // max(1, data.values.size))
+    if workers > 1:
+        per = min(per, math.ceil(len(lams) / (workers * 4)))
+    chunks = [(weights[i:i + per], lams[i:i + per]) for i in range(0, len(lams), per)]
+    if workers <= 1 or len(chunks) == 1:
+        return np.concatenate([evaluate(data, *c) for c in chunks])
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+        return np.concatenate(list(pool.map(_evaluate_chunk, chunks)))
+
+
+def run_backtest(
+    session: Session,
+    season: int,
+    weeks: Iterable[int],
+    step: float = 0.1,
+    lambdas: Sequence[float] = DEFAULT_LAMBDAS,
+    pool: str = "roster",
+    workers: Optional[int] = None,
+    league_id: int = DEFAULT_LEAGUE,
+) -> Dict[str, Any]:
+    """Backtest the grid plus the current settings; returns the report (best config first in ``top``)."""
+    started = time.perf_counter()
+    data = load_season(session, season, weeks, pool=pool, league_id=league_id)
+    if not data.weeks:
+        raise ValueError(f"no weeks of season {season} have both projection history and actual points")
+    grid = weight_grid(len(data.sources), step)
+    base_weights = position_weights(get_weights(session), POSITIONS, data.sources)
+    weights = np.concatenate([base_weights[None], np.repeat(np.broadcast_to(grid[:, None, :], (len(grid), len(POSITIONS), len(data.sources))), len(lambdas), axis=0)])
+    lams = np.concatenate([[risk_lambda(session, league_id)], np.tile(np.asarray(lambdas, dtype=float), len(grid))])
+
+    points = run_grid(data, weights, lams, workers or os.cpu_count() or 1)
+    optimal = optimal_points(data)
+    totals = points.sum(axis=1)
+    # Ties keep the lower index, so the current settings win unless beaten
+    order = np.argsort(-totals, kind="stable")
+
+    def describe(i: int) -> Dict[str, Any]:
+        return {
+            "weights": {p: {s: round(float(weights[i, j, c]), 4) for c, s in enumerate(data.sources)} for j, p in enumerate(POSITIONS)},
+            "risk_lambda": float(lams[i]),
+            "points": round(float(totals[i]), 2),
+            "regret": round(float(optimal.sum() - totals[i]), 2),
+        }
+
+    best = int(order[0])
+    return {
+        "season": season,
+        "weeks": data.weeks,
+        "pool": pool,
+        "sources": data.sources,
+        "players": int((data.pos >= 0).sum(axis=1).max()),
+        "configs": len(lams),
+        "optimal_points": round(float(optimal.sum()), 2),
+        "baseline": describe(0),
+        "best": {
+            **describe(best),
+            "by_week": [
+                {"week": w, "points": round(float(points[best, i]), 2), "optimal": round(float(optimal[i]), 2)}
+                for i, w in enumerate(data.weeks)
+            ],
+        },
+        "top": [describe(int(i)) for i in order[:10]],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def merge_weights(current: Dict[str, Dict[str, float]], tuned: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Fold backtested weights into ``current`` per position.
+
+    Sources the backtest did not see (no projection history) keep their weight;
+    the tuned sources split the weight they held before in the tuned proportions
+    (all of a unit weight if they held none).
+    """
+    out = {p: dict(w) for p, w in current.items()}
+    for pos, weights in tuned.items():
+        # A position missing from the settings blends espn/fantasypros 60/40 (see position_weights)
+        merged = out.setdefault(pos, {"espn": 0.6, "fantasypros": 0.4})
+        mass = sum(merged.get(src, 0.0) for src in weights) or 1.0
+        merged.update({src: round(w * mass, 4) for src, w in weights.items()})
+    return out
+
+
+def apply_best(session: Session, report: Dict[str, Any], league_id: int = DEFAULT_LEAGUE) -> Dict[str, Any]:
+    """Merge the best config's ``weights`` into the league's (see ``merge_weights``) and store
+    its ``risk_lambda``; returns the previous settings. Does not commit."""
+    best = report["best"]
+    current = league_settings(session, league_id)
+    weights = merge_weights(current.get("weights") or DEFAULT_WEIGHTS, best["weights"])
+    data = {**current, "weights": weights, "risk_lambda": best["risk_lambda"]}
+    old = save_league_settings(session, league_id, data)
+    if league_id == DEFAULT_LEAGUE and old.get("weights") != data["weights"]:
+        # Blended rows are shared and follow the default league's weights
+        write_blended(session, int(data.get("current_week", 1)), full=True)
+    return old
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from ..db import after_commit
+from ..models import ChangeCursor, ChangeEvent
+from ..settings import get_settings
+
+
+class _ChangeFlush:
+    """Events recorded during one transaction, inserted after it commits."""
+
+    def __init__(self) -> None:
+        self.events: List[ChangeEvent] = []
+
+    def __call__(self, session: Session) -> None:
+        # Stamped at insert: the settle window in changes_since counts from here
+        now = datetime.utcnow()
+        for event in self.events:
+            event.created_at = now
+        session.add_all(self.events)
+
+
+def _pending(session: Session) -> List[ChangeEvent]:
+    return after_commit(session, _ChangeFlush(), key="change_events").events
+
+
+def record_change(session: Session, kind: str, week: Optional[int] = None, player_id: Optional[int] = None, **data: Any) -> ChangeEvent:
+    """Log a change event once the caller's transaction commits (nothing on rollback).
+
+    The event is inserted in a short transaction of its own right after that commit,
+    so its id is handed out moments before it becomes visible, however long the
+    caller's transaction ran. ``id`` is set once that insert is done.
+    """
+    event = ChangeEvent(kind=kind, week=week, player_id=player_id, data=data)
+    _pending(session).append(event)
+    return event
+
+
+def changes_since(
+    session: Session, cursor: int = 0, kinds: Optional[Sequence[str]] = None, limit: int = 500, settle_s: Optional[float] = None
+) -> List[ChangeEvent]:
+    """Events with ``id > cursor`` in id order; pass the last id back as the next cursor.
+
+    Ids are handed out at insert but become visible at commit, so a newer id can be
+    visible while an older one is still uncommitted. Events go in through short
+    transactions of their own (see ``record_change``) stamped at insert, so
+    everything from the first event younger than ``settle_s`` (default
+    ``CHANGE_SETTLE_S``) on is held back and the cursor never passes an event that
+    may still appear. SQLite has a single writer and commits ids in order, so there
+    nothing is held back by default.
+    """
+    if settle_s is None:
+        settle_s = 0.0 if session.get_bind().dialect.name == "sqlite" else get_settings().change_settle_s
+    stmt = select(ChangeEvent).where(ChangeEvent.id > cursor)
+    if settle_s > 0:
+        cutoff = datetime.utcnow() - timedelta(seconds=settle_s)
+        unsettled = session.exec(select(func.min(ChangeEvent.id)).where(ChangeEvent.id > cursor, ChangeEvent.created_at > cutoff)).one()
+        if unsettled is not None:
+            stmt = stmt.where(ChangeEvent.id < unsettled)
+    if kinds:
+        stmt = stmt.where(ChangeEvent.kind.in_(list(kinds)))
+    return list(session.exec(stmt.order_by(ChangeEvent.id).limit(limit)).all())
+
+
+def record_lineup_change(session: Session, week: int, result: Dict[str, Any]) -> Optional[ChangeEvent]:
+    """Log a ``lineup`` event when the starters differ from the last logged lineup for the week."""
+    names = {s["player_id"]: s["name"] for s in result.get("starters", [])}
+    starters = sorted(names)
+    # A lineup logged earlier in this transaction is not inserted yet
+    pending = [e for e in _pending(session) if e.kind == "lineup" and e.week == week]
+    last = pending[-1] if pending else session.exec(
+        select(ChangeEvent).where(ChangeEvent.kind == "lineup", ChangeEvent.week == week).order_by(ChangeEvent.id.desc()).limit(1)
+    ).first()
+    previous = dict(zip(last.data.get("starters", []), last.data.get("names", []))) if last else {}
+    if starters == sorted(previous):
+        return None
+    return record_change(
+        session,
+        "lineup",
+        week=week,
+        starters=starters,
+        names=[names[pid] for pid in starters],
+        added=[names[pid] for pid in starters if pid not in previous],
+        removed=[name for pid, name in previous.items() if pid not in names],
+    )
+
+
+def get_cursor(session: Session, consumer: str) -> int:
+    row = session.get(ChangeCursor, consumer)
+    return row.last_id if row else 0
+
+
+def set_cursor(session: Session, consumer: str, last_id: int) -> None:
+    row = session.get(ChangeCursor, consumer)
+    if row is None:
+        session.add(ChangeCursor(consumer=consumer, last_id=last_id))
+    else:
+        row.last_id = last_id
+        row.updated_at = datetime.utcnow()
+
+
+def collapse(events: Sequence[ChangeEvent]) -> List[ChangeEvent]:
+    """Deduplicate a batch: one entry per (kind, week, player), keeping the first
+    ``old`` and the latest state (for lineups, the latest lineup); transitions that
+    end where they started are dropped."""
+    merged: Dict[Tuple[str, Optional[int], Optional[int]], ChangeEvent] = {}
+    for e in events:
+        key = (e.kind, e.week, e.player_id)
+        first = merged.get(key)
+        if first is None:
+            merged[key] = e
+            continue
+        data = dict(e.data)
+        if "old" in first.data:
+            data["old"] = first.data["old"]
+        if e.kind == "lineup":
+            # Re-derive added/removed against the lineup before the batch started
+            before = (set(first.data.get("names", [])) - set(first.data.get("added", []))) | set(first.data.get("removed", []))
+            now = data.get("names", [])
+            data["added"] = [n for n in now if n not in before]
+            data["removed"] = sorted(before - set(now))
+        merged[key] = ChangeEvent(id=e.id, kind=e.kind, week=e.week, player_id=e.player_id, data=data, created_at=e.created_at)
+    def unchanged(e: ChangeEvent) -> bool:
+        if e.kind == "lineup":
+            return not e.data.get("added") and not e.data.get("removed")
+        return "old" in e.data and "new" in e.data and e.data["old"] == e.data["new"]
+
+    return [e for e in merged.values() if not unchanged(e)]
@@ -0,0 +1,292 @@
+"""
+Materialized dashboard cards.
+
+``/api/dashboard/cards`` reads one ``DashboardSnapshot`` row per league and week. Each card
+section depends on a few kinds of data; writers call ``mark_dashboard_dirty`` with
+the kinds they touched and only the affected sections are rebuilt by
+``refresh_dashboard`` (the weekly pipeline, league recomputes and the update
+routes). Reads never write: a missing or dirty snapshot is built in memory for
+the response and persisted by the next refresh.
+
+``mark_dashboard_dirty`` also publishes the kinds on the invalidation bus, which
+evicts the in-process copy kept by ``dashboard_payload`` on every worker. Roster
+changes are league-scoped: they are published as ``roster:<league_id>`` and only
+dirty that league's snapshots.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, true
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from ..cache import derived
+from ..db import after_commit
+from ..invalidation import publish
+from ..models import DEFAULT_LEAGUE, DashboardSnapshot, DVP, Game, Injury, Player, Roster, RosterStatus
+from .vorp import compute_vorp
+from .waivers import waiver_suggestions
+
+
+# Data kind -> sections that read it
+SECTION_DEPS: Dict[str, Tuple[str, ...]] = {
+    "injury": ("injuries",),
+    "roster": ("byes", "weather", "late_swap", "waivers", "trade", "matchups"),
+    "schedule": ("weather", "late_swap", "matchups"),
+    "projection": ("waivers", "trade"),
+    "dvp": ("matchups",),
+}
+SECTIONS = ("injuries", "byes", "weather", "late_swap", "waivers", "trade", "matchups")
+# Kinds whose rows belong to one league
+LEAGUE_KINDS = {"roster"}
+
+
+def league_kind(kind: str, league_id: Optional[int]) -> str:
+    """Bus/cache tag for ``kind``: ``roster:3`` for league 3, plain ``roster`` for every league."""
+    return f"{kind}:{league_id}" if kind in LEAGUE_KINDS and league_id is not None else kind
+
+
+class _Ctx:
+    """Per-rebuild lazy loads shared between sections (each query runs at most once)."""
+
+    def __init__(self, session: Session, week: int, league_id: int = DEFAULT_LEAGUE):
+        self.session = session
+        self.week = week
+        self.league_id = league_id
+        self._memo: Dict[str, Any] = {}
+
+    def _get(self, name: str, load: Callable[[], Any]) -> Any:
+        if name not in self._memo:
+            self._memo[name] = load()
+        return self._memo[name]
+
+    @property
+    def my_roster(self) -> List[Tuple[Roster, Player]]:
+        return self._get("my_roster", lambda: self.session.exec(
+            select(Roster, Player).join(Player, Roster.player_id == Player.id).where(Roster.league_id == self.league_id, Roster.my_team == True)  # noqa: E712
+        ).all())
+
+    @property
+    def starters(self) -> List[Player]:
+        return [p for r, p in self.my_roster if r.status == RosterStatus.start]
+
+    @property
+    def team_games(self) -> Dict[str, Game]:
+        return self._get("games", lambda: {g.team: g for g in self.session.exec(select(Game).where(Game.week == self.week)).all()})
+
+    @property
+    def vorp(self) -> Dict[int, float]:
+        return self._get("vorp", lambda: compute_vorp(self.session, self.week))
+
+
+def _injuries(ctx: _Ctx) -> List[Dict[str, Any]]:
+    inj = ctx.session.exec(select(Injury, Player).join(Player, Injury.player_id == Player.id).where(Injury.week == ctx.week)).all()
+    cards = []
+    for i, p in inj:
+        if i.status or i.note:
+            tag = 'Expected to play' if (i.status or '').lower() == 'questionable' and (i.note or '').lower().find('expected') >= 0 else (i.status or 'Update')
+            cards.append({"type": "injury", "player": p.name, "team": p.team, "tag": tag, "status": i.status, "note": i.note, "timestamp": i.updated_at.isoformat()})
+    return cards
+
+
+def _byes(ctx: _Ctx) -> List[Dict[str, Any]]:
+    # Bench grouped by position once, instead of one query per starter on bye
+    bench_by_pos: Dict[str, List[Player]] = {}
+    for r, p in ctx.my_roster:
+        if r.status == RosterStatus.bench:
+            bench_by_pos.setdefault(p.position, []).append(p)
+    cards = []
+    for p in ctx.starters:
+        if p.bye_week and p.bye_week == ctx.week + 1:
+            bench = bench_by_pos.get(p.position)
+            cards.append({"type": "bye", "player": p.name, "team": p.team, "position": p.position, "bye_week": p.bye_week, "replacement": bench[0].name if bench else None})
+    return cards
+
+
+def _weather(ctx: _Ctx) -> List[Dict[str, Any]]:
+    cards = []
+    for p in ctx.starters:
+        g = ctx.team_games.get(p.team or "")
+        wx = g.weather if g else None
+        if wx:
+            wind = (wx.get('wind_kmh') or 0)
+            precip = (wx.get('precip_prob') or 0)
+            if (p.position in ('QB', 'K') and wind and wind >= 25) or (precip and precip >= 60):
+                cards.append({"type": "weather", "player": p.name, "team": p.team, "wx": wx})
+    return cards
+
+
+def _late_swap(ctx: _Ctx) -> List[Dict[str, Any]]:
+    cards = []
+    for p in ctx.starters:
+        g = ctx.team_games.get(p.team or "")
+        if g and g.kickoff_utc and g.kickoff_utc.weekday() == 6 and g.kickoff_utc.hour >= 20:
+            cards.append({"type": "late_swap", "player": p.name, "team": p.team, "kickoff": g.kickoff_utc.isoformat()})
+    return cards
+
+
+def _waivers(ctx: _Ctx) -> List[Dict[str, Any]]:
+    ww = waiver_suggestions(ctx.session, ctx.week, vorp=ctx.vorp, league_id=ctx.league_id)
+    return [{"type": "waiver", "name": w['name'], "team": w['position'], "vorp_delta": w['vorp_delta'], "faab": w['faab_bid']} for w in ww[:3]]
+
+
+def _trade(ctx: _Ctx) -> List[Dict[str, Any]]:
+    total_vorp = sum(ctx.vorp.get(r.player_id, 0) for r, _ in ctx.my_roster)
+    return [{"type": "trade_pulse", "summary": f"Roster VORP total {round(total_vorp,1)} — Explore 1-2 upgrades at weakest positions."}]
+
+
+def _matchups(ctx: _Ctx) -> List[Dict[str, Any]]:
+    # S.o.S via DVP: flag easy (rank high fp allowed) or tough (rank low fp allowed)
+    opponents = []
+    for p in ctx.starters:
+        g = ctx.team_games.get(p.team or "")
+        if g and g.opponent:
+            opponents.append((p, g.opponent))
+    if not opponents:
+        return []
+    # Only this week's opponents, not the whole DVP table
+    opp_teams = sorted({opp for _, opp in opponents})
+    dvp_map = {(d.team, d.position): d for d in ctx.session.exec(select(DVP).where(DVP.team.in_(opp_teams))).all()}
+    cards = []
+    for p, opp in opponents:
+        d = dvp_map.get((opp, p.position))
+        if d and d.rank:
+            # Assume higher rank = easier (more points allowed). Thresholds: top 10 easy, bottom 10 tough
+            tag = None
+            if d.rank <= 10:
+                tag = "🔥 Easy matchup"
+            elif d.rank >= 23:
+                tag = "🧊 Tough matchup"
+            if tag:
+                cards.append({"type": "matchup", "player": p.name, "team": p.team, "position": p.position, "opponent": opp, "rank": d.rank, "fp_allowed": d.fp_allowed, "tag": tag})
+    return cards
+
+
+BUILDERS: Dict[str, Callable[[_Ctx], List[Dict[str, Any]]]] = {
+    "injuries": _injuries,
+    "byes": _byes,
+    "weather": _weather,
+    "late_swap": _late_swap,
+    "waivers": _waivers,
+    "trade": _trade,
+    "matchups": _matchups,
+}
+
+
+def _etag(sections: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(sections, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class _DirtyFlush:
+    """Dirty marks made during one transaction, applied after it commits."""
+
+    def __init__(self) -> None:
+        # (week, league_id) filter -> sections; None matches every week / league
+        self.marks: Dict[Tuple[Optional[int], Optional[int]], set] = {}
+
+    def __call__(self, session: Session) -> None:
+        if not self.marks:
+            return
+        def matches(snap: DashboardSnapshot, week: Optional[int], league_id: Optional[int]) -> bool:
+            return week in (None, snap.week) and league_id in (None, snap.league_id)
+        filters = [
+            and_(true(), *([DashboardSnapshot.week == w] if w is not None else []), *([DashboardSnapshot.league_id == lg] if lg is not None else []))
+            for w, lg in self.marks
+        ]
+        # One locked read in key order: concurrent flushes can't deadlock, and the
+        # merge runs on the latest committed list
+        stmt = (
+            select(DashboardSnapshot)
+            .where(or_(*filters))
+            .order_by(DashboardSnapshot.league_id, DashboardSnapshot.week)
+            .with_for_update()
+        )
+        for snap in session.exec(stmt).all():
+            sections = {s for (w, lg), secs in self.marks.items() if matches(snap, w, lg) for s in secs}
+            merged = sorted(set(snap.dirty or []) | sections)
+            if merged != snap.dirty:
+                snap.dirty = merged
+
+
+def mark_dashboard_dirty(session: Session, *kinds: str, week: Optional[int] = None, league_id: Optional[int] = None) -> None:
+    """Flag the sections that read ``kinds`` for rebuild (all weeks unless ``week``) and
+    publish the change to other workers. League-scoped kinds only touch ``league_id``'s
+    snapshots (every league's if None). Does not commit: the marks are applied in a
+    short transaction once the caller commits, so writers never hold snapshot rows
+    locked while they fetch or write."""
+    # Registered before publish's epoch flush: snapshot rows are always locked
+    # before epoch rows
+    flush = after_commit(session, _DirtyFlush(), key="dashboard_dirty")
+    publish(session, *(league_kind(k, league_id) for k in kinds), week=week)
+    sections = {s for k in kinds for s in SECTION_DEPS.get(k, ())}
+    if not sections:
+        return
+    scope = league_id if league_id is not None and all(k in LEAGUE_KINDS for k in kinds) else None
+    flush.marks.setdefault((week, scope), set()).update(sections)
+
+
+def _build(session: Session, week: int, league_id: int, sections: Dict[str, Any], todo: List[str]) -> Tuple[Dict[str, Any], str]:
+    ctx = _Ctx(session, week, league_id)
+    sections = dict(sections)
+    for name in todo:
+        sections[name] = BUILDERS[name](ctx)
+    return sections, _etag(sections)
+
+
+def refresh_dashboard(session: Session, week: int, full: bool = False, league_id: int = DEFAULT_LEAGUE) -> DashboardSnapshot:
+    """Rebuild the snapshot's dirty sections (all of them if new or ``full``) and commit.
+
+    The row is read ``FOR UPDATE`` and held until the commit, so a writer marking
+    sections dirty meanwhile waits and its marks land after ours instead of being
+    cleared; only the rebuilt sections are cleared. A missing row is first inserted
+    with every section dirty, so there is always a row to lock and to mark.
+    """
+    if session.get(DashboardSnapshot, (league_id, week)) is None:
+        session.add(DashboardSnapshot(league_id=league_id, week=week, sections={}, dirty=list(SECTIONS)))
+        try:
+            session.commit()
+        except IntegrityError:
+            # Another refresh inserted it first; lock theirs
+            session.rollback()
+    snap = session.exec(
+        select(DashboardSnapshot)
+        .where(DashboardSnapshot.league_id == league_id, DashboardSnapshot.week == week)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).one()
+    todo = list(SECTIONS) if full else [s for s in SECTIONS if s in (snap.dirty or [])]
+    if todo:
+        sections, etag = _build(session, week, league_id, snap.sections or {}, todo)
+        snap.sections = sections
+        snap.dirty = [s for s in snap.dirty or [] if s not in todo]
+        if etag != snap.etag:
+            snap.etag = etag
+            snap.built_at = datetime.utcnow()
+    # Also releases the row lock when there was nothing to do
+    session.commit()
+    return snap
+
+
+def get_dashboard(session: Session, week: int, league_id: int = DEFAULT_LEAGUE) -> DashboardSnapshot:
+    """Keyed read of the league's snapshot for the week. Does not write: missing or
+    dirty sections are built into an unsaved copy, left for ``refresh_dashboard`` to persist."""
+    snap = session.get(DashboardSnapshot, (league_id, week))
+    todo = list(SECTIONS) if snap is None else [s for s in SECTIONS if s in (snap.dirty or [])]
+    if not todo:
+        return snap
+    sections, etag = _build(session, week, league_id, snap.sections if snap is not None else {}, todo)
+    return DashboardSnapshot(league_id=league_id, week=week, sections=sections, dirty=[], etag=etag)
+
+
+def dashboard_payload(session: Session, week: int, league_id: int = DEFAULT_LEAGUE) -> Tuple[str, Dict[str, Any]]:
+    """``(etag, sections)`` for the league and week, kept in memory until one of its kinds changes."""
+    def load() -> Tuple[str, Dict[str, Any]]:
+        snap = get_dashboard(session, week, league_id)
+        return snap.etag, snap.sections
+    tags = [(kind, week) for kind in SECTION_DEPS] + [(league_kind(kind, league_id), week) for kind in LEAGUE_KINDS]
+    return derived.get(("dashboard", league_id, week), tags, load)
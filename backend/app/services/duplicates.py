@@ -0,0 +1,279 @@
+"""
+Duplicate ``Player`` detection and set-based merging.
+
+Detection (``find_candidates``) blocks players by (position, team, surname
+token) and scores name similarity only within a block; an unknown team or a
+FLEX position matches any, so roster-import rows still meet their ESPN twin.
+First names are compared after joining initials ("A.J." -> "aj"), then through
+a nickname map ("Mike" -> "michael"), then by prefix and edit similarity.
+
+Merging (``merge_duplicate_players``):
+
+players whose names normalize to the same key (``norm_name``) form a group. In
+one transaction:
+
+1. the (player_id, name_key) pairs of every group are loaded into a temp table
+   and a window function picks each group's canonical id (has an ESPN id, then
+   most projections, then lowest id) into a ``merge_map`` temp table;
+2. canonical rows inherit team/position from a duplicate when missing;
+3. rows that would collide on the natural-key unique indexes once re-pointed
+   are deleted (newest wins), one window-function DELETE per table;
+4. ``roster``/``projection``/``injury``/``adp``/``actualpoints`` and the append-only
+   ``changeevent``/``projectionhistory`` logs are re-pointed with one
+   ``UPDATE ... FROM merge_map`` each, and the duplicates deleted.
+
+With ``dry_run`` the same report is computed and the transaction rolled back.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from .dashboard import SECTION_DEPS, mark_dashboard_dirty
+
+# table -> (natural key besides player_id, which row survives a merge)
+MERGE_KEYS = {
+    "projection": ("week, source", "updated_at DESC, id DESC"),
+    "injury": ("week", "updated_at DESC, id DESC"),
+    "adp": ("source", "updated_at DESC, id DESC"),
+    "roster": ("league_id", "my_team DESC, id DESC"),
+    "actualpoints": ("season, week", "updated_at DESC, id DESC"),
+}
+REPOINT_TABLES = ("roster", "projection", "injury", "adp", "actualpoints", "changeevent", "projectionhistory")
+# player column -> when a value is worth keeping
+FILL_COLUMNS = {
+    "team": "{c} IS NOT NULL AND {c} <> ''",
+    "position": "{c} IS NOT NULL AND {c} NOT IN ('', 'FLEX')",
+}
+
+
+def norm_name(s: str) -> str:
+    s = (s or "").strip().lower()
+    for ch in ["’", "‘", "`", "´", "–", "—"]:
+        s = s.replace(ch, "'")
+    # strip trailing team abbreviations or dst
+    s = re.sub(r"\s+(?:[a-z]{2,3}|d\/st|dst)$", "", s)
+    s = re.sub(r"\b(jr|sr|ii|iii|iv|v)\.?$", "", s)
+    while "  " in s:
+        s = s.replace("  ", " ")
+    return s
+
+
+NICKNAMES = {
+    "mike": "michael", "mikey": "michael", "chris": "christopher", "matt": "matthew", "josh": "joshua",
+    "rob": "robert", "robbie": "robert", "bob": "robert", "bobby": "robert", "will": "william",
+    "bill": "william", "billy": "william", "nick": "nicholas", "tony": "anthony", "jon": "jonathan",
+    "johnny": "john", "dan": "daniel", "danny": "daniel", "jake": "jacob", "joe": "joseph", "joey": "joseph",
+    "tom": "thomas", "tommy": "thomas", "ben": "benjamin", "benny": "benjamin", "sam": "samuel",
+    "sammy": "samuel", "zach": "zachary", "zack": "zachary", "alex": "alexander", "andy": "andrew",
+    "drew": "andrew", "steve": "steven", "stephen": "steven", "gabe": "gabriel", "jeff": "jeffrey",
+    "greg": "gregory", "pat": "patrick", "ken": "kenneth", "kenny": "kenneth", "ron": "ronald",
+    "ronnie": "ronald", "jim": "james", "jimmy": "james", "jamie": "james", "cam": "cameron",
+    "dave": "david", "davey": "david", "ed": "edward", "eddie": "edward", "tim": "timothy",
+    "timmy": "timothy", "rich": "richard", "rick": "richard", "ricky": "richard", "dick": "richard",
+    "charlie": "charles", "chuck": "charles", "fred": "frederick", "freddie": "frederick",
+    "hank": "henry", "jerry": "gerald", "larry": "lawrence", "lenny": "leonard", "len": "leonard",
+    "max": "maxwell", "nate": "nathaniel", "nathan": "nathaniel", "pete": "peter", "phil": "phillip",
+    "philip": "phillip", "ray": "raymond", "ted": "theodore", "teddy": "theodore", "vince": "vincent",
+    "walt": "walter", "wes": "wesley",
+}
+# Scores at or above this are returned as merge candidates
+MIN_CONFIDENCE = 0.8
+WILDCARD_POSITIONS = {"", "FLEX"}
+
+
+def name_parts(name: str) -> Tuple[str, str]:
+    """(first, surname) of a name with punctuation dropped ("A.J." -> "aj", "Smith-Njigba" -> "smithnjigba")."""
+    tokens = re.sub(r"[.'\-]", "", norm_name(name)).split()
+    if not tokens:
+        return "", ""
+    # Everything before the surname is one token, so "a j" == "a.j." == "aj"
+    return "".join(tokens[:-1]), tokens[-1]
+
+
+def _first_name_score(a: str, b: str) -> Tuple[float, str]:
+    if a == b:
+        return 1.0, "same name"
+    if NICKNAMES.get(a, a) == NICKNAMES.get(b, b):
+        return 0.95, "nickname"
+    if not a or not b:
+        return 0.6, "surname only"
+    if (len(a) == 1 and b.startswith(a)) or (len(b) == 1 and a.startswith(b)):
+        return 0.85, "initial"
+    if a.startswith(b) or b.startswith(a):
+        return 0.9, "shortened first name"
+    return SequenceMatcher(None, a, b).ratio(), "similar first name"
+
+
+Row = Tuple[int, str, Optional[str], Optional[str], Optional[int]]  # id, name, position, team, espn_id
+
+
+def find_candidates(rows: Iterable[Row], min_confidence: float = MIN_CONFIDENCE) -> Dict[str, Any]:
+    """Ranked likely-duplicate pairs among ``rows``; see the module docstring for blocking."""
+    by_surname: Dict[str, Dict[Tuple[str, str], List[Tuple[Row, str]]]] = defaultdict(lambda: defaultdict(list))
+    players = 0
+    for row in rows:
+        players += 1
+        first, surname = name_parts(row[1])
+        if not surname:
+            continue
+        pos = (row[2] or "").upper()
+        by_surname[surname][("" if pos in WILDCARD_POSITIONS else pos, (row[3] or "").upper())].append((row, first))
+
+    candidates: List[Dict[str, Any]] = []
+    blocks = compared = 0
+    for blockmap in by_surname.values():
+        blocks += len(blockmap)
+        pairs = [pair for block in blockmap.values() for pair in combinations(block, 2)]
+        # Blocks with an unknown position/team also meet the compatible known ones
+        for k1, k2 in combinations(list(blockmap), 2):
+            if all(x == y or not x or not y for x, y in zip(k1, k2)):
+                pairs.extend((x, y) for x in blockmap[k1] for y in blockmap[k2])
+        for (a, fa), (b, fb) in pairs:
+            compared += 1
+            if a[4] and b[4] and a[4] != b[4]:
+                continue  # two different ESPN players
+            score, reason = _first_name_score(fa, fb)
+            score = 0.3 + 0.7 * score
+            if not (a[2] == b[2] and a[3] and a[3] == b[3]):
+                score *= 0.95  # matched through an unknown position/team
+            if score >= min_confidence:
+                candidates.append({
+                    "confidence": round(score, 3),
+                    "reason": reason,
+                    "players": [
+                        {"id": r[0], "name": r[1], "position": r[2], "team": r[3], "espn_id": r[4]}
+                        for r in sorted((a, b), key=lambda r: r[0])
+                    ],
+                })
+    candidates.sort(key=lambda c: (-c["confidence"], c["players"][0]["id"]))
+    return {"players": players, "blocks": blocks, "compared": compared, "candidates": candidates}
+
+
+def duplicate_candidates(session: Session, min_confidence: float = MIN_CONFIDENCE, limit: Optional[int] = None) -> Dict[str, Any]:
+    # Plain tuples, not ORM objects: this runs over every historical player row
+    rows = session.exec(text("SELECT id, name, position, team, espn_id FROM player")).all()
+    out = find_candidates((tuple(r) for r in rows), min_confidence)
+    if limit is not None:
+        out["candidates"] = out["candidates"][:limit]
+    return out
+
+
+def _drop_temp(session: Session) -> None:
+    for name in ("merge_key", "merge_map"):
+        session.exec(text(f"DROP TABLE IF EXISTS {name}"))
+
+
+def _temp_tables(session: Session) -> None:
+    # SQLite keeps temp tables for the pooled connection's lifetime
+    _drop_temp(session)
+    session.exec(text("CREATE TEMPORARY TABLE merge_key (player_id INTEGER PRIMARY KEY, name_key VARCHAR NOT NULL)"))
+    session.exec(text("CREATE TEMPORARY TABLE merge_map (dup_id INTEGER PRIMARY KEY, canonical_id INTEGER NOT NULL)"))
+
+
+def _load_keys(session: Session) -> int:
+    groups: Dict[str, List[int]] = {}
+    for pid, name in session.exec(text("SELECT id, name FROM player")).all():
+        groups.setdefault(norm_name(name), []).append(pid)
+    rows = [{"pid": pid, "key": key} for key, ids in groups.items() if len(ids) > 1 for pid in ids]
+    if rows:
+        session.exec(text("INSERT INTO merge_key (player_id, name_key) VALUES (:pid, :key)"), params=rows)
+    return len(rows)
+
+
+def _build_map(session: Session) -> None:
+    session.exec(text(
+        "INSERT INTO merge_map (dup_id, canonical_id) "
+        "SELECT player_id, canonical_id FROM ("
+        "  SELECT k.player_id, FIRST_VALUE(k.player_id) OVER ("
+        "    PARTITION BY k.name_key"
+        "    ORDER BY CASE WHEN p.espn_id IS NOT NULL THEN 1 ELSE 0 END DESC, COALESCE(c.n, 0) DESC, k.player_id"
+        "  ) AS canonical_id"
+        "  FROM merge_key k"
+        "  JOIN player p ON p.id = k.player_id"
+        "  LEFT JOIN (SELECT player_id, COUNT(*) AS n FROM projection"
+        "             WHERE player_id IN (SELECT player_id FROM merge_key) GROUP BY player_id) c"
+        "    ON c.player_id = k.player_id"
+        ") ranked WHERE player_id <> canonical_id"
+    ))
+
+
+def _losers_sql(table: str) -> str:
+    """Ids of ``table`` rows that lose to another row of the same merged player and key."""
+    partition, order = MERGE_KEYS[table]
+    over = "COALESCE(m.canonical_id, t.player_id)" + (f", {', '.join('t.' + c.strip() for c in partition.split(','))}" if partition else "")
+    order = ", ".join("t." + part.strip() for part in order.split(","))
+    return (
+        f"SELECT id FROM (SELECT t.id, ROW_NUMBER() OVER (PARTITION BY {over} ORDER BY {order}) AS rn "
+        f"FROM {table} t LEFT JOIN merge_map m ON m.dup_id = t.player_id "
+        f"WHERE t.player_id IN (SELECT dup_id FROM merge_map UNION SELECT canonical_id FROM merge_map)) ranked "
+        f"WHERE rn > 1"
+    )
+
+
+def _report(session: Session) -> Dict[str, Any]:
+    groups: Dict[int, Dict[str, Any]] = {}
+    rows = session.exec(text(
+        "SELECT m.canonical_id, c.name, m.dup_id, d.name FROM merge_map m "
+        "JOIN player c ON c.id = m.canonical_id JOIN player d ON d.id = m.dup_id "
+        "ORDER BY m.canonical_id, m.dup_id"
+    )).all()
+    for canon_id, canon_name, dup_id, dup_name in rows:
+        g = groups.setdefault(canon_id, {"name": canon_name, "canonical_id": canon_id, "removed_ids": [], "removed_names": []})
+        g["removed_ids"].append(dup_id)
+        g["removed_names"].append(dup_name)
+    counts: Dict[str, Dict[str, int]] = {}
+    for table in REPOINT_TABLES:
+        losers = _losers_sql(table) if table in MERGE_KEYS else "SELECT NULL WHERE 1 = 0"
+        deleted = session.exec(text(f"SELECT COUNT(*) FROM ({losers}) x")).one()[0]
+        moved = session.exec(text(
+            f"SELECT COUNT(*) FROM {table} t JOIN merge_map m ON m.dup_id = t.player_id WHERE t.id NOT IN ({losers})"
+        )).one()[0]
+        counts[table] = {"repointed": int(moved), "deleted": int(deleted)}
+    return {"merged_groups": len(groups), "removed_players": len(rows), "details": list(groups.values()), "rows": counts}
+
+
+def merge_duplicate_players(session: Session, dry_run: bool = False) -> Dict[str, Any]:
+    """Merge duplicate players (see module docstring); commits unless ``dry_run``."""
+    try:
+        _temp_tables(session)
+        if _load_keys(session):
+            _build_map(session)
+        report = _report(session)
+        if dry_run or not report["merged_groups"]:
+            _drop_temp(session)
+            session.rollback()
+            return {"dry_run": dry_run, **report}
+        # Fill missing team / real position on the canonical row from its duplicates
+        for col, usable in FILL_COLUMNS.items():
+            donor = (
+                f"SELECT d.{col} FROM merge_map m JOIN player d ON d.id = m.dup_id "
+                f"WHERE m.canonical_id = player.id AND {usable.format(c='d.' + col)} ORDER BY d.id"
+            )
+            session.exec(text(
+                f"UPDATE player SET {col} = ({donor} LIMIT 1) "
+                f"WHERE id IN (SELECT canonical_id FROM merge_map) AND NOT ({usable.format(c='player.' + col)}) "
+                f"AND EXISTS ({donor})"
+            ))
+        for table in MERGE_KEYS:
+            session.exec(text(f"DELETE FROM {table} WHERE id IN ({_losers_sql(table)})"))
+        for table in REPOINT_TABLES:
+            session.exec(text(
+                f"UPDATE {table} SET player_id = merge_map.canonical_id FROM merge_map WHERE {table}.player_id = merge_map.dup_id"
+            ))
+        session.exec(text("DELETE FROM player WHERE id IN (SELECT dup_id FROM merge_map)"))
+        mark_dashboard_dirty(session, "player", *SECTION_DEPS)
+        _drop_temp(session)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    session.expire_all()
+    return {"dry_run": False, **report}
@@ -0,0 +1,94 @@
+"""
+League scoping.
+
+Settings (scoring, weights, ``current_week``), rosters, league teams, saved
+results, dashboard snapshots and jobs all carry a ``league_id``; players,
+projections, injuries, games and DvP are shared by every league. Every
+per-league table is indexed with ``league_id`` first, so a league's reads touch
+only its own rows however many leagues the deployment serves.
+
+The blended projections are shared too, so they use the default league's
+weights; other leagues' ``weights`` are stored but not applied.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..models import DEFAULT_LEAGUE, League, SettingsRow
+
+
+def get_settings_row(session: Session, league_id: int = DEFAULT_LEAGUE) -> Optional[SettingsRow]:
+    return session.exec(select(SettingsRow).where(SettingsRow.league_id == league_id)).first()
+
+
+async def get_settings_row_async(session: AsyncSession, league_id: int = DEFAULT_LEAGUE) -> Optional[SettingsRow]:
+    return (await session.exec(select(SettingsRow).where(SettingsRow.league_id == league_id))).first()
+
+
+def league_settings(session: Session, league_id: int = DEFAULT_LEAGUE) -> Dict[str, Any]:
+    row = get_settings_row(session, league_id)
+    return (row.data or {}) if row else {}
+
+
+# Risk aversion of the "risk" lineup objective (expected - lambda * stdev) unless the
+# league's settings carry a tuned ``risk_lambda`` (see services/backtest.py)
+DEFAULT_RISK_LAMBDA = 0.35
+
+
+def risk_lambda(session: Session, league_id: int = DEFAULT_LEAGUE) -> float:
+    return float(league_settings(session, league_id).get("risk_lambda", DEFAULT_RISK_LAMBDA))
+
+
+def current_week(session: Session, league_id: int = DEFAULT_LEAGUE) -> int:
+    return int(league_settings(session, league_id).get("current_week", 1))
+
+
+async def current_week_async(session: AsyncSession, league_id: int = DEFAULT_LEAGUE) -> int:
+    row = await get_settings_row_async(session, league_id)
+    return int((row.data or {}).get("current_week", 1)) if row else 1
+
+
+def save_league_settings(session: Session, league_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the league's settings; returns the previous data. Does not commit."""
+    row = get_settings_row(session, league_id)
+    if row is None:
+        session.add(SettingsRow(league_id=league_id, data=data))
+        return {}
+    old, row.data = row.data or {}, data
+    return old
+
+
+def create_league(
+    session: Session,
+    name: str,
+    espn_league_id: Optional[str] = None,
+    espn_team_id: Optional[str] = None,
+    data: Optional[Dict[str, Any]] = None,
+) -> League:
+    """Add a league with its settings row (a copy of the default league's unless
+    ``data`` is given) and commit."""
+    league = League(name=name, espn_league_id=espn_league_id, espn_team_id=espn_team_id)
+    session.add(league)
+    session.flush()
+    session.add(SettingsRow(league_id=league.id, data=dict(data if data is not None else league_settings(session))))
+    session.commit()
+    session.refresh(league)
+    return league
+
+
+def league_ids(session: Session) -> List[int]:
+    return list(session.exec(select(League.id).order_by(League.id)).all())
+
+
+def league_to_dict(league: League) -> Dict[str, Any]:
+    return {
+        "id": league.id,
+        "name": league.name,
+        "espn_league_id": league.espn_league_id,
+        "espn_team_id": league.espn_team_id,
+        "created_at": league.created_at.isoformat(),
+    }
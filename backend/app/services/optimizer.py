@@ -6,7 +6,8 @@ import numpy as np
 from sqlmodel import Session, select
 from pulp import LpMaximize, LpProblem, LpVariable, lpSum, PULP_CBC_CMD, LpStatus
 
-from ..models import Player, Projection, Roster, RosterStatus, Injury, Game
+from ..models import DEFAULT_LEAGUE, Player, Projection, Roster, RosterStatus, Injury, Game
+from .leagues import DEFAULT_RISK_LAMBDA
 
 
 LINEUP_SLOTS = [
@@ -40,7 +41,7 @@ def _injury_penalty(status: str | None) -> float:
     return 0.0
 
 
-def get_candidates(session: Session, week: int) -> List[Tuple[Player, Projection, float]]:
+def get_candidates(session: Session, week: int, league_id: int = DEFAULT_LEAGUE) -> List[Tuple[Player, Projection, float]]:
     # Consider only my roster (not free agents) for lineup
     stmt = (
         select(Projection, Player, Roster)
@@ -48,6 +49,7 @@ def get_candidates(session: Session, week: int) -> List[Tuple[Player, Projection
         .join(Roster, Roster.player_id == Player.id)
         .where(
             Projection.week == week,
+            Roster.league_id == league_id,
             Roster.my_team == True,
             Roster.status.in_([RosterStatus.start, RosterStatus.bench, RosterStatus.ir]),
         )
@@ -63,8 +65,8 @@ def get_candidates(session: Session, week: int) -> List[Tuple[Player, Projection
     return candidates
 
 
-def optimize_lineup(session: Session, week: int, objective: str = "risk", lam: float = 0.35, stack_bonus: bool = False) -> Dict:
-    cands = get_candidates(session, week)
+def optimize_lineup(session: Session, week: int, objective: str = "risk", lam: float = DEFAULT_RISK_LAMBDA, stack_bonus: bool = False, league_id: int = DEFAULT_LEAGUE) -> Dict:
+    cands = get_candidates(session, week, league_id)
     # Build injury map for badges
     inj_rows = session.exec(select(Injury).where(Injury.week == week)).all()
     inj_map = {r.player_id: r.status for r in inj_rows}
@@ -127,9 +129,9 @@ def optimize_lineup(session: Session, week: int, objective: str = "risk", lam: f
     try:
         res = prob.solve(PULP_CBC_CMD(msg=False))
     except Exception:
-        return greedy_fallback(session, week, objective, lam)
+        return greedy_fallback(session, week, objective, lam, league_id)
     if LpStatus.get(prob.status, "") != "Optimal":
-        return greedy_fallback(session, week, objective, lam)
+        return greedy_fallback(session, week, objective, lam, league_id)
 
     # Build lineup and bench
     chosen: Dict[str, List[int]] = {slot: [] for slot, _ in slot_reqs}
@@ -191,9 +193,9 @@ def optimize_lineup(session: Session, week: int, objective: str = "risk", lam: f
     return {"starters": starters, "bench": bench, "rationale": rationale}
 
 
-def greedy_fallback(session: Session, week: int, objective: str, lam: float) -> Dict:
+def greedy_fallback(session: Session, week: int, objective: str, lam: float, league_id: int = DEFAULT_LEAGUE) -> Dict:
     # Very simple: pick top by slot greedily
-    candidates = get_candidates(session, week)
+    candidates = get_candidates(session, week, league_id)
     values: Dict[int, float] = {}
     for p, pr, pen in candidates:
         base = pr.expected if objective == "expected" else _risk_adjust(pr.expected, pr.stdev or 0.0, lam)
@@ -0,0 +1,88 @@
+"""
+Append-only projection history.
+
+Every write path that changes a ``Projection`` value (provider ingest, blending,
+seeding) also appends the new value here, in one executemany INSERT per batch and
+stamped with one ``recorded_at`` so a batch reads back as a consistent snapshot.
+Rows are filed under ``(season, week)``, the leading columns of the only index,
+so a week's history is one contiguous index range however many seasons are kept.
+
+``projections_as_of`` answers "week W as it stood at time T": the newest row per
+(source, player) with ``recorded_at <= T``.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, func, insert, select
+from sqlmodel import Session
+
+from ..models import ProjectionHistory
+from ..settings import get_settings
+
+
+def append_history(
+    session: Session,
+    week: int,
+    source: str,
+    rows: Iterable[Tuple[int, float, Optional[float]]],
+    recorded_at: Optional[datetime] = None,
+    season: Optional[int] = None,
+) -> int:
+    """Append ``(player_id, expected, stdev)`` rows for one week/source; does not commit.
+
+    A player listed twice keeps its last value, so no two rows of a (source,
+    player) share a ``recorded_at``.
+    """
+    common = {"season": season or get_settings().season, "week": week, "source": source, "recorded_at": recorded_at or datetime.utcnow()}
+    latest = {pid: (expected, stdev) for pid, expected, stdev in rows}
+    values = [{**common, "player_id": pid, "expected": expected, "stdev": stdev} for pid, (expected, stdev) in latest.items()]
+    if values:
+        session.execute(insert(ProjectionHistory), values)
+    return len(values)
+
+
+def as_naive_utc(at: datetime) -> datetime:
+    # History is stored in naive UTC, like every other timestamp in the schema
+    if at.tzinfo is not None:
+        return at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def as_of_stmt(dialect: str, week: int, at: datetime, season: Optional[int] = None, source: Optional[str] = None) -> Select:
+    """Latest history row per (source, player) of ``week`` with ``recorded_at <= at``.
+
+    Both forms are one range read of the (season, week, source, player_id,
+    recorded_at) index, already in group order: Postgres keeps the first row of
+    each group (``DISTINCT ON``, index-only thanks to the included value columns),
+    SQLite returns the other columns of the ``MAX(recorded_at)`` row.
+    """
+    h = ProjectionHistory
+    filters = [h.season == (season or get_settings().season), h.week == week, h.recorded_at <= as_naive_utc(at)]
+    if source is not None:
+        filters.append(h.source == source)
+    if dialect == "postgresql":
+        return (
+            select(h.source, h.player_id, h.expected, h.stdev, h.recorded_at)
+            .where(*filters)
+            .distinct(h.source, h.player_id)
+            .order_by(h.source, h.player_id, h.recorded_at.desc(), h.id.desc())
+        )
+    return (
+        select(h.source, h.player_id, h.expected, h.stdev, func.max(h.recorded_at).label("recorded_at"))
+        .where(*filters)
+        .group_by(h.source, h.player_id)
+    )
+
+
+def projections_as_of(
+    session: Session, week: int, at: datetime, season: Optional[int] = None, source: Optional[str] = None
+) -> List[Any]:
+    """Projections for ``week`` as they stood at ``at``.
+
+    Returns rows with ``source, player_id, expected, stdev, recorded_at``; players
+    first projected after ``at`` are absent.
+    """
+    return list(session.execute(as_of_stmt(session.get_bind().dialect.name, week, at, season, source)).all())
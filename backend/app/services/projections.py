@@ -1,11 +1,27 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
 
-from ..models import Projection, Player, SettingsRow
+from ..models import Projection, Player
+from ..settings import get_settings
+from .changes import record_change
+from .dashboard import mark_dashboard_dirty
+from .leagues import league_settings
+from .projection_history import append_history
+
+
+BLENDED = "blended"
 
+# Typical error (stdev, fantasy points) of each source's weekly projection. Used as
+# the provider stdev at ingest and as the floor of the blended uncertainty.
+SOURCE_ERROR_PRIOR = {"espn": 2.0, "fantasypros": 2.5, "sportsdata": 2.2, "yahoo": 2.5}
+DEFAULT_ERROR_PRIOR = 2.5
 
 DEFAULT_WEIGHTS = {
     "QB": {"espn": 0.5, "fantasypros": 0.3, "sportsdata": 0.2, "yahoo": 0.0},
@@ -18,37 +34,152 @@ DEFAULT_WEIGHTS = {
 
 
 def get_weights(session: Session) -> Dict[str, Dict[str, float]]:
-    settings = session.get(SettingsRow, 1)
-    if not settings or "weights" not in settings.data:
-        return DEFAULT_WEIGHTS
-    return settings.data.get("weights", DEFAULT_WEIGHTS)
+    # Blended rows are shared by every league, so the default league's weights apply
+    return league_settings(session).get("weights") or DEFAULT_WEIGHTS
+
+
+def dirty_player_ids(session: Session, week: int) -> Set[int]:
+    """Players whose source projections changed since their blended row was written.
+
+    Source rows only bump ``updated_at`` when their value changes, so a source row
+    newer than the player's ``blended`` row (or a missing blended row) means the
+    blend is out of date.
+    """
+    blended = aliased(Projection)
+    stmt = (
+        select(Projection.player_id)
+        .outerjoin(blended, and_(blended.player_id == Projection.player_id, blended.week == week, blended.source == BLENDED))
+        .where(Projection.week == week, Projection.source != BLENDED)
+        .where(or_(blended.id == None, Projection.updated_at > blended.updated_at))  # noqa: E711
+        .distinct()
+    )
+    return set(session.exec(stmt).all())
+
+
+def blend_matrix(values: np.ndarray, stdevs: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Blend a players x sources matrix in one pass.
+
+    ``values`` holds each source's projection with NaN where a source is missing,
+    ``stdevs`` each cell's error prior and ``weights`` each player's source weights.
+    Returns ``(expected, stdev)``; players with no weighted source get NaN. The
+    stdev combines how much the sources disagree (weighted variance around the
+    blend) with the weighted mean of their error priors.
+
+    Sources are the last axis and leading axes broadcast, so a stack of weight
+    sets (e.g. a backtest grid, ``configs x players x sources``) blends at once.
+    """
+    present = ~np.isnan(values)
+    w = np.where(present, weights, 0.0)
+    wsum = w.sum(axis=-1)
+    ok = wsum > 0
+    safe = np.where(ok, wsum, 1.0)
+    x = np.where(present, values, 0.0)
+    expected = (w * x).sum(axis=-1) / safe
+    dispersion = (w * (x - expected[..., None]) ** 2).sum(axis=-1) / safe
+    prior = (w * np.where(present, stdevs, 0.0) ** 2).sum(axis=-1) / safe
+    stdev = np.sqrt(dispersion + prior)
+    expected[~ok] = np.nan
+    stdev[~ok] = np.nan
+    return expected, stdev
 
 
-def blend_projections(session: Session, week: int) -> Dict[int, Dict[str, float]]:
-    stmt = select(Projection, Player).join(Player, Projection.player_id == Player.id).where(Projection.week == week)
+def position_weights(weights: Dict[str, Dict[str, float]], positions: List[str], sources: List[str]) -> np.ndarray:
+    """``positions x sources`` matrix of blend weights (positions missing from ``weights`` use espn/fantasypros 60/40)."""
+    out = np.zeros((len(positions), len(sources)))
+    for i, p in enumerate(positions):
+        pw = weights.get(p, {"espn": 0.6, "fantasypros": 0.4})
+        for c, src in enumerate(sources):
+            out[i, c] = pw.get(src, 0.0)
+    return out
+
+
+def blend_projections(session: Session, week: int, player_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, float]]:
+    stmt = (
+        select(Projection.player_id, Projection.source, Projection.expected, Projection.stdev, Player.position)
+        .join(Player, Projection.player_id == Player.id)
+        .where(Projection.week == week, Projection.source != BLENDED)
+    )
+    if player_ids is not None:
+        stmt = stmt.where(Projection.player_id.in_(list(player_ids)))
     rows = session.exec(stmt).all()
-    by_player: Dict[int, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
-    positions: Dict[int, str] = {}
-    for proj, player in rows:
-        positions[player.id] = player.position
-        by_player[player.id][proj.source].append(proj.expected)
+    if not rows:
+        return {}
+
+    # Pivot rows into players x sources; duplicate rows for a cell are averaged
+    pid_index: Dict[int, int] = {}
+    src_index: Dict[str, int] = {}
+    positions: List[str] = []
+    cells = np.empty((len(rows), 2), dtype=np.int64)
+    vals = np.empty(len(rows))
+    sds = np.empty(len(rows))
+    for i, (pid, src, expected, stdev, pos) in enumerate(rows):
+        r = pid_index.get(pid)
+        if r is None:
+            r = pid_index[pid] = len(pid_index)
+            positions.append(pos)
+        c = src_index.setdefault(src, len(src_index))
+        cells[i] = (r, c)
+        vals[i] = expected
+        sds[i] = stdev if stdev is not None else SOURCE_ERROR_PRIOR.get(src, DEFAULT_ERROR_PRIOR)
+    shape = (len(pid_index), len(src_index))
+    sums, sd_sums, counts = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+    np.add.at(sums, (cells[:, 0], cells[:, 1]), vals)
+    np.add.at(sd_sums, (cells[:, 0], cells[:, 1]), sds)
+    np.add.at(counts, (cells[:, 0], cells[:, 1]), 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = sums / counts
+        stdevs = sd_sums / counts
 
-    weights = get_weights(session)
+    # Per-position weight vectors, expanded to one row per player
+    pos_names = sorted(set(positions))
+    pos_row = {p: i for i, p in enumerate(pos_names)}
+    pos_weights = position_weights(get_weights(session), pos_names, list(src_index))
+    player_weights = pos_weights[[pos_row[p] for p in positions]]
+
+    expected, stdev = blend_matrix(values, stdevs, player_weights)
     blended: Dict[int, Dict[str, float]] = {}
-    for pid, src_map in by_player.items():
-        pos = positions.get(pid, "FLEX")
-        pos_weights = weights.get(pos, {"espn": 0.6, "fantasypros": 0.4})
-        # Weighted mean over available sources; allow exclusion if missing
-        total_w = 0.0
-        total = 0.0
-        for src, vals in src_map.items():
-            if src not in pos_weights:
-                continue
-            w = pos_weights[src]
-            avg = sum(vals) / len(vals)
-            total_w += w
-            total += w * avg
-        if total_w == 0:
-            continue
-        blended[pid] = {"expected": total / total_w}
+    for pid, r in pid_index.items():
+        if not np.isnan(expected[r]):
+            blended[pid] = {"expected": float(expected[r]), "stdev": float(stdev[r])}
     return blended
+
+
+def write_blended(session: Session, week: int, full: bool = False) -> int:
+    """Recompute and upsert ``blended`` rows; returns how many were written.
+
+    By default only players from ``dirty_player_ids`` are blended. ``full=True``
+    rebuilds every player for the week (needed after weight changes, which do not
+    touch any projection row). Moves of at least ``projection_swing_threshold``
+    points are logged as ``projection`` change events. Does not commit.
+    """
+    pids = None if full else dirty_player_ids(session, week)
+    if pids is not None and not pids:
+        return 0
+    blended = blend_projections(session, week, pids)
+    if not blended:
+        return 0
+    stmt = select(Projection).where(Projection.week == week, Projection.source == BLENDED)
+    if pids is not None:
+        stmt = stmt.where(Projection.player_id.in_(list(blended)))
+    existing = {r.player_id: r for r in session.exec(stmt).all()}
+    now = datetime.utcnow()
+    threshold = get_settings().projection_swing_threshold
+    history = []
+    for pid, data in blended.items():
+        row = existing.get(pid)
+        if row is None:
+            session.add(Projection(player_id=pid, week=week, source=BLENDED, expected=data["expected"], stdev=data["stdev"], updated_at=now))
+        else:
+            delta = data["expected"] - row.expected
+            if abs(delta) >= threshold:
+                record_change(session, "projection", week=week, player_id=pid, old=round(row.expected, 2), new=round(data["expected"], 2), delta=round(delta, 2))
+            unchanged = delta == 0 and row.stdev == data["stdev"]
+            row.expected = data["expected"]
+            row.stdev = data["stdev"]
+            row.updated_at = now
+            if unchanged:
+                continue
+        history.append((pid, data["expected"], data["stdev"]))
+    append_history(session, week, BLENDED, history, recorded_at=now)
+    mark_dashboard_dirty(session, "projection", week=week)
+    return len(blended)
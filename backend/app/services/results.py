@@ -0,0 +1,229 @@
+"""
+Write-behind persistence for computed results (lineups, waiver suggestions,
+trade evaluations).
+
+Read endpoints hand their result to ``result_writer.submit`` and return without
+touching the database. A background thread flushes the buffer every
+``result_flush_s`` seconds, or as soon as ``result_batch_size`` results are
+waiting, in one transaction per batch:
+
+- each result is hashed (sha1 of its canonical JSON); a result identical to a
+  stored row with the same key only moves that row's ``created_at`` forward;
+- new results go out as one executemany INSERT per table;
+- the keys touched by the batch are compacted to their latest row plus
+  ``result_history`` older ones (``trade_history`` per league for trades).
+
+``compact_results`` applies the same retention to every key.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlmodel import Session, SQLModel
+
+from ..db import engine
+from ..models import DEFAULT_LEAGUE, LineupResult, TradeEval, WaiverRec
+from ..settings import get_settings
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ResultKind:
+    model: Type[SQLModel]
+    key: Tuple[str, ...]  # retention / dedupe partition
+    payload: str  # JSON column
+
+    def keep(self) -> int:
+        settings = get_settings()
+        return 1 + (settings.trade_history if self.model is TradeEval else settings.result_history)
+
+
+KINDS: Dict[str, ResultKind] = {
+    "lineup": ResultKind(LineupResult, ("league_id", "week", "objective"), "results_json"),
+    "waivers": ResultKind(WaiverRec, ("league_id", "week"), "data"),
+    "trade": ResultKind(TradeEval, ("league_id",), "data"),
+}
+
+
+# Buffer cap, in batches, while flushes keep failing
+BUFFER_BATCHES = 50
+
+
+def content_hash(payload: Any) -> str:
+    # Hash the stored JSON form: int keys (e.g. lineup rationale player ids) become strings,
+    # which changes how sort_keys orders them
+    canonical = json.loads(json.dumps(payload, default=str))
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class _Pending:
+    kind: str
+    key: Tuple[Any, ...]
+    payload: Dict[str, Any]
+    hash: str
+    created_at: datetime
+
+
+def _cols(kind: ResultKind) -> List[Any]:
+    return [getattr(kind.model, c) for c in kind.key]
+
+
+def _in_keys(kind: ResultKind, keys: List[Tuple[Any, ...]]):
+    cols = _cols(kind)
+    if len(cols) == 1:
+        return cols[0].in_([k[0] for k in keys])
+    return tuple_(*cols).in_(keys)
+
+
+def _compact(session: Session, kind: ResultKind, keys: Optional[List[Tuple[Any, ...]]] = None) -> int:
+    """Delete all but the newest ``kind.keep()`` rows per key (only ``keys`` if given)."""
+    model = kind.model
+    rn = func.row_number().over(partition_by=_cols(kind), order_by=(model.created_at.desc(), model.id.desc())).label("rn")
+    ranked = select(model.id, rn)
+    if keys is not None:
+        ranked = ranked.where(_in_keys(kind, keys))
+    ranked = ranked.subquery()
+    stmt = delete(model).where(model.id.in_(select(ranked.c.id).where(ranked.c.rn > kind.keep())))
+    return session.execute(stmt, execution_options={"synchronize_session": False}).rowcount or 0
+
+
+def _write(session: Session, name: str, items: List[_Pending]) -> Dict[str, int]:
+    kind = KINDS[name]
+    model = kind.model
+    # Last submission per (key, hash) wins within the batch
+    latest: Dict[Tuple[Any, ...], _Pending] = {}
+    for item in items:
+        latest[item.key + (item.hash,)] = item
+    stored = {
+        tuple(row[1:]): row[0]
+        for row in session.execute(
+            select(model.id, *_cols(kind), model.content_hash).where(model.content_hash.in_({i.hash for i in latest.values()}))
+        ).all()
+    }
+    inserts, touches = [], []
+    for dedupe_key, item in latest.items():
+        if dedupe_key in stored:
+            touches.append({"id": stored[dedupe_key], "created_at": item.created_at})
+        else:
+            inserts.append({
+                **dict(zip(kind.key, item.key)), kind.payload: item.payload, "content_hash": item.hash, "created_at": item.created_at,
+            })
+    if inserts:
+        session.execute(insert(model), inserts)
+    if touches:
+        session.execute(update(model), touches)
+    deleted = _compact(session, kind, sorted({i.key for i in latest.values()}))
+    return {"inserted": len(inserts), "deduped": len(items) - len(inserts), "deleted": deleted}
+
+
+def compact_results(session: Session) -> Dict[str, int]:
+    """Apply the retention policy to every key of every result table; does not commit."""
+    return {name: _compact(session, kind) for name, kind in KINDS.items()}
+
+
+class ResultWriter:
+    """Buffers results in memory and persists them in batches from a daemon thread."""
+
+    def __init__(self) -> None:
+        self._buf: List[_Pending] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "inserted": 0, "deduped": 0, "deleted": 0, "failed_flushes": 0, "dropped": 0}
+
+    def submit(
+        self, kind: str, payload: Dict[str, Any], league_id: int = DEFAULT_LEAGUE, week: Optional[int] = None, objective: Optional[str] = None
+    ) -> None:
+        spec = KINDS[kind]
+        values = {"league_id": league_id, "week": week, "objective": objective}
+        item = _Pending(kind, tuple(values[c] for c in spec.key), payload, content_hash(payload), datetime.utcnow())
+        with self._lock:
+            self._buf.append(item)
+            self.stats["submitted"] += 1
+            full = len(self._buf) >= get_settings().result_batch_size
+        self.ensure_started()
+        if full:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buf)
+
+    def flush(self) -> Dict[str, int]:
+        """Persist everything buffered so far in one transaction; returns the counts."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buf = self._buf, []
+            if not batch:
+                return {"inserted": 0, "deduped": 0, "deleted": 0}
+            by_kind: Dict[str, List[_Pending]] = {}
+            for item in batch:
+                by_kind.setdefault(item.kind, []).append(item)
+            totals = {"inserted": 0, "deduped": 0, "deleted": 0}
+            try:
+                with Session(engine) as session:
+                    for name, items in by_kind.items():
+                        for k, v in _write(session, name, items).items():
+                            totals[k] += v
+                    session.commit()
+            except Exception:
+                # Put the batch back in front of newer results and retry on the next flush;
+                # while the database stays down only the newest results are kept
+                with self._lock:
+                    self._buf[:0] = batch
+                    overflow = len(self._buf) - get_settings().result_batch_size * BUFFER_BATCHES
+                    if overflow > 0:
+                        del self._buf[:overflow]
+                        self.stats["dropped"] += overflow
+                    self.stats["failed_flushes"] += 1
+                raise
+            with self._lock:
+                for k, v in totals.items():
+                    self.stats[k] += v
+            return totals
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def _loop(self) -> None:
+        interval = get_settings().result_flush_s
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("result flush failed; batch kept for the next attempt")
+
+    def stop(self) -> None:
+        """Stop the thread, wait for it to exit, then write out what is still buffered."""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        try:
+            self.flush()
+        except Exception:
+            log.exception("final result flush failed; %d results not persisted", self.pending())
+
+
+result_writer = ResultWriter()
@@ -1,28 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import httpx
 from sqlmodel import Session, select
 
+from ingest.transport import async_http_client
 from ..models import Game
+from ..settings import get_settings
+from .dashboard import mark_dashboard_dirty
 
 
-def stadium_latlon(team: str) -> tuple[Optional[float], Optional[float]]:
+@lru_cache(maxsize=1)
+def _stadiums() -> Dict[str, Tuple[float, float]]:
     data_path = Path(__file__).resolve().parents[1] / "app" / "data" / "stadiums.json"
     if not data_path.exists():
         data_path = Path(__file__).resolve().parents[0] / ".." / "data" / "stadiums.json"
     try:
         data = json.loads(data_path.read_text())
-        row = data.get(team)
-        if row:
-            return float(row.get("lat")), float(row.get("lon"))
+        return {team: (float(row["lat"]), float(row["lon"])) for team, row in data.items() if row}
     except Exception:
-        pass
-    return None, None
+        return {}
+
+
+def stadium_latlon(team: str) -> tuple[Optional[float], Optional[float]]:
+    return _stadiums().get(team, (None, None))
 
 
 def upsert_game(
@@ -49,45 +56,111 @@ def upsert_game(
     return game
 
 
+def ensure_games(session: Session, week: int, teams: Iterable[str]) -> int:
+    """Add placeholder game rows (stadium coordinates only) for teams without one.
+
+    One SELECT for the week instead of one per team; existing rows, including any
+    imported opponent/kickoff, are left alone. Returns how many were added. Does not commit.
+    """
+    have = set(session.exec(select(Game.team).where(Game.week == week)).all())
+    added = 0
+    for team in sorted(set(teams) - have):
+        lat, lon = stadium_latlon(team)
+        session.add(Game(week=week, team=team, opponent=None, home=True, lat=lat, lon=lon))
+        added += 1
+    if added:
+        session.flush()
+    return added
+
+
+# (lat, lon, kickoff hour) -> (expires_at monotonic, summary)
+_forecast_cache: Dict[Tuple[float, float, datetime], Tuple[float, Dict[str, Any]]] = {}
+
+
+def clear_weather_cache() -> None:
+    _forecast_cache.clear()
+
+
+def _summarize(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    hourly = data.get("hourly", {})
+    temps = hourly.get("temperature_2m", [])
+    precs = hourly.get("precipitation_probability", [])
+    winds = hourly.get("wind_speed_10m", [])
+    if not temps:
+        return None
+    # choose middle index
+    idx = min(len(temps) // 2, len(temps) - 1)
+    return {
+        "temp_c": temps[idx],
+        "precip_prob": precs[idx] if idx < len(precs) else None,
+        "wind_kmh": winds[idx] if idx < len(winds) else None,
+    }
+
+
+async def _fetch_forecast(client, sem: asyncio.Semaphore, lat: float, lon: float, kickoff: datetime) -> Optional[Dict[str, Any]]:
+    start_iso = (kickoff - timedelta(hours=2)).isoformat()
+    end_iso = (kickoff + timedelta(hours=2)).isoformat()
+    url = (
+        f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}"
+        f"&hourly=temperature_2m,precipitation_probability,wind_speed_10m"
+        f"&start={start_iso}&end={end_iso}"
+    )
+    async with sem:
+        try:
+            r = await client.get(url)
+            if r.status_code // 100 != 2:
+                return None
+            return _summarize(r.json())
+        except Exception:
+            return None
+
+
 async def fetch_weather_for_week(session: Session, week: int) -> int:
-    # For each game with lat/lon and kickoff, call Open-Meteo and store a simple summary
-    cnt = 0
+    """Store an Open-Meteo summary on every game of the week that has coordinates.
+
+    Games are grouped by (lat, lon, kickoff hour) so teams sharing a stadium and
+    slot cost one request; distinct locations are fetched concurrently (bounded by
+    ``weather_concurrency``) and forecasts are reused for ``weather_cache_ttl_s``.
+    """
+    settings = get_settings()
     games = session.exec(select(Game).where(Game.week == week)).all()
-    async with httpx.AsyncClient(timeout=15) as client:
-        for g in games:
-            if not g.lat or not g.lon:
-                continue
-            # If kickoff missing, assume Sunday 18:00 UTC
-            kickoff = g.kickoff_utc or datetime.utcnow().replace(hour=18, minute=0, second=0, microsecond=0)
-            start_iso = (kickoff - timedelta(hours=2)).isoformat()
-            end_iso = (kickoff + timedelta(hours=2)).isoformat()
-            url = (
-                f"https://api.open-meteo.com/v1/forecast?latitude={g.lat}&longitude={g.lon}"
-                f"&hourly=temperature_2m,precipitation_probability,wind_speed_10m"
-                f"&start={start_iso}&end={end_iso}"
-            )
-            try:
-                r = await client.get(url)
-                if r.status_code // 100 != 2:
-                    continue
-                data = r.json()
-                hourly = data.get("hourly", {})
-                temps = hourly.get("temperature_2m", [])
-                precs = hourly.get("precipitation_probability", [])
-                winds = hourly.get("wind_speed_10m", [])
-                # choose middle index
-                if temps:
-                    idx = min(len(temps) // 2, len(temps) - 1)
-                    summary = {
-                        "temp_c": temps[idx],
-                        "precip_prob": precs[idx] if idx < len(precs) else None,
-                        "wind_kmh": winds[idx] if idx < len(winds) else None,
-                    }
-                    g.weather = summary
-                    g.updated_at = datetime.utcnow()
-                    cnt += 1
-            except Exception:
-                continue
+    # If kickoff missing, assume Sunday 18:00 UTC
+    default_kickoff = datetime.utcnow().replace(hour=18, minute=0, second=0, microsecond=0)
+    groups: Dict[Tuple[float, float, datetime], List[Game]] = {}
+    for g in games:
+        if not g.lat or not g.lon:
+            continue
+        kickoff = (g.kickoff_utc or default_kickoff).replace(minute=0, second=0, microsecond=0)
+        groups.setdefault((round(g.lat, 4), round(g.lon, 4), kickoff), []).append(g)
+
+    now = time.monotonic()
+    forecasts: Dict[Tuple[float, float, datetime], Optional[Dict[str, Any]]] = {}
+    for key in groups:
+        hit = _forecast_cache.get(key)
+        if hit and hit[0] > now:
+            forecasts[key] = hit[1]
+    missing = [key for key in groups if key not in forecasts]
+    if missing:
+        sem = asyncio.Semaphore(max(1, settings.weather_concurrency))
+        async with async_http_client(timeout=15) as client:
+            results = await asyncio.gather(*(_fetch_forecast(client, sem, groups[k][0].lat, groups[k][0].lon, k[2]) for k in missing))
+        expires = time.monotonic() + settings.weather_cache_ttl_s
+        for key, summary in zip(missing, results):
+            forecasts[key] = summary
+            if summary is not None:
+                _forecast_cache[key] = (expires, summary)
+
+    cnt = 0
+    stamp = datetime.utcnow()
+    for key, rows in groups.items():
+        summary = forecasts.get(key)
+        if summary is None:
+            continue
+        for g in rows:
+            g.weather = dict(summary)
+            g.updated_at = stamp
+            cnt += 1
+    if cnt:
+        mark_dashboard_dirty(session, "schedule", week=week)
     session.commit()
     return cnt
-
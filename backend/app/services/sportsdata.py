@@ -1,14 +1,19 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List
+import asyncio
+import re
+import time
+from typing import Any, Dict, Iterable, List, Tuple
 
 import httpx
 
 from ..settings import get_settings
 from sqlmodel import Session, select
-from ingest.util import get_or_create_player, upsert_injury
+from ingest.util import sync_injuries
 from ..models import Player
-from ingest.util import upsert_projection
+from .projections import SOURCE_ERROR_PRIOR
+from ingest.util import PlayerResolver, bulk_upsert_actuals, bulk_upsert_projections
+from ingest.transport import async_http_client, http_client
 
 
 BASE = "https://api.sportsdata.io/v3/nfl"
@@ -19,7 +24,7 @@ def _client() -> httpx.Client:
     if not settings.sportsdata_api_key:
         raise RuntimeError("SPORTSDATA_API_KEY not configured")
     headers = {"Ocp-Apim-Subscription-Key": settings.sportsdata_api_key}
-    return httpx.Client(base_url=BASE, headers=headers, timeout=20)
+    return http_client(base_url=BASE, headers=headers, timeout=20)
 
 
 def news_by_team(team: str) -> list[dict]:
@@ -40,12 +45,19 @@ def news_by_team(team: str) -> list[dict]:
         return []
 
 
-def news_by_teams(teams: Iterable[str]) -> list[dict]:
-    """Fetch and combine news items for multiple teams (dedup by NewsID)."""
+# team -> (expires_at monotonic, items)
+_news_cache: Dict[str, Tuple[float, list[dict]]] = {}
+
+
+def clear_news_cache() -> None:
+    _news_cache.clear()
+
+
+def _dedupe_news(per_team: Iterable[list[dict]]) -> list[dict]:
     seen: set[int] = set()
     out: list[dict] = []
-    for t in set([x for x in teams if x]):
-        for item in news_by_team(t):
+    for items in per_team:
+        for item in items:
             nid = int(item.get("NewsID") or item.get("NewsId") or 0)
             if nid and nid in seen:
                 continue
@@ -54,18 +66,84 @@ def news_by_teams(teams: Iterable[str]) -> list[dict]:
     return out
 
 
+async def news_by_teams_async(teams: Iterable[str]) -> list[dict]:
+    """News for several teams, combined and deduplicated by NewsID.
+
+    Teams cached within ``news_cache_ttl_s`` are served from memory; the rest are
+    fetched concurrently over one shared client. Failed teams are not cached.
+    """
+    settings = get_settings()
+    wanted = sorted({t for t in teams if t})
+    now = time.monotonic()
+    fresh = {t: hit[1] for t in wanted if (hit := _news_cache.get(t)) and hit[0] > now}
+    missing = [t for t in wanted if t not in fresh]
+    if missing and settings.sportsdata_api_key:
+        headers = {"Ocp-Apim-Subscription-Key": settings.sportsdata_api_key}
+
+        async def one(client: httpx.AsyncClient, team: str) -> list[dict] | None:
+            try:
+                r = await client.get(f"/scores/json/NewsByTeam/{team}")
+                if r.status_code // 100 != 2:
+                    return None
+                data = r.json()
+                return data if isinstance(data, list) else []
+            except Exception:
+                return None
+
+        async with async_http_client(base_url=BASE, headers=headers, timeout=20) as client:
+            results = await asyncio.gather(*(one(client, t) for t in missing))
+        expires = time.monotonic() + settings.news_cache_ttl_s
+        for team, items in zip(missing, results):
+            if items is not None:
+                _news_cache[team] = (expires, items)
+                fresh[team] = items
+    return _dedupe_news(fresh.get(t, []) for t in wanted)
+
+
+def news_by_teams(teams: Iterable[str]) -> list[dict]:
+    """Blocking wrapper around ``news_by_teams_async`` for scripts."""
+    return asyncio.run(news_by_teams_async(teams))
+
+
+class NameMatcher:
+    """Find which of many player names an item mentions, in one pass per item.
+
+    All names go into a single compiled alternation (longest first) that is run
+    once over each item's title and content, instead of one substring scan per
+    player. Matching is case-insensitive, like ``extract_player_news``.
+    """
+
+    def __init__(self, names: Dict[int, str]):
+        self._by_name: Dict[str, List[int]] = {}
+        for pid, name in names.items():
+            key = (name or "").strip().lower()
+            if key:
+                self._by_name.setdefault(key, []).append(pid)
+        alternation = "|".join(re.escape(n) for n in sorted(self._by_name, key=len, reverse=True))
+        self._pattern = re.compile(alternation, re.IGNORECASE) if alternation else None
+
+    def match(self, item: dict) -> List[int]:
+        hits: List[int] = []
+        pname = (item.get("PlayerName") or item.get("Player") or "").strip().lower()
+        hits.extend(self._by_name.get(pname, []))
+        if self._pattern is not None:
+            text = f"{item.get('Title') or ''}\n{item.get('Content') or item.get('Body') or ''}"
+            for m in self._pattern.finditer(text):
+                hits.extend(self._by_name.get(m.group(0).lower(), []))
+        return list(dict.fromkeys(hits))
+
+    def group(self, items: Iterable[dict]) -> Dict[int, list[dict]]:
+        """``{player_id: [items mentioning the player]}`` in item order."""
+        out: Dict[int, list[dict]] = {}
+        for it in items:
+            for pid in self.match(it):
+                out.setdefault(pid, []).append(it)
+        return out
+
+
 def extract_player_news(items: list[dict], player_name: str) -> list[dict]:
     """Return items that mention the player (by PlayerName or text match)."""
-    name = (player_name or "").strip()
-    name_lower = name.lower()
-    out = []
-    for it in items:
-        pname = (it.get("PlayerName") or it.get("Player") or "").strip()
-        title = (it.get("Title") or "").strip()
-        content = (it.get("Content") or it.get("Body") or "").strip()
-        if (pname and pname.lower() == name_lower) or (name and (name_lower in title.lower() or name_lower in content.lower())):
-            out.append(it)
-    return out
+    return NameMatcher({0: player_name}).group(items).get(0, [])
 
 
 # --- Injury import ---
@@ -75,10 +153,12 @@ def _current_season() -> int:
     return _dt.datetime.utcnow().year
 
 
-def fetch_injuries(session: Session, week: int) -> int:
-    """Fetch NFL injuries for current season and upsert for given week.
+def fetch_injuries(session: Session, week: int, resolver: PlayerResolver | None = None) -> int:
+    """Sync the current NFL injury report into the given week.
 
-    Maps basic status and note from SportsData.io items. Best-effort; silently returns 0 on failure.
+    The report is treated as complete: players no longer listed go back to Active.
+    Only changed statuses/notes are written (see ``ingest.util.sync_injuries``).
+    Returns the number of players whose status changed; best-effort, 0 on failure.
     """
     try:
         season = _current_season()
@@ -89,7 +169,8 @@ def fetch_injuries(session: Session, week: int) -> int:
             data = r.json()
             if not isinstance(data, list):
                 return 0
-            count = 0
+            resolver = resolver or PlayerResolver(session)
+            rows = []
             for it in data:
                 name = (it.get("Name") or it.get("PlayerName") or "").strip()
                 if not name:
@@ -98,16 +179,14 @@ def fetch_injuries(session: Session, week: int) -> int:
                 status = (it.get("InjuryStatus") or it.get("Status") or it.get("Practice") or "").strip() or "Update"
                 note_parts = [p for p in [it.get("BodyPart"), it.get("PracticeStatus"), it.get("Notes") or it.get("Content")] if p]
                 note = "; ".join(note_parts) if note_parts else None
-                p = get_or_create_player(session, name=name, team=team)
-                upsert_injury(session, p, week, status, note=note)
-                count += 1
-            session.commit()
-            return count
+                rows.append((resolver.resolve(name, team=team), status, note))
+            # Caller commits
+            return sync_injuries(session, week, rows)
     except Exception:
         return 0
 
 
-def fetch_projections(session: Session, week: int) -> int:
+def fetch_projections(session: Session, week: int, resolver: PlayerResolver | None = None) -> int:
     """Fetch fantasy projections and upsert as source 'sportsdata'.
 
     Attempts common SportsData.io projection shapes and gracefully returns 0 if unavailable.
@@ -135,7 +214,9 @@ def fetch_projections(session: Session, week: int) -> int:
             if not data:
                 return 0
             pos_map = {"Defense": "DST", "DEF": "DST"}
-            count = 0
+            resolver = resolver or PlayerResolver(session)
+            prior = SOURCE_ERROR_PRIOR["sportsdata"]
+            batch = []
             for it in data:
                 name = (it.get("Name") or it.get("PlayerName") or "").strip()
                 if not name:
@@ -155,10 +236,41 @@ def fetch_projections(session: Session, week: int) -> int:
                 if fpts is None:
                     # As a last resort, skip
                     continue
-                p = get_or_create_player(session, name=name, position=pos or None, team=team)
-                upsert_projection(session, p, week, "sportsdata", fpts, stdev=2.2)
-                count += 1
-            session.commit()
-            return count
+                batch.append((resolver.resolve(name, position=pos or None, team=team), fpts, prior))
+            # Caller commits (one transaction per week in backfills)
+            return bulk_upsert_projections(session, week, "sportsdata", batch)
+    except Exception:
+        return 0
+
+
+def fetch_actual_points(session: Session, week: int, season: int | None = None, resolver: PlayerResolver | None = None) -> int:
+    """Fetch final PPR fantasy points for a played week into ``ActualPoints``.
+
+    Backtests score lineups against these. Returns 0 if unavailable (no key, week not played).
+    """
+    try:
+        season = season or get_settings().season
+        with _client() as client:
+            r = client.get(f"/stats/json/PlayerGameStatsByWeek/{season}/{week}")
+            if r.status_code // 100 != 2:
+                return 0
+            data = r.json()
+            if not isinstance(data, list) or not data:
+                return 0
+            pos_map = {"Defense": "DST", "DEF": "DST"}
+            resolver = resolver or PlayerResolver(session)
+            batch = []
+            for it in data:
+                name = (it.get("Name") or "").strip()
+                try:
+                    fpts = float(it.get("FantasyPointsPPR"))
+                except (TypeError, ValueError):
+                    continue
+                # Missing actuals count as 0 in backtests, so zero rows (linemen, inactives) are not stored
+                if not name or not fpts:
+                    continue
+                pos = (it.get("Position") or it.get("FantasyPosition") or "").strip().upper()
+                batch.append((resolver.resolve(name, position=pos_map.get(pos, pos) or None, team=it.get("Team")), fpts))
+            return bulk_upsert_actuals(session, season, week, batch)
     except Exception:
         return 0
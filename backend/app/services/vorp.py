@@ -3,16 +3,21 @@ from __future__ import annotations
 from typing import Dict, List, Tuple
 from sqlmodel import Session, select
 
+from ..cache import derived
 from ..models import Player, Projection, Roster, RosterStatus
 
 
 REPLACEMENT_INDEX = {"QB": 12, "RB": 24, "WR": 24, "TE": 12, "K": 12, "DST": 12}
 
 
-def compute_replacement_levels(session: Session, week: int) -> Dict[str, float]:
-    # Use free-agent pool or league baseline: simplest approach: sort all projections by position
+def _week_rows(session: Session, week: int) -> List[Tuple[Projection, Player]]:
     stmt = select(Projection, Player).join(Player, Projection.player_id == Player.id).where(Projection.week == week)
-    rows = session.exec(stmt).all()
+    return session.exec(stmt).all()
+
+
+def compute_replacement_levels(session: Session, week: int, rows: List[Tuple[Projection, Player]] | None = None) -> Dict[str, float]:
+    # Use free-agent pool or league baseline: simplest approach: sort all projections by position
+    rows = rows if rows is not None else _week_rows(session, week)
     pos_points: Dict[str, List[float]] = {}
     for proj, player in rows:
         pos_points.setdefault(player.position, []).append(proj.expected)
@@ -28,9 +33,13 @@ def compute_replacement_levels(session: Session, week: int) -> Dict[str, float]:
 
 
 def compute_vorp(session: Session, week: int) -> Dict[int, float]:
-    repl = compute_replacement_levels(session, week)
-    stmt = select(Projection, Player).join(Player, Projection.player_id == Player.id).where(Projection.week == week)
-    rows = session.exec(stmt).all()
+    # Cached per week until projections or players change (any worker, see invalidation.py)
+    return dict(derived.get(("vorp", week), [("projection", week), ("player", None)], lambda: _compute_vorp(session, week)))
+
+
+def _compute_vorp(session: Session, week: int) -> Dict[int, float]:
+    rows = _week_rows(session, week)
+    repl = compute_replacement_levels(session, week, rows)
     vorp: Dict[int, float] = {}
     for proj, player in rows:
         base = repl.get(player.position, 0.0)
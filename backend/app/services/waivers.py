@@ -1,28 +1,41 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
+from sqlalchemy import exists
 from sqlmodel import Session, select
 
-from ..models import Player, Projection, Roster, RosterStatus
+from ..models import DEFAULT_LEAGUE, Player, Projection, Roster, RosterStatus
 from .vorp import compute_vorp
 
 
-def waiver_suggestions(session: Session, week: int) -> List[Dict]:
-    vorp = compute_vorp(session, week)
+def free_agent_filter(league_id: int = DEFAULT_LEAGUE):
+    """WHERE clause for ``Player`` rows on no roster of ``league_id``.
+
+    Only real roster entries are stored, so free agents are an anti-join (one
+    probe of the roster's (league_id, player_id) index per player); an old ``fa``
+    row counts as no entry.
+    """
+    return ~exists().where(Roster.league_id == league_id, Roster.player_id == Player.id, Roster.status != RosterStatus.fa)
+
+
+def waiver_suggestions(session: Session, week: int, vorp: Optional[Dict[int, float]] = None, league_id: int = DEFAULT_LEAGUE) -> List[Dict]:
+    # Callers that already computed VORP for the week can pass it in
+    vorp = vorp if vorp is not None else compute_vorp(session, week)
     # My rostered vs free agents
-    rosters = session.exec(select(Roster)).all()
-    my_players = {r.player_id for r in rosters if r.my_team and r.status in (RosterStatus.start, RosterStatus.bench)}
-    fa_players = {r.player_id for r in rosters if r.status == RosterStatus.fa}
+    mine = session.exec(
+        select(Player.id, Player.position).join(Roster, Roster.player_id == Player.id).where(
+            Roster.league_id == league_id, Roster.my_team == True, Roster.status.in_([RosterStatus.start, RosterStatus.bench])  # noqa: E712
+        )
+    ).all()
+    free_agents = session.exec(select(Player.id, Player.position).where(free_agent_filter(league_id))).all()
 
     # Worst rostered per position
     pos_to_rostered: Dict[str, List[int]] = {}
     pos_to_fa: Dict[str, List[int]] = {}
-    for pid in my_players:
-        p = session.get(Player, pid)
-        pos_to_rostered.setdefault(p.position, []).append(pid)
-    for pid in fa_players:
-        p = session.get(Player, pid)
-        pos_to_fa.setdefault(p.position, []).append(pid)
+    for pid, pos in mine:
+        pos_to_rostered.setdefault(pos, []).append(pid)
+    for pid, pos in free_agents:
+        pos_to_fa.setdefault(pos, []).append(pid)
 
     recs: List[Dict] = []
     for pos, fa_ids in pos_to_fa.items():
@@ -2,9 +2,16 @@ from __future__ import annotations
 
 import os
 from functools import lru_cache
+from datetime import datetime
 from pydantic_settings import BaseSettings
 
 
+def _default_season() -> int:
+    # NFL seasons run September to early February; January/February games belong to last year's season
+    now = datetime.utcnow()
+    return now.year if now.month >= 3 else now.year - 1
+
+
 class Settings(BaseSettings):
     # Default to 'db' for Docker Compose; use sensible defaults if env var is unset or empty
     postgres_host: str = os.getenv("POSTGRES_HOST") or "db"
@@ -16,10 +23,15 @@ class Settings(BaseSettings):
     swid: str | None = os.getenv("SWID") or None
     league_id: str | None = os.getenv("LEAGUE_ID") or None
     team_id: str | None = os.getenv("TEAM_ID") or None
+    # Stale-while-revalidate TTLs (seconds) for live ESPN reads (see app/cache.py)
+    standings_ttl_s: float = float(os.getenv("STANDINGS_TTL_S") or 300)
+    league_json_ttl_s: float = float(os.getenv("LEAGUE_JSON_TTL_S") or 120)
 
     # SportsData.io (optional)
     sportsdata_api_key: str | None = os.getenv("SPORTSDATA_API_KEY") or None
 
+    news_cache_ttl_s: float = float(os.getenv("NEWS_CACHE_TTL_S") or 600)
+
     # Yahoo Fantasy Sports (optional)
     yahoo_ap_id: str | None = os.getenv("YAHOO_AP_ID") or None
     yahoo_client_id: str | None = os.getenv("YAHOO_CLIENTID") or None
@@ -34,6 +46,57 @@ class Settings(BaseSettings):
 
     tz: str = os.getenv("TZ", "UTC")
 
+    # Offline HTTP record/replay for providers (see ingest/transport.py)
+    http_record_dir: str | None = os.getenv("HTTP_RECORD_DIR") or None
+    http_replay_dir: str | None = os.getenv("HTTP_REPLAY_DIR") or None
+    http_replay_latency_ms: float = float(os.getenv("HTTP_REPLAY_LATENCY_MS") or 0)
+    http_replay_error_rate: float = float(os.getenv("HTTP_REPLAY_ERROR_RATE") or 0)
+
+    # Open-Meteo: parallel requests per refresh and forecast reuse window
+    weather_concurrency: int = int(os.getenv("WEATHER_CONCURRENCY") or 8)
+    weather_cache_ttl_s: float = float(os.getenv("WEATHER_CACHE_TTL_S") or 1800)
+
+    # NFL season that projection history rows are filed under
+    season: int = int(os.getenv("SEASON") or _default_season())
+
+    # Blended projection moves at least this large (points) are logged as change events
+    projection_swing_threshold: float = float(os.getenv("PROJECTION_SWING_THRESHOLD") or 3.0)
+    # Change-feed readers hold back events younger than this (seconds) in case an
+    # earlier id is still uncommitted; must exceed the gap between recording and commit
+    change_settle_s: float = float(os.getenv("CHANGE_SETTLE_S") or 15)
+
+    # Background jobs (admin pipelines): worker threads per process and idle poll interval
+    job_workers: int = int(os.getenv("JOB_WORKERS") or 2)
+    job_poll_s: float = float(os.getenv("JOB_POLL_S") or 2.0)
+    # A running job whose owner has not heartbeated for this long is failed as interrupted
+    job_lease_s: float = float(os.getenv("JOB_LEASE_S") or 120)
+
+    # Weekly refresh graph: concurrent stages, and how long a source fetch counts as current
+    pipeline_workers: int = int(os.getenv("PIPELINE_WORKERS") or 4)
+    pipeline_source_refresh_s: float = float(os.getenv("PIPELINE_SOURCE_REFRESH_S") or 3600)
+
+    # Scheduler leader election (Postgres advisory lock): lock id and follower retry interval
+    scheduler_lock_key: int = int(os.getenv("SCHEDULER_LOCK_KEY") or 727_140_001)
+    leader_poll_s: float = float(os.getenv("LEADER_POLL_S") or 15)
+
+    # Write-behind buffer for saved lineup/waiver/trade results: flush interval, batch
+    # size that triggers an early flush, and older rows kept per week/objective
+    # (trade evaluations: per league) besides the latest
+    result_flush_s: float = float(os.getenv("RESULT_FLUSH_S") or 2.0)
+    result_batch_size: int = int(os.getenv("RESULT_BATCH_SIZE") or 200)
+    result_history: int = int(os.getenv("RESULT_HISTORY") or 5)
+    trade_history: int = int(os.getenv("TRADE_HISTORY") or 200)
+
+    # Cache invalidation fallback when LISTEN/NOTIFY is unavailable: epoch poll interval
+    cache_epoch_poll_s: float = float(os.getenv("CACHE_EPOCH_POLL_S") or 2.0)
+
+    # Async engine (read endpoints): pool sizing per worker process; connections are
+    # recycled instead of pinged on checkout
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE") or 10)
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW") or 20)
+    db_pool_timeout_s: float = float(os.getenv("DB_POOL_TIMEOUT_S") or 10)
+    db_pool_recycle_s: int = int(os.getenv("DB_POOL_RECYCLE_S") or 1800)
+
     # Simple auth (optional)
     app_password: str | None = os.getenv("APP_PASSWORD") or None
     auth_secret: str = os.getenv("AUTH_SECRET") or "change-me-secret"
@@ -56,6 +119,15 @@ class Settings(BaseSettings):
         )
 
 
+    @property
+    def async_database_url(self) -> str:
+        # psycopg 3 speaks asyncio natively; SQLite goes through aiosqlite
+        url = self.database_url
+        if url.startswith("sqlite://"):
+            return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return url
+
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
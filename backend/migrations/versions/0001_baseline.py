@@ -0,0 +1,228 @@
+"""Baseline: the schema as ``SQLModel.metadata.create_all`` used to build it
+
+Tables that already exist are left alone, so databases created before migrations
+(possibly missing the newer tables) are brought to the same baseline without a
+separate ``stamp`` step.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create(name, *columns, indexes=(), unique=()):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for col in indexes:
+        op.create_index(f"ix_{name}_{col}", name, [col], unique=col in unique)
+
+
+def _id():
+    return sa.Column("id", sa.Integer(), primary_key=True)
+
+
+def upgrade() -> None:
+    _create(
+        "player",
+        _id(),
+        sa.Column("espn_id", sa.Integer(), nullable=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("position", sa.String(), nullable=False),
+        sa.Column("team", sa.String(), nullable=True),
+        sa.Column("bye_week", sa.Integer(), nullable=True),
+        indexes=("espn_id", "name", "position", "team"),
+    )
+    _create(
+        "roster",
+        _id(),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("player.id"), nullable=False),
+        sa.Column("status", sa.Enum("start", "bench", "ir", "fa", name="rosterstatus"), nullable=False),
+        sa.Column("acquisition_cost", sa.Float(), nullable=True),
+        sa.Column("my_team", sa.Boolean(), nullable=False),
+    )
+    _create(
+        "projection",
+        _id(),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("player.id"), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("expected", sa.Float(), nullable=False),
+        sa.Column("stdev", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        indexes=("player_id", "week", "source"),
+    )
+    _create(
+        "injury",
+        _id(),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("player.id"), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("note", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        indexes=("player_id", "week"),
+    )
+    _create(
+        "changeevent",
+        _id(),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=True),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("player.id"), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=("kind", "week", "player_id"),
+    )
+    _create(
+        "changecursor",
+        sa.Column("consumer", sa.String(), primary_key=True),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    _create(
+        "adp",
+        _id(),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("player.id"), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("rank", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        indexes=("player_id", "source"),
+    )
+    _create(
+        "settingsrow",
+        _id(),
+        sa.Column("data", sa.JSON(), nullable=True),
+    )
+    _create(
+        "lineupresult",
+        _id(),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("objective", sa.String(), nullable=False),
+        sa.Column("results_json", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    _create(
+        "waiverrec",
+        _id(),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=True),
+    )
+    _create(
+        "tradeeval",
+        _id(),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    _create(
+        "game",
+        _id(),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("team", sa.String(), nullable=False),
+        sa.Column("opponent", sa.String(), nullable=True),
+        sa.Column("home", sa.Boolean(), nullable=False),
+        sa.Column("kickoff_utc", sa.DateTime(), nullable=True),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lon", sa.Float(), nullable=True),
+        sa.Column("weather", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        indexes=("week", "team"),
+    )
+    _create(
+        "dvp",
+        _id(),
+        sa.Column("team", sa.String(), nullable=False),
+        sa.Column("position", sa.String(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=True),
+        sa.Column("fp_allowed", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        indexes=("team", "position"),
+    )
+    _create(
+        "user",
+        _id(),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=("email",),
+        unique=("email",),
+    )
+    _create(
+        "dashboardsnapshot",
+        sa.Column("week", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("sections", sa.JSON(), nullable=True),
+        sa.Column("dirty", sa.JSON(), nullable=True),
+        sa.Column("etag", sa.String(), nullable=False),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+    )
+    if not sa.inspect(op.get_bind()).has_table("job"):
+        _create(
+            "job",
+            _id(),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("week", sa.Integer(), nullable=True),
+            sa.Column("status", sa.Enum("queued", "running", "succeeded", "failed", "cancelled", name="jobstatus"), nullable=False),
+            sa.Column("params", sa.JSON(), nullable=True),
+            sa.Column("stages", sa.JSON(), nullable=True),
+            sa.Column("result", sa.JSON(), nullable=True),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.Column("cancel_requested", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            indexes=("kind", "week", "status"),
+        )
+        active = sa.text("status IN ('queued', 'running')")
+        op.create_index("uq_job_active_kind_week", "job", ["kind", "week"], unique=True, postgresql_where=active, sqlite_where=active)
+    _create(
+        "pipelinerun",
+        _id(),
+        sa.Column("pipeline", sa.String(), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("stages", sa.JSON(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("duration_ms", sa.Float(), nullable=True),
+        indexes=("pipeline", "week"),
+    )
+    _create(
+        "scheduledrun",
+        _id(),
+        sa.Column("job", sa.String(), nullable=False),
+        sa.Column("scheduled_for", sa.DateTime(), nullable=False),
+        sa.Column("instance", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("duration_ms", sa.Float(), nullable=True),
+        sa.UniqueConstraint("job", "scheduled_for", name="uq_scheduledrun_job_slot"),
+        indexes=("job",),
+    )
+    _create(
+        "cacheepoch",
+        sa.Column("kind", sa.String(), primary_key=True),
+        sa.Column("week", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("epoch", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for name in (
+        "cacheepoch", "scheduledrun", "pipelinerun", "job", "dashboardsnapshot", "user", "dvp", "game",
+        "tradeeval", "waiverrec", "lineupresult", "settingsrow", "adp", "changecursor", "changeevent",
+        "injury", "projection", "roster", "player",
+    ):
+        op.drop_table(name)
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        sa.Enum(name="jobstatus").drop(bind, checkfirst=True)
+        sa.Enum(name="rosterstatus").drop(bind, checkfirst=True)
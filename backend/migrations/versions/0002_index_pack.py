@@ -0,0 +1,72 @@
+"""Composite indexes and natural-key unique indexes for the hot query paths
+
+Existing duplicates are removed first (newest row per key wins, see ``dedupe``),
+then:
+
+- projection (week, source, player_id)  unique
+- injury (week, player_id)              unique
+- roster (player_id)                    unique, plus (my_team, status)
+- game (week, team)                     unique
+- dvp (team, position)                  unique
+- adp (player_id, source)               unique
+
+Single-column indexes that are now a prefix of a composite one are dropped.
+
+Revision ID: 0002_index_pack
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_index_pack"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+# table -> (natural key, tie-break order: first row is kept, prefix indexes now redundant)
+KEYS = {
+    "projection": (("week", "source", "player_id"), "updated_at DESC, id DESC", ("week",)),
+    "injury": (("week", "player_id"), "updated_at DESC, id DESC", ("week",)),
+    "roster": (("player_id",), "my_team DESC, id DESC", ()),
+    "game": (("week", "team"), "updated_at DESC, id DESC", ("week",)),
+    "dvp": (("team", "position"), "updated_at DESC, id DESC", ("team",)),
+    "adp": (("player_id", "source"), "updated_at DESC, id DESC", ("player_id",)),
+}
+
+
+def dedupe(table: str, key, order: str) -> None:
+    """Delete all but the first row (by ``order``) of every ``key`` group."""
+    op.execute(
+        f"DELETE FROM {table} WHERE id IN ("
+        f"SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {', '.join(key)} ORDER BY {order}) AS rn FROM {table}) ranked "
+        f"WHERE rn > 1)"
+    )
+
+
+def _index_names(table: str):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    for table, (key, order, redundant) in KEYS.items():
+        existing = _index_names(table)
+        name = f"uq_{table}_{'_'.join(key)}"
+        if name not in existing:
+            dedupe(table, key, order)
+            op.create_index(name, table, list(key), unique=True)
+        for col in redundant:
+            if f"ix_{table}_{col}" in existing:
+                op.drop_index(f"ix_{table}_{col}", table_name=table)
+    if "ix_roster_my_team_status" not in _index_names("roster"):
+        op.create_index("ix_roster_my_team_status", "roster", ["my_team", "status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_roster_my_team_status", table_name="roster")
+    for table, (key, _, redundant) in KEYS.items():
+        op.drop_index(f"uq_{table}_{'_'.join(key)}", table_name=table)
+        for col in redundant:
+            op.create_index(f"ix_{table}_{col}", table, [col])
@@ -0,0 +1,37 @@
+"""League teams and Roster.league_team_id for full-league roster imports
+
+Revision ID: 0003_league_rosters
+Revises: 0002_index_pack
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_league_rosters"
+down_revision = "0002_index_pack"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "leagueteam",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("abbrev", sa.String(), nullable=True),
+        sa.Column("is_mine", sa.Boolean(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    with op.batch_alter_table("roster") as batch:
+        batch.add_column(sa.Column("league_team_id", sa.Integer(), nullable=True))
+        batch.create_foreign_key("fk_roster_league_team_id", "leagueteam", ["league_team_id"], ["id"])
+        batch.create_index("ix_roster_league_team_id", ["league_team_id"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("roster") as batch:
+        batch.drop_index("ix_roster_league_team_id")
+        batch.drop_constraint("fk_roster_league_team_id", type_="foreignkey")
+        batch.drop_column("league_team_id")
+    op.drop_table("leagueteam")
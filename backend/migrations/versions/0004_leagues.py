@@ -0,0 +1,172 @@
+"""Leagues: scope settings, rosters, results, snapshots and jobs by league
+
+Every existing row is assigned to league 1 ("Default"). Per-league indexes lead
+with ``league_id`` so one league's queries never scan another league's rows:
+
+- settingsrow (league_id)                      unique
+- roster (league_id, player_id)                unique, plus (league_id, my_team, status)
+- leagueteam primary key (league_id, id)
+- dashboardsnapshot primary key (league_id, week)
+- lineupresult / waiverrec (league_id, week), tradeeval (league_id)
+- job: one queued/running job per (kind, week, league_id)
+
+``roster.league_team_id`` loses its foreign key (the team key is now composite).
+The dashboard snapshot table is a cache and is rebuilt empty.
+
+Revision ID: 0004_leagues
+Revises: 0003_league_rosters
+Create Date: 2026-10-19
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_leagues"
+down_revision = "0003_league_rosters"
+branch_labels = None
+depends_on = None
+
+
+ACTIVE = sa.text("status IN ('queued', 'running')")
+
+
+def _league_id() -> sa.Column:
+    return sa.Column("league_id", sa.Integer(), nullable=False, server_default="1")
+
+
+def _fk_names(table: str):
+    return {fk["name"] for fk in sa.inspect(op.get_bind()).get_foreign_keys(table)}
+
+
+def _snapshot_table(*pk) -> None:
+    op.create_table(
+        "dashboardsnapshot",
+        *pk,
+        sa.Column("sections", sa.JSON(), nullable=True),
+        sa.Column("dirty", sa.JSON(), nullable=True),
+        sa.Column("etag", sa.String(), nullable=False),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    league = op.create_table(
+        "league",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("espn_league_id", sa.String(), nullable=True),
+        sa.Column("espn_team_id", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.bulk_insert(league, [{"id": 1, "name": "Default", "created_at": datetime.utcnow()}])
+    if bind.dialect.name == "postgresql":
+        op.execute("SELECT setval(pg_get_serial_sequence('league', 'id'), 1)")
+
+    # Only the pinned id=1 row was ever read
+    op.execute("DELETE FROM settingsrow WHERE id <> (SELECT MIN(id) FROM settingsrow)")
+    with op.batch_alter_table("settingsrow") as batch:
+        batch.add_column(_league_id())
+        batch.create_foreign_key("fk_settingsrow_league_id", "league", ["league_id"], ["id"])
+        batch.create_index("uq_settingsrow_league_id", ["league_id"], unique=True)
+
+    with op.batch_alter_table("roster") as batch:
+        batch.add_column(_league_id())
+        batch.create_foreign_key("fk_roster_league_id", "league", ["league_id"], ["id"])
+        if "fk_roster_league_team_id" in _fk_names("roster"):
+            batch.drop_constraint("fk_roster_league_team_id", type_="foreignkey")
+        batch.drop_index("uq_roster_player_id")
+        batch.drop_index("ix_roster_my_team_status")
+        batch.create_index("uq_roster_league_id_player_id", ["league_id", "player_id"], unique=True)
+        batch.create_index("ix_roster_league_id_my_team_status", ["league_id", "my_team", "status"])
+
+    # New primary key: copy into a fresh table rather than altering it in place
+    op.create_table(
+        "leagueteam_new",
+        sa.Column("league_id", sa.Integer(), sa.ForeignKey("league.id"), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False, autoincrement=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("abbrev", sa.String(), nullable=True),
+        sa.Column("is_mine", sa.Boolean(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("league_id", "id", name="pk_leagueteam"),
+    )
+    op.execute(
+        "INSERT INTO leagueteam_new (league_id, id, name, abbrev, is_mine, updated_at) "
+        "SELECT 1, id, name, abbrev, is_mine, updated_at FROM leagueteam"
+    )
+    op.drop_table("leagueteam")
+    op.rename_table("leagueteam_new", "leagueteam")
+
+    op.drop_table("dashboardsnapshot")
+    _snapshot_table(
+        sa.Column("league_id", sa.Integer(), sa.ForeignKey("league.id"), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=False, autoincrement=False),
+        sa.PrimaryKeyConstraint("league_id", "week", name="pk_dashboardsnapshot"),
+    )
+
+    for table in ("lineupresult", "waiverrec"):
+        op.add_column(table, _league_id())
+        op.create_index(f"ix_{table}_league_id_week", table, ["league_id", "week"])
+    op.add_column("tradeeval", _league_id())
+    op.create_index("ix_tradeeval_league_id", "tradeeval", ["league_id"])
+
+    op.add_column("job", _league_id())
+    op.create_index("ix_job_league_id", "job", ["league_id"])
+    op.drop_index("uq_job_active_kind_week", table_name="job")
+    op.create_index(
+        "uq_job_active_kind_week_league_id", "job", ["kind", "week", "league_id"], unique=True,
+        postgresql_where=ACTIVE, sqlite_where=ACTIVE,
+    )
+
+
+def downgrade() -> None:
+    # Back to one league: everything outside league 1 is dropped
+    for table in ("job", "tradeeval", "waiverrec", "lineupresult", "roster", "settingsrow"):
+        op.execute(f"DELETE FROM {table} WHERE league_id <> 1")
+
+    op.drop_index("uq_job_active_kind_week_league_id", table_name="job")
+    op.create_index("uq_job_active_kind_week", "job", ["kind", "week"], unique=True, postgresql_where=ACTIVE, sqlite_where=ACTIVE)
+    op.drop_index("ix_job_league_id", table_name="job")
+    for table, index in (("job", None), ("tradeeval", "ix_tradeeval_league_id"),
+                         ("waiverrec", "ix_waiverrec_league_id_week"), ("lineupresult", "ix_lineupresult_league_id_week")):
+        if index:
+            op.drop_index(index, table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("league_id")
+
+    op.drop_table("dashboardsnapshot")
+    _snapshot_table(sa.Column("week", sa.Integer(), primary_key=True, autoincrement=False))
+
+    op.create_table(
+        "leagueteam_old",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("abbrev", sa.String(), nullable=True),
+        sa.Column("is_mine", sa.Boolean(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO leagueteam_old (id, name, abbrev, is_mine, updated_at) "
+        "SELECT id, name, abbrev, is_mine, updated_at FROM leagueteam WHERE league_id = 1"
+    )
+    op.drop_table("leagueteam")
+    op.rename_table("leagueteam_old", "leagueteam")
+
+    with op.batch_alter_table("roster") as batch:
+        batch.drop_index("ix_roster_league_id_my_team_status")
+        batch.drop_index("uq_roster_league_id_player_id")
+        batch.drop_constraint("fk_roster_league_id", type_="foreignkey")
+        batch.drop_column("league_id")
+        batch.create_index("uq_roster_player_id", ["player_id"], unique=True)
+        batch.create_index("ix_roster_my_team_status", ["my_team", "status"])
+        batch.create_foreign_key("fk_roster_league_team_id", "leagueteam", ["league_team_id"], ["id"])
+
+    with op.batch_alter_table("settingsrow") as batch:
+        batch.drop_index("uq_settingsrow_league_id")
+        batch.drop_constraint("fk_settingsrow_league_id", type_="foreignkey")
+        batch.drop_column("league_id")
+
+    op.drop_table("league")
@@ -0,0 +1,50 @@
+"""Content hashes and retention for saved lineup, waiver and trade results
+
+Adds ``content_hash`` (indexed) to lineupresult, waiverrec and tradeeval, and
+``created_at`` to waiverrec, for the write-behind writer in services/results.py.
+Existing history is compacted once to the default retention (latest row plus 5
+per week/objective, 200 trade evaluations per league); older rows keep an empty
+hash and are never matched as duplicates.
+
+Revision ID: 0005_result_retention
+Revises: 0004_leagues
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_result_retention"
+down_revision = "0004_leagues"
+branch_labels = None
+depends_on = None
+
+
+# table -> (retention partition, rows kept per partition)
+KEEP = {
+    "lineupresult": ("league_id, week, objective", 6),
+    "waiverrec": ("league_id, week", 6),
+    "tradeeval": ("league_id", 201),
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("waiverrec") as batch:
+        batch.add_column(sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()))
+    for table, (partition, keep) in KEEP.items():
+        op.add_column(table, sa.Column("content_hash", sa.String(), nullable=False, server_default=""))
+        op.create_index(f"ix_{table}_content_hash", table, ["content_hash"])
+        op.execute(
+            f"DELETE FROM {table} WHERE id IN ("
+            f"SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY id DESC) AS rn FROM {table}) ranked "
+            f"WHERE rn > {keep})"
+        )
+
+
+def downgrade() -> None:
+    for table in KEEP:
+        op.drop_index(f"ix_{table}_content_hash", table_name=table)
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("content_hash")
+    with op.batch_alter_table("waiverrec") as batch:
+        batch.drop_column("created_at")
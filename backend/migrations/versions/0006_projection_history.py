@@ -0,0 +1,50 @@
+"""Append-only projection history for as-of reads and backtests
+
+Each current projection row is copied in as its first history entry, stamped with
+its ``updated_at`` and filed under the configured season.
+
+Revision ID: 0006_projection_history
+Revises: 0005_result_retention
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.settings import get_settings
+
+
+revision = "0006_projection_history"
+down_revision = "0005_result_retention"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "projectionhistory",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("season", sa.Integer(), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("player.id"), nullable=False),
+        sa.Column("expected", sa.Float(), nullable=False),
+        sa.Column("stdev", sa.Float(), nullable=True),
+        sa.Column("recorded_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_projectionhistory_season_week_source_player_id_recorded_at",
+        "projectionhistory",
+        ["season", "week", "source", "player_id", "recorded_at"],
+        postgresql_include=["expected", "stdev"],
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO projectionhistory (season, week, source, player_id, expected, stdev, recorded_at) "
+            "SELECT :season, week, source, player_id, expected, stdev, updated_at FROM projection"
+        ).bindparams(season=get_settings().season)
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_projectionhistory_season_week_source_player_id_recorded_at", table_name="projectionhistory")
+    op.drop_table("projectionhistory")
@@ -0,0 +1,32 @@
+"""Actual weekly fantasy points, for backtesting blend weights and risk settings
+
+Revision ID: 0007_actual_points
+Revises: 0006_projection_history
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_actual_points"
+down_revision = "0006_projection_history"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "actualpoints",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("season", sa.Integer(), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("player.id"), nullable=False),
+        sa.Column("points", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("uq_actualpoints_season_week_player_id", "actualpoints", ["season", "week", "player_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_actualpoints_season_week_player_id", table_name="actualpoints")
+    op.drop_table("actualpoints")
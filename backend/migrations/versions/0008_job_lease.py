@@ -0,0 +1,26 @@
+"""Job owner and heartbeat, so recovery only fails jobs of dead processes
+
+Revision ID: 0008_job_lease
+Revises: 0007_actual_points
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_job_lease"
+down_revision = "0007_actual_points"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("job") as batch:
+        batch.add_column(sa.Column("owner", sa.String(), nullable=True))
+        batch.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("job") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("owner")
@@ -0,0 +1,129 @@
+"""
+Load test for the read-heavy API endpoints.
+
+``--clients`` concurrent clients hit each endpoint in turn for ``--duration``
+seconds and the requests/sec and latency percentiles are printed. Without
+``--url`` the app is served in-process by uvicorn (one worker) on a free port,
+against a throwaway seeded SQLite file unless ``DATABASE_URL`` is set.
+
+    python -m bench.load_api --clients 200 --duration 10 --out after.json
+    python -m bench.load_api --url http://localhost:8000 --compare before.json
+
+Run it on the commit before a change with ``--out before.json`` and after it with
+``--compare before.json`` to get a before/after table.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+ENDPOINTS = ["/api/roster/my", "/api/dashboard/cards", "/api/news/my-players", "/api/settings"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve_in_process() -> str:
+    if not os.getenv("DATABASE_URL"):
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+        os.environ.setdefault("POSTGRES_HOST", "localhost")
+    # Imported late so DATABASE_URL above is honored
+    import uvicorn
+    from backend.app.db import init_db
+    from backend.app.main import app
+    from backend.app.seeds.seed import run as seed_run
+
+    init_db()
+    seed_run()
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def _hammer(base: str, path: str, clients: int, duration: float) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        async def worker() -> None:
+            nonlocal errors
+            while time.perf_counter() < stop_at:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    if r.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(pct(0.50), 1),
+        "p95_ms": round(pct(0.95), 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+def _table(results: Dict[str, Dict[str, Any]], before: Optional[Dict[str, Dict[str, Any]]]) -> str:
+    lines = [f"{'endpoint':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}" + (f"{'before':>10}{'change':>9}" if before else "")]
+    for path, r in results.items():
+        line = f"{path:<26}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['errors']:>8}"
+        if before and path in before:
+            old = before[path]["rps"]
+            line += f"{old:>10}{(r['rps'] / old if old else 0):>8.2f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent-client load test for the read endpoints")
+    parser.add_argument("--url", default=None, help="running API base URL; default: serve in-process")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--out", default=None, help="write results as JSON")
+    parser.add_argument("--compare", default=None, help="JSON from an earlier run to compare with")
+    args = parser.parse_args()
+
+    base = args.url or _serve_in_process()
+    results: Dict[str, Dict[str, Any]] = {}
+    for path in [p.strip() for p in args.endpoints.split(",") if p.strip()]:
+        results[path] = asyncio.run(_hammer(base, path, args.clients, args.duration))
+    before = json.loads(open(args.compare).read()) if args.compare else None
+    print(f"{args.clients} clients, {args.duration:.0f}s per endpoint against {base}")
+    print(_table(results, before))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
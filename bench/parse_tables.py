@@ -0,0 +1,161 @@
+"""
+Micro-benchmark: provider table parsing, pandas.read_html + iterrows vs ingest.tables.
+
+Runs both paths over the saved fixture pages (no network, no database) and reports
+best-of-N parse time and tracemalloc peak memory. ``--scale`` repeats each page's
+body rows to emulate larger pages.
+
+    python -m bench.parse_tables --repeat 20 --scale 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import pandas as pd
+
+from ingest.tables import iter_table, select_columns, column, clean_names, extract_teams, norm_teams, to_float
+
+
+FIXTURES = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "pages"
+
+
+# --- previous approach (as shipped before ingest.tables) ---
+
+def _norm_col(col) -> str:
+    if isinstance(col, tuple):
+        parts = [str(p) for p in col if p and str(p).lower() != 'nan']
+        s = " ".join(parts)
+    else:
+        s = str(col)
+    return s.strip().upper()
+
+
+def _clean_player_name(text: str) -> str:
+    s = re.sub(r"\s*\(.*\)$", "", text).strip()
+    s = re.sub(r"\s+(?:[A-Z]{2,3}|D\/ST|DST)$", "", s)
+    return re.sub(r"\b(JR|SR|II|III|IV|V)\.?$", "", s, flags=re.IGNORECASE).strip()
+
+
+def _extract_team(name_text: str, row_team: str | None) -> str | None:
+    t = (row_team or "").strip().upper() if row_team else None
+    if t and len(t) <= 3 and t.isalpha():
+        return t
+    m = re.search(r"\(([^)]+)\)$", name_text)
+    if m:
+        tt = m.group(1).strip().upper()
+        if 2 <= len(tt) <= 3 and tt.isalpha():
+            return tt
+    m2 = re.search(r"\s([A-Z]{2,3}|D\/ST|DST)$", name_text.strip())
+    if m2:
+        tt = m2.group(1).upper()
+        return "DST" if tt in ("DST", "D/ST") else tt
+    return None
+
+
+def pandas_players(html: str, value_hint: str) -> List[Tuple]:
+    dfs = pd.read_html(StringIO(html))
+    out = []
+    for df in dfs:
+        df.columns = [_norm_col(c) for c in df.columns]
+        name_col = next((c for c in df.columns if "PLAYER" in c), None)
+        val_col = next((c for c in df.columns if value_hint in c), None)
+        if not name_col or not val_col:
+            continue
+        for _, row in df.iterrows():
+            raw = str(row.get(name_col, "")).strip()
+            try:
+                val = float(row.get(val_col))
+            except Exception:
+                continue
+            out.append((_clean_player_name(raw), _extract_team(raw, None), val))
+        break
+    return out
+
+
+def pandas_dvp(html: str) -> List[Tuple]:
+    df = pd.read_html(StringIO(html))[0]
+    df.columns = [str(c).strip().upper() for c in df.columns]
+    out = []
+    for idx, row in df.iterrows():
+        m = re.match(r"([A-Z]{2,3})", str(row.get("TEAM", "")).strip().upper())
+        out.append((m.group(1) if m else "", idx + 1, float(row.get("FPTS"))))
+    return out
+
+
+# --- streaming approach ---
+
+def stream_players(html: str, value_hint: str) -> List[Tuple]:
+    name_col = column(contains=("PLAYER",))
+    val_col = column(contains=(value_hint,))
+    rows = list(select_columns(
+        iter_table(html, where=lambda h: name_col(list(h)) is not None and val_col(list(h)) is not None),
+        name_col, val_col, required=(0, 1),
+    ))
+    raws = [r[0] for r in rows]
+    return [
+        (n, t, v)
+        for n, t, v in zip(clean_names(raws), extract_teams(raws), (to_float(r[1]) for r in rows))
+        if v is not None
+    ]
+
+
+def stream_dvp(html: str) -> List[Tuple]:
+    rows = list(select_columns(iter_table(html), column("TEAM", default=0), column(contains=("FPTS",))))
+    teams = norm_teams([r[0] for r in rows])
+    return [(t, i + 1, to_float(r[1])) for i, (t, r) in enumerate(zip(teams, rows))]
+
+
+CASES: List[Tuple[str, str, Callable, Callable]] = [
+    ("fp_projections_qb.html", "FPTS", pandas_players, stream_players),
+    ("fp_adp_overall.html", "ADP", pandas_players, stream_players),
+    ("espn_livedraftresults.html", "AVG", pandas_players, stream_players),
+    ("fp_dvp_qb.html", "", lambda h, _v: pandas_dvp(h), lambda h, _v: stream_dvp(h)),
+]
+
+
+def scale_page(html: str, factor: int) -> str:
+    if factor <= 1:
+        return html
+    start = html.index("<tbody")
+    start = html.index(">", start) + 1
+    end = html.index("</tbody>", start)
+    return html[:start] + html[start:end] * factor + html[end:]
+
+
+def measure(fn: Callable, html: str, hint: str, repeat: int) -> Tuple[float, int, int]:
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = len(fn(html, hint))
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(html, hint)
+    _cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+    print(f"{'page':<28} {'rows':>6} {'pandas ms':>10} {'stream ms':>10} {'pandas KiB':>11} {'stream KiB':>11}")
+    for fname, hint, old, new in CASES:
+        html = scale_page((FIXTURES / fname).read_text(), args.scale)
+        t_old, m_old, n_old = measure(old, html, hint, args.repeat)
+        t_new, m_new, n_new = measure(new, html, hint, args.repeat)
+        assert n_old == n_new, f"{fname}: row count mismatch {n_old} != {n_new}"
+        print(f"{fname:<28} {n_new:>6} {t_old * 1000:>10.2f} {t_new * 1000:>10.2f} {m_old / 1024:>11.1f} {m_new / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: as-of reads of the projection history (services.projection_history).
+
+Fills ``--weeks`` weeks of ``--players`` x ``--sources`` projections, revised
+``--versions`` times over the week with ``--churn`` of the values moving each
+time (only moved values are appended, as in ingest), then times full-week
+snapshots at random timestamps. Without ``DATABASE_URL`` a throwaway SQLite file
+is used.
+
+    python -m bench.projection_history --players 10000 --sources 4 --versions 6 --churn 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--sources", type=int, default=4)
+    parser.add_argument("--versions", type=int, default=6)
+    parser.add_argument("--churn", type=float, default=0.5)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--season", type=int, default=2024)
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+        os.environ.setdefault("POSTGRES_HOST", "localhost")
+    # Imported late so DATABASE_URL above is honored
+    from sqlalchemy import insert
+    from sqlmodel import Session
+    from backend.app.db import engine, init_db
+    from backend.app.models import Player
+    from backend.app.services.projection_history import append_history, projections_as_of
+
+    init_db()
+    rnd = random.Random(0)
+    start = datetime(args.season, 9, 1)
+    sources = [f"src{i}" for i in range(args.sources)]
+    with Session(engine) as session:
+        first = session.execute(insert(Player).returning(Player.id), [{"name": f"Bench {i}", "position": "WR"} for i in range(args.players)])
+        pids = list(first.scalars())
+        t0 = time.perf_counter()
+        total = 0
+        for week in range(1, args.weeks + 1):
+            for v in range(args.versions):
+                at = start + timedelta(weeks=week - 1, hours=24 * v)
+                for src in sources:
+                    moved = pids if v == 0 else [pid for pid in pids if rnd.random() < args.churn]
+                    total += append_history(session, week, src, [(pid, rnd.uniform(0, 25), 2.0) for pid in moved], recorded_at=at, season=args.season)
+        session.commit()
+        print(f"appended {total} rows in {time.perf_counter() - t0:.2f}s")
+
+        timings = []
+        for _ in range(args.reads):
+            week = rnd.randint(1, args.weeks)
+            at = start + timedelta(weeks=week - 1, hours=rnd.uniform(0, 24 * args.versions))
+            t0 = time.perf_counter()
+            rows = projections_as_of(session, week, at, season=args.season)
+            timings.append(time.perf_counter() - t0)
+        print(
+            f"as-of snapshot ({len(rows)} rows): median {statistics.median(timings) * 1000:.1f} ms, "
+            f"best {min(timings) * 1000:.1f} ms over {args.reads} reads"
+        )
+
+
+if __name__ == "__main__":
+    main()
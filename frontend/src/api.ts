@@ -54,3 +54,18 @@ export async function getStandings(): Promise<{table:any[], source?:string}> {
 export async function getDashboardCards(): Promise<{injuries:any[], byes:any[], weather:any[], late_swap:any[], waivers:any[], trade:any[]}> {
   return api('/api/dashboard/cards')
 }
+
+export type JobStage = { name: string, status: string, duration_ms?: number, error?: string, result?: any }
+export type Job = { id: number, kind: string, week: number|null, status: 'queued'|'running'|'succeeded'|'failed'|'cancelled', stages: JobStage[], result: any, error: string|null, cancel_requested: boolean }
+
+export async function startUpdateEverything(week: number, scheduleCsv: string): Promise<{ok:boolean, job_id:number, status:string}> {
+  return api(`/api/admin/update-everything?week=${week}`, { method: 'POST', body: JSON.stringify({ schedule_csv: scheduleCsv }) })
+}
+
+export async function getJob(id: number): Promise<Job> {
+  return api(`/api/jobs/${id}`)
+}
+
+export async function cancelJob(id: number): Promise<Job> {
+  return api(`/api/jobs/${id}/cancel`, { method: 'POST' })
+}
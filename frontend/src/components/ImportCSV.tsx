@@ -5,8 +5,9 @@ export default function ImportCSV(){
   const [csv, setCsv] = useState('name,position,team,status\nPatrick Mahomes,QB,KC,start')
   const [msg, setMsg] = useState('')
   const onSubmit = async () => {
-    const res = await api<{ok:boolean,count:number}>('/api/roster/import',{ method:'POST', body: JSON.stringify({ csv }) })
-    setMsg(`Imported ${res.count} rows`)
+    const res = await api<{ok:boolean,count:number,rejected:number,errors:{line:number,name:string,error:string}[]}>('/api/roster/import',{ method:'POST', body: JSON.stringify({ csv }) })
+    const skipped = res.errors.map(e => `line ${e.line} ${e.name}: ${e.error}`).join('; ')
+    setMsg(`Imported ${res.count} rows` + (res.rejected ? `, skipped ${res.rejected} (${skipped})` : ''))
   }
   return (
     <div className="space-y-2">
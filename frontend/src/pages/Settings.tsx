@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import ImportCSV from '../components/ImportCSV'
-import { getSettings, saveSettings, ingestAndBlend } from '../api'
+import { getSettings, saveSettings, ingestAndBlend, startUpdateEverything, getJob, cancelJob } from '../api'
 
 export default function Settings(){
   const [currentWeek, setCurrentWeek] = useState<number>(1)
@@ -16,15 +16,29 @@ export default function Settings(){
   }
   const [schedCsv, setSchedCsv] = useState('team,opponent,home,kickoff_iso\n')
   const [everythingMsg, setEverythingMsg] = useState('')
+  const [jobId, setJobId] = useState<number|null>(null)
   const updateEverything = async () => {
-    setEverythingMsg('Updating everything...')
+    setEverythingMsg('Queued...')
     try {
-      const res = await fetch(`/api/admin/update-everything?week=${currentWeek}`, { method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({ schedule_csv: schedCsv }) })
-      const data = await res.json()
-      if (!res.ok) throw new Error(JSON.stringify(data))
-      setEverythingMsg(`OK: blended=${data.counts?.blended}, schedule=${data.counts?.schedule_imported}, sportsdata_inj=${data.counts?.sportsdata_inj||0}, lineup ready.`)
+      const { job_id } = await startUpdateEverything(currentWeek, schedCsv)
+      setJobId(job_id)
+      // Poll until the job finishes; show the running stage meanwhile
+      for (;;) {
+        const job = await getJob(job_id)
+        const stage = job.stages.filter(s=>s.status==='running').map(s=>s.name)[0]
+        if (job.status === 'succeeded') {
+          const c = job.result?.counts || {}
+          setEverythingMsg(`OK: blended=${c.blended}, schedule=${c.schedule_imported}, sportsdata_inj=${c.sportsdata_inj||0}, lineup ready.`)
+          break
+        }
+        if (job.status === 'failed' || job.status === 'cancelled') { setEverythingMsg(`${job.status}${job.error ? ': '+job.error.split('\n')[0] : ''}`); break }
+        setEverythingMsg(job.status === 'queued' ? 'Queued...' : `Running: ${stage||'...'} (${job.stages.filter(s=>s.status!=='running').length} stages done)`)
+        await new Promise(r=>setTimeout(r, 1000))
+      }
     } catch(e:any){ setEverythingMsg(e.message||'Failed') }
+    setJobId(null)
   }
+  const cancelEverything = async () => { if (jobId) { try { await cancelJob(jobId); setEverythingMsg('Cancelling...') } catch{} } }
   const onSave = async ()=>{
     try { await saveSettings({ current_week: currentWeek }); setMsg('Saved') } catch(e:any){ setMsg(e.message||'Failed') }
     setTimeout(()=>setMsg(''), 1500)
@@ -65,7 +79,8 @@ export default function Settings(){
         <div className="text-xs text-gray-600 mb-2">Optional: paste weekly schedule CSV to enrich weather/home/away.</div>
         <textarea className="w-full border p-2 h-24" value={schedCsv} onChange={e=>setSchedCsv(e.target.value)} />
         <div className="mt-2 flex items-center gap-2">
-          <button onClick={updateEverything} className="px-3 py-1 bg-green-600 text-white rounded">Update Everything (Week {currentWeek})</button>
+          <button onClick={updateEverything} disabled={jobId!==null} className="px-3 py-1 bg-green-600 text-white rounded">Update Everything (Week {currentWeek})</button>
+          {jobId!==null && <button onClick={cancelEverything} className="px-3 py-1 bg-gray-200 dark:bg-gray-700 rounded">Cancel</button>}
           {everythingMsg && <span className="text-sm text-gray-600">{everythingMsg}</span>}
         </div>
       </div>
@@ -0,0 +1,85 @@
+"""
+Backtest CLI: replay a season's weeks through the blend and lineup logic for a
+grid of blend weights and risk lambdas (see backend/app/services/backtest.py).
+
+    python -m ingest.backtest --season 2025 --weeks 1-17
+    python -m ingest.backtest --season 2025 --weeks 1-17 --step 0.1 --lambdas 0,0.2,0.35,0.5 --workers 8
+    python -m ingest.backtest --season 2025 --weeks 1-17 --apply
+
+Needs projection history and actual points for the weeks (``python -m
+ingest.update --weeks 1-17 --sources actuals``). ``--apply`` merges the best
+weights into the league's settings (sources without history keep theirs), stores
+its ``risk_lambda`` and re-blends the current week.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import List, Sequence
+
+from sqlmodel import Session
+
+from backend.app.db import engine
+from backend.app.models import DEFAULT_LEAGUE
+from backend.app.services.backtest import DEFAULT_LAMBDAS, apply_best, run_backtest
+from ingest.update import parse_weeks
+
+
+def parse_floats(spec: str) -> List[float]:
+    try:
+        return [float(x) for x in spec.split(",") if x.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad number list: {spec}")
+
+
+def format_report(report: dict) -> str:
+    def row(label: str, cfg: dict) -> str:
+        weights = " ".join(f"{s}={w:g}" for s, w in next(iter(cfg["weights"].values())).items())
+        return f"{label:<9} {cfg['points']:>9.2f} {cfg['regret']:>9.2f}  lambda={cfg['risk_lambda']:g}  {weights}"
+
+    lines = [
+        f"season {report['season']}, weeks {report['weeks'][0]}-{report['weeks'][-1]} ({len(report['weeks'])} played), "
+        f"pool={report['pool']} ({report['players']} players max), {report['configs']} configs in {report['seconds']:.2f}s",
+        f"hindsight-optimal: {report['optimal_points']:.2f}",
+        f"{'':<9} {'points':>9} {'regret':>9}",
+        row("current", report["baseline"]),
+        *(row(f"#{i}", cfg) for i, cfg in enumerate(report["top"], start=1)),
+    ]
+    if len({json.dumps(w, sort_keys=True) for w in report["baseline"]["weights"].values()}) > 1:
+        lines.append("(current weights differ by position; the QB row is shown)")
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Backtest blend weights and the lineup risk lambda")
+    parser.add_argument("--season", type=int, required=True)
+    parser.add_argument("--weeks", type=parse_weeks, default=parse_weeks("1-18"), help="e.g. 1-17 or 1,3,5-7")
+    parser.add_argument("--step", type=float, default=0.1, help="blend weight grid spacing")
+    parser.add_argument("--lambdas", type=parse_floats, default=list(DEFAULT_LAMBDAS))
+    parser.add_argument("--pool", choices=("roster", "all"), default="roster")
+    parser.add_argument("--league-id", type=int, default=DEFAULT_LEAGUE)
+    parser.add_argument("--workers", type=int, default=None, help="processes; default one per core")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the full report here")
+    parser.add_argument("--apply", action="store_true", help="merge the best config into the league's settings")
+    args = parser.parse_args(argv)
+
+    with Session(engine) as session:
+        try:
+            report = run_backtest(
+                session, args.season, args.weeks, step=args.step, lambdas=args.lambdas, pool=args.pool, workers=args.workers, league_id=args.league_id
+            )
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        print(format_report(report))
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump(report, f, indent=2)
+        if args.apply:
+            apply_best(session, report, league_id=args.league_id)
+            session.commit()
+            print(f"Saved best weights and risk_lambda={report['best']['risk_lambda']:g} to league {args.league_id}")
+
+
+if __name__ == "__main__":
+    main()
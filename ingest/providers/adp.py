@@ -2,8 +2,9 @@ from __future__ import annotations
 
 from sqlmodel import Session
 from .fantasypros import fetch_adp_fantasypros
+from ..util import PlayerResolver
 
 
-def fetch_adp(session: Session) -> int:
+def fetch_adp(session: Session, resolver: PlayerResolver | None = None) -> int:
     # Prefer FantasyPros ADP (public) for now
-    return fetch_adp_fantasypros(session)
+    return fetch_adp_fantasypros(session, resolver=resolver)
@@ -1,28 +1,47 @@
 from __future__ import annotations
 
-from typing import Dict
-from io import StringIO
-import re
-import httpx
-import pandas as pd
-from sqlmodel import Session, select
+from typing import List, Optional, Tuple
 
-from backend.app.models import DVP
+from sqlmodel import Session
+
+from ..transport import http_client
+from ..tables import iter_table, select_columns, column, norm_teams, to_float
+from ..util import bulk_upsert_dvp
 
 
 POS_SLUG = {"QB": "qb", "RB": "rb", "WR": "wr", "TE": "te", "K": "k"}
 
+_TEAM_COL = column("TEAM", "DEFENSE", default=0)
+_FPTS_COL = column(contains=("FPTS", "FANTASY POINTS"))
+_PTS_COL = column("PTS")
+_RANK_COL = column("RANK")
+
+
+def _points_col(header: List[str]) -> Optional[int]:
+    # FPTS when the table has it, else PTS; picked once per table, never per row
+    i = _FPTS_COL(header)
+    return i if i is not None else _PTS_COL(header)
+
 
-def _norm_team(t: str) -> str:
-    t = (t or "").strip().upper()
-    # Normalize some variations
-    m = re.match(r"([A-Z]{2,3})", t)
-    return m.group(1) if m else t
+def parse_dvp(content: str | bytes) -> List[Tuple[str, Optional[int], Optional[float]]]:
+    """``(team, rank, fp_allowed)`` rows of a defense-vs-position page; rank is the
+    RANK column or the row order."""
+    rows = list(select_columns(iter_table(content), _TEAM_COL, _points_col, _RANK_COL))
+    teams = norm_teams([row[0] for row in rows])
+    batch = []
+    for idx, (team, (_t, points, rank_raw)) in enumerate(zip(teams, rows)):
+        if not team:
+            continue
+        rank = to_float(rank_raw)
+        if rank is None:
+            rank = None if rank_raw else idx + 1
+        batch.append((team, int(rank) if rank is not None else None, to_float(points)))
+    return batch
 
 
 def fetch_dvp(session: Session) -> int:
     count = 0
-    with httpx.Client(timeout=20) as client:
+    with http_client(timeout=20) as client:
         for pos, slug in POS_SLUG.items():
             url = f"https://www.fantasypros.com/nfl/defense-vs-position/{slug}.php"
             try:
@@ -36,43 +55,5 @@ def fetch_dvp(session: Session) -> int:
                     r.raise_for_status()
                 except Exception:
                     continue
-            dfs = pd.read_html(StringIO(r.text))
-            if not dfs:
-                continue
-            df = dfs[0]
-            df.columns = [str(c).strip().upper() for c in df.columns]
-            # Look for TEAM and FPTS columns
-            team_col = next((c for c in df.columns if c in ("TEAM","DEFENSE")), df.columns[0])
-            fpts_col = next((c for c in df.columns if "FPTS" in c or "FANTASY POINTS" in c), None)
-            if not fpts_col:
-                # sometimes "PTS" used
-                fpts_col = next((c for c in df.columns if c == "PTS"), None)
-            # Rank is usually the index +1 or a RANK column
-            rank_col = next((c for c in df.columns if c == "RANK"), None)
-            for idx, row in df.iterrows():
-                team = _norm_team(str(row.get(team_col, "")))
-                if not team:
-                    continue
-                fp = None
-                try:
-                    v = row.get(fpts_col) if fpts_col else None
-                    if v is not None:
-                        fp = float(v)
-                except Exception:
-                    fp = None
-                if rank_col:
-                    try:
-                        rank = int(row.get(rank_col))
-                    except Exception:
-                        rank = None
-                else:
-                    rank = idx + 1
-                dvp = session.exec(select(DVP).where(DVP.team == team, DVP.position == pos)).first()
-                if not dvp:
-                    dvp = DVP(team=team, position=pos)
-                    session.add(dvp)
-                dvp.rank = rank
-                dvp.fp_allowed = fp
-                count += 1
-    session.commit()
+            count += bulk_upsert_dvp(session, pos, parse_dvp(r.content))
     return count
@@ -1,101 +1,66 @@
 from __future__ import annotations
 
-from typing import List, Tuple, Optional
-import re
-from io import StringIO
-import httpx
-import pandas as pd
+from sqlalchemy import delete, func
 from sqlmodel import Session, select
-from backend.app.models import Player, Roster, RosterStatus
+from backend.app.models import DEFAULT_LEAGUE, Player, Roster, RosterStatus
 from backend.app.settings import get_settings
-from ..util import upsert_projection, upsert_injury, upsert_adp, get_or_create_player
+from backend.app.services.dashboard import mark_dashboard_dirty
+from backend.app.services.projections import SOURCE_ERROR_PRIOR
+from backend.app.services.waivers import free_agent_filter
+from ..transport import http_client
+from ..tables import iter_tables, select_columns, column, clean_names, extract_teams, to_float
+from ..util import PlayerResolver, bulk_upsert_adp, bulk_upsert_projections, bulk_upsert_roster, upsert_league_teams
 
 
 def fetch_projections(session: Session, week: int) -> int:
     # Demo: generate simple projections slightly higher for ESPN
-    count = 0
-    players = session.exec(select(Player)).all()
-    for p in players:
-        base = 20.0 if p.position == "QB" else 12.0
-        upsert_projection(session, p, week, "espn", base + 2.0, stdev=2.0)
-        count += 1
-    return count
+    prior = SOURCE_ERROR_PRIOR["espn"]
+    rows = session.exec(select(Player.id, Player.position)).all()
+    return bulk_upsert_projections(session, week, "espn", [(pid, (20.0 if pos == "QB" else 12.0) + 2.0, prior) for pid, pos in rows])
 
 
 def fetch_injuries(session: Session, week: int) -> int:
-    # Demo: mark everyone Active
-    count = 0
-    for p in session.exec(select(Player)).all():
-        upsert_injury(session, p, week, "Active", note=None)
-        count += 1
-    return count
+    # Demo: ESPN reports nobody injured, and Active is the implicit default (no row)
+    return 0
 
 
-def fetch_adp(session: Session) -> int:
+_ADP_NAME_COL = column("PLAYER", "PLAYER NAME", "NAME")
+_ADP_COL = column("ADP", "AVG PICK", "AVERAGE PICK", contains=("ADP", "AVERAGE"))
+
+
+def _is_adp_header(header: tuple) -> bool:
+    return _ADP_NAME_COL(list(header)) is not None and _ADP_COL(list(header)) is not None
+
+
+def fetch_adp(session: Session, resolver: PlayerResolver | None = None) -> int:
     # Scrape ESPN Live Draft Results (public) for ADP; best-effort
     # Example: https://fantasy.espn.com/football/livedraftresults?seasonId=2025
     import datetime as _dt
     season = _dt.datetime.utcnow().year
     url = f"https://fantasy.espn.com/football/livedraftresults?seasonId={season}"
     try:
-        with httpx.Client(timeout=20) as client:
+        with http_client(timeout=20) as client:
             r = client.get(url)
             r.raise_for_status()
-            # Parse all tables and find the one with ADP-like column
-            dfs = pd.read_html(StringIO(r.text))
-            if not dfs:
-                return 0
-            count = 0
-            # Helpers
-            def _norm_col(col) -> str:
-                if isinstance(col, tuple):
-                    parts = [str(p) for p in col if p and str(p).lower() != 'nan']
-                    s = " ".join(parts)
-                else:
-                    s = str(col)
-                return s.strip().upper()
-
-            def _clean_name(s: str) -> str:
-                # Remove parentheses/team and trailing team, and common suffixes
-                s2 = re.sub(r"\s*\(.*\)$", "", s).strip()
-                s2 = re.sub(r"\s+(?:[A-Z]{2,3}|D\/ST|DST)$", "", s2)
-                s2 = re.sub(r"\b(JR|SR|II|III|IV|V)\.?$", "", s2, flags=re.IGNORECASE).strip()
-                return s2
-
-            def _extract_team(name_text: str) -> Optional[str]:
-                m = re.search(r"\(([^)]+)\)$", name_text)
-                if m:
-                    tt = m.group(1).strip().upper()
-                    if 2 <= len(tt) <= 3 and tt.isalpha():
-                        return tt
-                m2 = re.search(r"\s([A-Z]{2,3}|D\/ST|DST)$", name_text.strip())
-                if m2:
-                    tt = m2.group(1).upper()
-                    return "DST" if tt in ("DST","D/ST") else tt
-                return None
-
-            for df in dfs:
-                df.columns = [_norm_col(c) for c in df.columns]
-                name_col = next((c for c in df.columns if c in ("PLAYER","PLAYER NAME","NAME")), None)
-                adp_col = next((c for c in df.columns if c in ("ADP","AVG PICK","AVERAGE PICK") or "ADP" in c or "AVERAGE" in c), None)
-                if not name_col or not adp_col:
-                    continue
-                for _, row in df.iterrows():
-                    raw = str(row.get(name_col, "")).strip()
-                    if not raw:
-                        continue
-                    name = _clean_name(raw)
-                    team = _extract_team(raw)
-                    try:
-                        adp = float(row.get(adp_col))
-                    except Exception:
-                        continue
-                    if not name:
-                        continue
-                    p = get_or_create_player(session, name=name, team=team)
-                    upsert_adp(session, p, "espn", adp)
-                    count += 1
-            return count
+        # Every table with player + ADP-like columns (the page may split the board)
+        rows = [
+            row
+            for table in iter_tables(r.content, where=_is_adp_header)
+            for row in select_columns(table, _ADP_NAME_COL, _ADP_COL, required=(0, 1))
+        ]
+        if not rows:
+            return 0
+        resolver = resolver or PlayerResolver(session)
+        raws = [row[0] for row in rows]
+        names = clean_names(raws)
+        teams = extract_teams(raws)
+        batch = []
+        for name, team, row in zip(names, teams, rows):
+            adp = to_float(row[1])
+            if not name or adp is None:
+                continue
+            batch.append((resolver.resolve(name, team=team), adp))
+        return bulk_upsert_adp(session, "espn", batch)
     except Exception:
         return 0
 
@@ -122,67 +87,109 @@ TEAM_ID_TO_ABBR = {
 }
 
 
-def fetch_private_roster(session: Session, week: int, season: int | None = None) -> dict:
+def league_config_error(require_team: bool = True, espn_league_id: str | None = None, espn_team_id: str | None = None) -> str | None:
+    # A league's own ESPN ids stand in for LEAGUE_ID/TEAM_ID
+    settings = get_settings()
+    league_id = espn_league_id or settings.league_id
+    team_id = espn_team_id or settings.team_id
+    if not (settings.espn_s2 and settings.swid and league_id and (team_id or not require_team)):
+        return "Missing ESPN_S2/SWID/LEAGUE_ID/TEAM_ID env vars"
+    return None
+
+
+def fetch_league_json(week: int, season: int | None = None, espn_league_id: str | None = None) -> dict:
+    """Download the private league's mTeam/mRoster payload (raises on HTTP errors).
+
+    ``espn_league_id`` defaults to the ``LEAGUE_ID`` setting.
+    """
     settings = get_settings()
-    if not (settings.espn_s2 and settings.swid and settings.league_id and settings.team_id):
-        return {"ok": False, "error": "Missing ESPN_S2/SWID/LEAGUE_ID/TEAM_ID env vars"}
     if season is None:
         # crude guess: use current year
         import datetime as _dt
         season = _dt.datetime.utcnow().year
-    url = f"https://fantasy.espn.com/apis/v3/games/ffl/seasons/{season}/segments/0/leagues/{settings.league_id}?scoringPeriodId={week}&view=mTeam&view=mRoster"
+    url = f"https://fantasy.espn.com/apis/v3/games/ffl/seasons/{season}/segments/0/leagues/{espn_league_id or settings.league_id}?scoringPeriodId={week}&view=mTeam&view=mRoster"
     cookies = {"espn_s2": settings.espn_s2, "SWID": settings.swid}
-    with httpx.Client(timeout=20, cookies=cookies) as client:
+    with http_client(timeout=20, cookies=cookies) as client:
         r = client.get(url)
         r.raise_for_status()
-        data = r.json()
-    team_id = int(settings.team_id)
-    teams = data.get("teams", [])
-    my_team = next((t for t in teams if t.get("id") == team_id), None)
-    if not my_team:
+        return r.json()
+
+
+def fetch_private_roster(session: Session, week: int, season: int | None = None) -> dict:
+    error = league_config_error()
+    if error:
+        return {"ok": False, "error": error}
+    return apply_private_roster(session, fetch_league_json(week, season))
+
+
+def _slot_status(slot) -> RosterStatus:
+    if slot in LINEUP_SLOT_STARTERS:
+        return RosterStatus.start
+    if slot in LINEUP_SLOT_IR:
+        return RosterStatus.ir
+    return RosterStatus.bench
+
+
+def _team_name(team: dict) -> str:
+    return team.get("name") or f"{team.get('location', '')} {team.get('nickname', '')}".strip() or f"Team {team.get('id')}"
+
+
+def apply_private_roster(session: Session, data: dict, league_id: int = DEFAULT_LEAGUE, team_id: str | int | None = None) -> dict:
+    """Upsert every team's roster from a league payload (see ``fetch_league_json``)
+    into ``league_id``; ``team_id`` (default: the ``TEAM_ID`` setting) is my team.
+
+    All teams go out in one ``bulk_upsert_roster`` pass, tagged with their league
+    team id. Only rostered players are stored: rows of players no longer on any
+    team are deleted, and free agents are derived at read time
+    (``services.waivers.free_agent_filter``).
+    """
+    team_id = int(team_id or get_settings().team_id)
+    teams = [t for t in data.get("teams", []) if t.get("id") is not None]
+    if not any(t["id"] == team_id for t in teams):
         return {"ok": False, "error": f"Team {team_id} not found"}
-    roster = my_team.get("roster", {}).get("entries", [])
-    imported = 0
-    starts = 0
-    benches = 0
-    irs = 0
-    for e in roster:
-        pinfo = e.get("playerPoolEntry", {}).get("player", {})
-        name = pinfo.get("fullName")
-        pos = POSITION_MAP.get(pinfo.get("defaultPositionId"), None)
-        team_abbr = TEAM_ID_TO_ABBR.get(pinfo.get("proTeamId"))
-        p = get_or_create_player(session, name=name, position=pos, team=team_abbr)
-        # Determine status by lineupSlotId
-        slot = e.get("lineupSlotId")
-        status = RosterStatus.bench
-        if slot in LINEUP_SLOT_STARTERS:
-            status = RosterStatus.start
-            starts += 1
-        elif slot in LINEUP_SLOT_IR:
-            status = RosterStatus.ir
-            irs += 1
-        else:
-            benches += 1
-        rrow = session.exec(select(Roster).where(Roster.player_id == p.id)).first()
-        if not rrow:
-            rrow = Roster(player_id=p.id, status=status, my_team=True)
-            session.add(rrow)
-        else:
-            rrow.status = status
-            rrow.my_team = True
-        imported += 1
-    return {"ok": True, "count": imported, "starts": starts, "bench": benches, "ir": irs}
+    upsert_league_teams(session, [(t["id"], _team_name(t), t.get("abbrev"), t["id"] == team_id) for t in teams], league_id=league_id)
+    resolver = PlayerResolver(session)
+    rows = []
+    mine = {RosterStatus.start: 0, RosterStatus.bench: 0, RosterStatus.ir: 0}
+    for t in teams:
+        for e in t.get("roster", {}).get("entries", []):
+            pinfo = e.get("playerPoolEntry", {}).get("player", {})
+            name = pinfo.get("fullName")
+            if not name:
+                continue
+            pos = POSITION_MAP.get(pinfo.get("defaultPositionId"), None)
+            pid = resolver.resolve(name, position=pos, team=TEAM_ID_TO_ABBR.get(pinfo.get("proTeamId")))
+            status = _slot_status(e.get("lineupSlotId"))
+            if t["id"] == team_id:
+                mine[status] += 1
+            rows.append((pid, status, t["id"] == team_id, t["id"]))
+    rostered = {r[0] for r in rows}
+    bulk_upsert_roster(session, rows, league_id=league_id)
+    dropped = session.execute(delete(Roster).where(Roster.league_id == league_id, Roster.player_id.not_in(rostered)))
+    if dropped.rowcount:
+        mark_dashboard_dirty(session, "roster", league_id=league_id)
+    free_agents = session.exec(select(func.count(Player.id)).where(free_agent_filter(league_id))).one()
+    return {
+        "ok": True,
+        "count": sum(mine.values()),
+        "starts": mine[RosterStatus.start],
+        "bench": mine[RosterStatus.bench],
+        "ir": mine[RosterStatus.ir],
+        "teams": len(teams),
+        "rostered": len(rostered),
+        "free_agents": free_agents,
+    }
 
 
 def fetch_standings() -> list[dict]:
-    settings = get_settings()
-    if not (settings.espn_s2 and settings.swid and settings.league_id):
+    if league_config_error(require_team=False):
         return []
+    settings = get_settings()
     import datetime as _dt
     season = _dt.datetime.utcnow().year
     url = f"https://fantasy.espn.com/apis/v3/games/ffl/seasons/{season}/segments/0/leagues/{settings.league_id}?view=mTeam&view=mStandings"
     cookies = {"espn_s2": settings.espn_s2, "SWID": settings.swid}
-    with httpx.Client(timeout=20, cookies=cookies) as client:
+    with http_client(timeout=20, cookies=cookies) as client:
         r = client.get(url)
         r.raise_for_status()
         data = r.json()
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-from sqlmodel import Session, select
-from backend.app.models import Player
-from ..util import upsert_injury
+from sqlmodel import Session
 
+from backend.app.services import sportsdata
+from backend.app.settings import get_settings
+from ..util import PlayerResolver
 
-def fetch_injuries(session: Session, week: int) -> int:
-    count = 0
-    for p in session.exec(select(Player)).all():
-        upsert_injury(session, p, week, "Active")
-        count += 1
-    return count
 
+def fetch_injuries(session: Session, week: int, resolver: PlayerResolver | None = None) -> int:
+    """Sync the week's injury report; returns how many players' status changed.
+
+    Only non-Active statuses are stored (no row means Active), so without a
+    configured feed there is nothing to write. SportsData.io is the feed wired up.
+    """
+    if not get_settings().sportsdata_api_key:
+        return 0
+    return sportsdata.fetch_injuries(session, week, resolver=resolver)
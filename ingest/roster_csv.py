@@ -0,0 +1,84 @@
+"""
+Bulk roster import from CSV (``name,position,team,status[,my_team][,league_team_id]``).
+
+The body is read with ``csv.DictReader`` row by row, names are resolved against
+one in-memory ``PlayerResolver`` index, and the rosters go out through a single
+``bulk_upsert_roster``, so a whole league (200+ rows) is a handful of statements
+in the caller's transaction. Rows with an unknown position or status, or a name
+that matches no player (unless ``create_missing``), are skipped and reported with
+their line number instead of creating FLEX placeholders.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session
+
+from backend.app.models import DEFAULT_LEAGUE, RosterStatus
+from .util import PlayerResolver, bulk_upsert_roster, upsert_league_teams
+
+
+POSITIONS = {"QB", "RB", "WR", "TE", "K", "DST"}
+POSITION_ALIASES = {"D/ST": "DST", "DEF": "DST", "D": "DST", "PK": "K"}
+TRUE = {"1", "true", "yes", "y", "t"}
+
+
+def _position(raw: str) -> Optional[str]:
+    pos = raw.strip().upper()
+    pos = POSITION_ALIASES.get(pos, pos)
+    return pos if pos in POSITIONS else None
+
+
+def iter_rows(lines: Iterable[str]) -> Iterable[Tuple[int, Dict[str, str]]]:
+    """``(line_no, row)`` with lowercased, stripped keys and values; blank lines skipped."""
+    reader = csv.DictReader(lines, skipinitialspace=True)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [(h or "").strip().lower() for h in reader.fieldnames]
+    for row in reader:
+        values = {k: (v or "").strip() for k, v in row.items() if k}
+        if any(values.values()):
+            yield reader.line_num, values
+
+
+def import_roster_csv(
+    session: Session, body: str | Iterable[str], create_missing: bool = False, league_id: int = DEFAULT_LEAGUE
+) -> Dict[str, Any]:
+    """Validate and upsert roster rows into ``league_id``'s roster; does not commit."""
+    lines = io.StringIO(body) if isinstance(body, str) else body
+    resolver = PlayerResolver(session)
+    rows: List[Tuple[int, RosterStatus, bool, Optional[int]]] = []
+    errors: List[Dict[str, Any]] = []
+    created = 0
+    for line_no, row in iter_rows(lines):
+        name = row.get("name", "")
+        pos = _position(row.get("position", ""))
+        status = (row.get("status") or "bench").lower()
+        pid = resolver.lookup(name) if name else None
+        error = None
+        if not name:
+            error = "missing name"
+        elif pos is None:
+            error = f"unknown position {row.get('position', '')!r}"
+        elif status not in RosterStatus.__members__:
+            error = f"unknown status {status!r}"
+        elif not (row.get("league_team_id") or "0").isdigit():
+            error = f"bad league_team_id {row['league_team_id']!r}"
+        elif pid is None and not create_missing:
+            error = "no matching player"
+        if error:
+            errors.append({"line": line_no, "name": name, "error": error})
+            continue
+        created += pid is None
+        # resolve() also fills a stored FLEX position / missing team from the CSV
+        pid = resolver.resolve(name, position=pos, team=row.get("team", "").upper() or None)
+        mine = row["my_team"].lower() in TRUE if row.get("my_team") else True
+        league_team = int(row["league_team_id"]) if row.get("league_team_id") else None
+        rows.append((pid, RosterStatus(status), mine, league_team))
+    league_teams = {r[3] for r in rows if r[3] is not None}
+    upsert_league_teams(session, [(t, f"Team {t}", None, False) for t in sorted(league_teams)], overwrite=False, league_id=league_id)
+    count = bulk_upsert_roster(session, rows, league_id=league_id)
+    return {"ok": True, "count": count, "created": created, "rejected": len(errors), "errors": errors}
@@ -0,0 +1,216 @@
+"""
+Targeted HTML table parsing for provider pages.
+
+Provider pages carry one table we care about plus plenty of navigation markup.
+Rather than materialising every table as a DataFrame (``pd.read_html``) and walking
+it with ``iterrows``, ``iter_table`` streams the document through lxml's
+``iterparse`` and yields text tuples for the first matching table only, dropping
+parsed rows as it goes; ``iter_tables`` does the same for every matching table.
+Name/team cleanup runs in batch with precompiled regexes.
+"""
+
+from __future__ import annotations
+
+import itertools
+import re
+from io import BytesIO
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from lxml import etree
+
+
+_WS = re.compile(r"\s+")
+_PAREN_SUFFIX = re.compile(r"\s*\(.*\)$")
+_TRAILING_TEAM = re.compile(r"\s+(?:[A-Z]{2,3}|D\/ST|DST)$")
+_NAME_SUFFIX = re.compile(r"\b(JR|SR|II|III|IV|V)\.?$", re.IGNORECASE)
+_PAREN_TEAM = re.compile(r"\(([^)]+)\)$")
+_TRAILING_TEAM_TOKEN = re.compile(r"\s([A-Z]{2,3}|D\/ST|DST)$")
+_TEAM_PREFIX = re.compile(r"([A-Z]{2,3})")
+
+ColumnPicker = Callable[[List[str]], Optional[int]]
+
+
+def _cell_text(el) -> str:
+    return _WS.sub(" ", "".join(el.itertext())).strip()
+
+
+def iter_table(
+    source: str | bytes,
+    table_id: str | None = None,
+    index: int = 0,
+    where: Callable[[Tuple[str, ...]], bool] | None = None,
+) -> Iterator[Tuple[str, ...]]:
+    """Yield the header row, then every body row, of one table as text tuples.
+
+    The table is picked by ``id`` when given, by a predicate on its (uppercased)
+    header when ``where`` is given, otherwise by position in the document. Rows in
+    ``<thead>`` or made only of ``<th>`` form the header; with multi-row headers the
+    last one wins (it carries the specific labels, e.g. ``FPTS`` under a ``MISC``
+    group). An empty tuple is yielded as header when the table has none. Parsing
+    stops as soon as the chosen table closes.
+    """
+    for _, row in _scan(source, table_id, index, where, first_only=True):
+        yield row
+
+
+def iter_tables(source: str | bytes, where: Callable[[Tuple[str, ...]], bool] | None = None) -> Iterator[List[Tuple[str, ...]]]:
+    """Every top-level table whose header passes ``where`` (all of them without it),
+    in document order, each as a list of rows with the header first (see ``iter_table``)."""
+    for _, rows in itertools.groupby(_scan(source, None, 0, where, first_only=False), key=lambda t: t[0]):
+        yield [row for _, row in rows]
+
+
+def _scan(
+    source: str | bytes,
+    table_id: str | None,
+    index: int,
+    where: Callable[[Tuple[str, ...]], bool] | None,
+    first_only: bool,
+) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+    # Yields (n-th matched table, row); stops after the first table when first_only
+    data = source.encode("utf-8") if isinstance(source, str) else source
+    matched = 0
+    seen = -1
+    depth = 0
+    rejected = False
+    header: Tuple[str, ...] | None = None
+    header_sent = False
+    for event, el in etree.iterparse(BytesIO(data), events=("start", "end"), html=True, recover=True):
+        tag = el.tag if isinstance(el.tag, str) else ""
+        if event == "start":
+            if tag != "table":
+                continue
+            if depth:
+                depth += 1
+                continue
+            seen += 1
+            if table_id is not None:
+                picked = el.get("id") == table_id
+            else:
+                picked = where is not None or not first_only or seen == index
+            if picked:
+                depth, rejected, header, header_sent = 1, False, None, False
+            continue
+        if not depth or rejected:
+            if tag == "table" and depth:
+                depth -= 1
+            # Not inside the target table: free the subtree right away
+            el.clear()
+            continue
+        if tag == "table":
+            depth -= 1
+            if depth == 0:
+                if where is not None and not header_sent and not where(header or ()):
+                    continue
+                if not header_sent:
+                    yield matched, header or ()
+                if first_only:
+                    return
+                matched += 1
+            continue
+        if tag != "tr" or depth != 1:
+            continue
+        cells = [c for c in el if isinstance(c.tag, str) and c.tag in ("td", "th")]
+        parent = el.getparent()
+        in_thead = parent is not None and parent.tag == "thead"
+        if cells and (in_thead or all(c.tag == "th" for c in cells)) and not header_sent:
+            header = tuple(_cell_text(c).upper() for c in cells)
+        elif cells:
+            if not header_sent:
+                if where is not None and not where(header or ()):
+                    # Wrong table: skip the rest of it and keep scanning
+                    rejected = True
+                    el.clear()
+                    continue
+                yield matched, header or ()
+                header_sent = True
+            yield matched, tuple(_cell_text(c) for c in cells)
+        # Drop the processed row and anything parsed before it
+        el.clear()
+        while el.getprevious() is not None and parent is not None:
+            del parent[0]
+    if depth and not rejected and not header_sent:
+        yield matched, header or ()
+
+
+def column(*names: str, contains: Sequence[str] = (), default: int | None = None) -> ColumnPicker:
+    """Build a picker matching a header by exact name first, then by substring."""
+
+    def pick(header: List[str]) -> Optional[int]:
+        for i, h in enumerate(header):
+            if h in names:
+                return i
+        for i, h in enumerate(header):
+            if any(c in h for c in contains):
+                return i
+        return default
+
+    return pick
+
+
+def select_columns(rows: Iterable[Tuple[str, ...]], *pickers: ColumnPicker, required: Sequence[int] = ()) -> Iterator[Tuple[str, ...]]:
+    """Project rows from ``iter_table`` onto the picked columns.
+
+    Missing optional columns come back as empty strings; if any picker listed in
+    ``required`` (by position) finds nothing, no rows are yielded.
+    """
+    it = iter(rows)
+    header = list(next(it, ()))
+    idx = [p(header) for p in pickers]
+    if any(idx[r] is None for r in required):
+        return
+    for row in it:
+        n = len(row)
+        yield tuple((row[i] if i is not None and i < n else "") for i in idx)
+
+
+def clean_names(raws: Iterable[str]) -> List[str]:
+    """Strip team tags and suffixes ("Josh Allen BUF", "Odell Beckham Jr. (MIA)")."""
+    out: List[str] = []
+    for s in raws:
+        s = _PAREN_SUFFIX.sub("", s).strip()
+        s = _TRAILING_TEAM.sub("", s)
+        out.append(_NAME_SUFFIX.sub("", s).strip())
+    return out
+
+
+def extract_team(name_text: str, row_team: Optional[str] = None) -> Optional[str]:
+    # Prefer explicit team column
+    t = row_team.strip().upper() if row_team else None
+    if t and len(t) <= 3 and t.isalpha():
+        return t
+    # Try parentheses in name e.g., "Player (KC)"
+    m = _PAREN_TEAM.search(name_text)
+    if m:
+        tt = m.group(1).strip().upper()
+        if 2 <= len(tt) <= 3 and tt.isalpha():
+            return tt
+    # Try trailing team token e.g., "Player KC"
+    m2 = _TRAILING_TEAM_TOKEN.search(name_text.strip())
+    if m2:
+        tt = m2.group(1).upper()
+        return "DST" if tt in ("DST", "D/ST") else tt
+    return None
+
+
+def extract_teams(raws: Sequence[str], row_teams: Optional[Sequence[str]] = None) -> List[Optional[str]]:
+    if row_teams is None:
+        return [extract_team(r) for r in raws]
+    return [extract_team(r, t) for r, t in zip(raws, row_teams)]
+
+
+def norm_teams(raws: Iterable[str]) -> List[str]:
+    """Reduce team cells like "KC Kansas City" to the leading abbreviation."""
+    out: List[str] = []
+    for t in raws:
+        t = (t or "").strip().upper()
+        m = _TEAM_PREFIX.match(t)
+        out.append(m.group(1) if m else t)
+    return out
+
+
+def to_float(value: str) -> Optional[float]:
+    try:
+        return float(value.replace(",", ""))
+    except (AttributeError, ValueError):
+        return None
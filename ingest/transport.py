@@ -0,0 +1,253 @@
+"""
+HTTP client factory with offline record/replay.
+
+Every provider builds its clients through ``http_client`` / ``async_http_client``.
+Normally those are plain httpx clients. Two extra modes exist:
+
+- record: real responses are captured into a fixture directory
+  (``HTTP_RECORD_DIR`` or ``use_recording``);
+- replay: responses are served from that directory with no network at all
+  (``HTTP_REPLAY_DIR`` or ``use_replay``), optionally with added latency and
+  injected failures for benchmarks.
+
+A fixture directory holds ``index.json``::
+
+    {"ignore_params": ["start", "end"],
+     "responses": {"GET https://host/path?a=1": {"status": 200,
+                   "headers": {"content-type": "text/html"}, "body": "bodies/host/x.html"}}}
+
+``body`` is a path relative to the directory. Query params listed in
+``ignore_params`` (e.g. time windows computed from ``utcnow``) are dropped from
+the lookup key so replays stay deterministic.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+from backend.app.settings import get_settings
+
+
+DEFAULT_IGNORE_PARAMS = ("start", "end")
+_EXT = {"text/html": ".html", "application/json": ".json", "text/plain": ".txt"}
+# Headers that describe the wire encoding, not the decoded body we store
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def request_key(method: str, url: str, ignore_params: tuple | list = DEFAULT_IGNORE_PARAMS) -> str:
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in ignore_params)
+    return f"{method.upper()} " + urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _stored_headers(headers: httpx.Headers) -> Dict[str, str]:
+    return {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS and k.lower() != "set-cookie"}
+
+
+class FixtureStore:
+    """Read/write access to a fixture directory's ``index.json`` and body files."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        index_path = self.root / "index.json"
+        data = json.loads(index_path.read_text()) if index_path.exists() else {}
+        self.ignore_params = tuple(data.get("ignore_params", DEFAULT_IGNORE_PARAMS))
+        self.responses: Dict[str, Dict[str, Any]] = data.get("responses", {})
+
+    def key(self, request: httpx.Request) -> str:
+        return request_key(request.method, str(request.url), self.ignore_params)
+
+    def lookup(self, request: httpx.Request) -> Optional[httpx.Response]:
+        entry = self.responses.get(self.key(request))
+        if entry is None:
+            return None
+        body = (self.root / entry["body"]).read_bytes() if entry.get("body") else b""
+        return httpx.Response(entry.get("status", 200), headers=entry.get("headers", {}), content=body, request=request)
+
+    def save(self, request: httpx.Request, response: httpx.Response, content: bytes) -> None:
+        key = self.key(request)
+        ctype = response.headers.get("content-type", "").split(";")[0].strip()
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        rel = Path("bodies") / (request.url.host or "local") / f"{digest}{_EXT.get(ctype, '.bin')}"
+        with self._lock:
+            (self.root / rel).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / rel).write_bytes(content)
+            self.responses[key] = {"status": response.status_code, "headers": _stored_headers(response.headers), "body": rel.as_posix()}
+            index = {"ignore_params": list(self.ignore_params), "responses": dict(sorted(self.responses.items()))}
+            (self.root / "index.json").write_text(json.dumps(index, indent=2) + "\n")
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Serve recorded responses; unknown requests get a 404 (or raise when ``strict``).
+
+    ``latency_ms`` delays every response; ``error_rate`` of requests fail with
+    ``error_status`` (or a connection error when ``error_status`` is 0). The RNG is
+    seeded so error injection is repeatable.
+    """
+
+    def __init__(self, root: str | Path, latency_ms: float = 0.0, error_rate: float = 0.0, error_status: int = 503, strict: bool = False, seed: int = 0):
+        self.store = FixtureStore(root)
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: List[str] = []
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests.append(self.store.key(request))
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if fail:
+            if not self.error_status:
+                raise httpx.ConnectError("injected connection error", request=request)
+            return httpx.Response(self.error_status, text="injected error", request=request)
+        response = self.store.lookup(request)
+        if response is None:
+            if self.strict:
+                raise httpx.ConnectError(f"no recorded response for {self.store.key(request)}", request=request)
+            return httpx.Response(404, text="not recorded", request=request)
+        return response
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(request)
+
+
+class RecordingTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Pass requests to the real transport and save each response to the fixture store."""
+
+    def __init__(self, root: str | Path, inner: Any = None, inner_async: Any = None):
+        Path(root).mkdir(parents=True, exist_ok=True)
+        self.store = FixtureStore(root)
+        self._inner = inner or httpx.HTTPTransport()
+        self._inner_async = inner_async or (inner if isinstance(inner, httpx.AsyncBaseTransport) else httpx.AsyncHTTPTransport())
+
+    def _rebuild(self, request: httpx.Request, response: httpx.Response, content: bytes) -> httpx.Response:
+        self.store.save(request, response, content)
+        return httpx.Response(response.status_code, headers=_stored_headers(response.headers), content=content, request=request)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._inner.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        return self._rebuild(request, response, content)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._inner_async.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        return self._rebuild(request, response, content)
+
+
+_override: Any = None
+_from_env: Any = None
+_env_lock = threading.Lock()
+_shared: Optional[Dict[str, httpx.Client]] = None
+_shared_lock = threading.Lock()
+
+
+class _SharedClient(httpx.Client):
+    """Pooled client handed out inside ``shared_clients``; ``with`` blocks leave it open."""
+
+    def __enter__(self) -> "_SharedClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+def _active_transport() -> Any:
+    global _from_env
+    if _override is not None:
+        return _override
+    settings = get_settings()
+    if not (settings.http_replay_dir or settings.http_record_dir):
+        return None
+    with _env_lock:
+        if _from_env is None:
+            if settings.http_replay_dir:
+                _from_env = ReplayTransport(settings.http_replay_dir, latency_ms=settings.http_replay_latency_ms, error_rate=settings.http_replay_error_rate)
+            else:
+                _from_env = RecordingTransport(settings.http_record_dir)
+    return _from_env
+
+
+def http_client(**kwargs: Any) -> httpx.Client:
+    transport = _active_transport()
+    if transport is not None:
+        kwargs["transport"] = transport
+    if _shared is not None and set(kwargs) <= {"timeout", "transport"}:
+        # Plain clients (no auth headers/cookies/base_url) are safe to share
+        key = repr(sorted(kwargs.items(), key=lambda kv: kv[0]))
+        with _shared_lock:
+            client = _shared.get(key)
+            if client is None:
+                client = _shared[key] = _SharedClient(**kwargs)
+        return client
+    return httpx.Client(**kwargs)
+
+
+def async_http_client(**kwargs: Any) -> httpx.AsyncClient:
+    transport = _active_transport()
+    if transport is not None:
+        kwargs["transport"] = transport
+    return httpx.AsyncClient(**kwargs)
+
+
+@contextmanager
+def shared_clients() -> Iterator[None]:
+    """Reuse one connection pool per client configuration for every ``http_client()``
+    made inside the block, across threads. Used by multi-week backfills so each week
+    does not reopen connections to the same hosts."""
+    global _shared
+    previous = _shared
+    _shared = {}
+    try:
+        yield
+    finally:
+        clients, _shared = _shared, previous
+        for client in clients.values():
+            httpx.Client.close(client)
+
+
+@contextmanager
+def use_transport(transport: Any) -> Iterator[Any]:
+    global _override
+    previous = _override
+    _override = transport
+    try:
+        yield transport
+    finally:
+        _override = previous
+
+
+def use_replay(root: str | Path, **kwargs: Any):
+    return use_transport(ReplayTransport(root, **kwargs))
+
+
+def use_recording(root: str | Path, **kwargs: Any):
+    return use_transport(RecordingTransport(root, **kwargs))
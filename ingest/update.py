@@ -1,31 +1,164 @@
+"""
+Ingest CLI.
+
+    python -m ingest.update --week 3
+    python -m ingest.update --weeks 1-18 --workers 4
+    python -m ingest.update --weeks 1,2,5-7 --sources fantasypros,espn,adp
+
+Season-wide sources (ADP, DvP) run once up front; week sources then run for every
+requested week on a bounded thread pool. Each week uses its own session and commits
+in one transaction, with a savepoint per source: a failing provider rolls back
+only its own writes and the rest of the week still commits. The HTTP connection
+pools and the player name index are shared across weeks. A per-week/per-source
+timing and row-count table, followed by any source errors, is printed at the end.
+
+SQLite allows a single writer, so there weeks run one at a time and each week
+resolves players inside its own transaction.
+"""
+
 from __future__ import annotations
 
 import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
 from sqlmodel import Session
 
 from backend.app.db import engine
 from ingest.providers import espn, fantasypros, injuries, adp, yahoo
 from ingest.providers import dvp
+from ingest.transport import shared_clients
+from ingest.util import PlayerResolver
 from backend.app.services import sportsdata as sportsdata
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--week", type=int, required=True)
-    args = parser.parse_args()
-    week = args.week
+WEEK_SOURCES: Dict[str, Callable[[Session, int, Optional[PlayerResolver]], int]] = {
+    "fantasypros": lambda s, w, r: fantasypros.fetch_projections(s, w, resolver=r),
+    "espn": lambda s, w, r: espn.fetch_projections(s, w),
+    "sportsdata": lambda s, w, r: sportsdata.fetch_projections(s, w, resolver=r),
+    "yahoo": lambda s, w, r: yahoo.fetch_projections(s, w),
+    "injuries": lambda s, w, r: injuries.fetch_injuries(s, w, resolver=r),
+    "actuals": lambda s, w, r: sportsdata.fetch_actual_points(s, w, resolver=r),
+}
+
+SEASON_SOURCES: Dict[str, Callable[[Session, Optional[PlayerResolver]], int]] = {
+    "adp": lambda s, r: adp.fetch_adp(s, resolver=r),
+    "espn_adp": lambda s, r: espn.fetch_adp(s, resolver=r),
+    "dvp": lambda s, r: dvp.fetch_dvp(s),
+}
+
+# (rows or None on error, seconds, error message or None)
+Result = Tuple[int | None, float, str | None]
+
+
+def parse_weeks(spec: str) -> List[int]:
+    """``"1-18"``, ``"3"`` or ``"1,2,5-7"`` -> sorted unique week numbers."""
+    weeks = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        start, end = int(lo), int(hi or lo)
+        if start < 1 or end < start:
+            raise argparse.ArgumentTypeError(f"bad week range: {part}")
+        weeks.update(range(start, end + 1))
+    if not weeks:
+        raise argparse.ArgumentTypeError("no weeks given")
+    return sorted(weeks)
+
+
+def parse_sources(spec: str) -> List[str]:
+    names = [s.strip() for s in spec.split(",") if s.strip()]
+    unknown = [n for n in names if n not in WEEK_SOURCES and n not in SEASON_SOURCES]
+    if unknown:
+        known = ", ".join([*WEEK_SOURCES, *SEASON_SOURCES])
+        raise argparse.ArgumentTypeError(f"unknown source(s) {', '.join(unknown)}; known: {known}")
+    return names
+
+
+def _timed(session: Session, fn: Callable[[], int]) -> Result:
+    # One failing provider should not sink the whole backfill: its savepoint is
+    # rolled back and the error goes into the summary
+    t0 = time.perf_counter()
+    try:
+        with session.begin_nested():
+            rows = fn()
+    except Exception as e:
+        return None, time.perf_counter() - t0, f"{e.__class__.__name__}: {e}"
+    return rows, time.perf_counter() - t0, None
+
+
+def run_season_sources(sources: Sequence[str], resolver: PlayerResolver | None) -> Dict[str, Result]:
+    results: Dict[str, Result] = {}
+    with Session(engine) as session:
+        for name in sources:
+            results[name] = _timed(session, lambda: SEASON_SOURCES[name](session, resolver))
+        session.commit()
+    return results
+
+
+def run_week(week: int, sources: Sequence[str], resolver: PlayerResolver | None) -> Dict[str, Result]:
+    results: Dict[str, Result] = {}
     with Session(engine) as session:
-        # Pull projections from FantasyPros (public); ESPN projections are optional placeholder
-        c2 = fantasypros.fetch_projections(session, week)
-        c1 = espn.fetch_projections(session, week)
-        c_sd = sportsdata.fetch_projections(session, week)
-        c_yh = yahoo.fetch_projections(session, week)
-        c3 = injuries.fetch_injuries(session, week)
-        c4 = adp.fetch_adp(session)
-        c5 = espn.fetch_adp(session)
-        c6 = dvp.fetch_dvp(session)
+        for name in sources:
+            results[name] = _timed(session, lambda: WEEK_SOURCES[name](session, week, resolver))
         session.commit()
-        print(f"Ingest complete. espn_proj {c1}, fantasypros_proj {c2}, sportsdata_proj {c_sd}, yahoo_proj {c_yh}, injuries {c3}, fp_adp {c4}, espn_adp {c5}, dvp {c6}")
+    return results
+
+
+def format_summary(rows: Dict[str, Dict[str, Result]], sources: Sequence[str]) -> str:
+    """Render ``{label: {source: (rows, secs, error)}}`` as a fixed-width table,
+    with the error of every ``ERR`` cell listed below it."""
+    def cell(res: Result | None) -> str:
+        if res is None:
+            return "-"
+        count, secs, _ = res
+        return f"{'ERR' if count is None else count} / {secs:.2f}s"
+
+    header = ["week", *sources, "total"]
+    body = []
+    for label, results in rows.items():
+        total = sum(secs for _, secs, _ in results.values())
+        body.append([label, *(cell(results.get(s)) for s in sources), f"{total:.2f}s"])
+    widths = [max(len(r[i]) for r in [header, *body]) for i in range(len(header))]
+    lines = ["  ".join(h.ljust(w) for h, w in zip(header, widths)), "  ".join("-" * w for w in widths)]
+    lines += ["  ".join(c.ljust(w) for c, w in zip(r, widths)) for r in body]
+    errors = [f"  {label} {source}: {res[2]}" for label, results in rows.items() for source, res in results.items() if res[2]]
+    if errors:
+        lines += ["", "Errors:", *errors]
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Ingest projections, injuries, ADP and DvP")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--week", type=int)
+    group.add_argument("--weeks", type=parse_weeks, help="e.g. 1-18 or 1,3,5-7")
+    parser.add_argument("--sources", type=parse_sources, default=None, help="comma list; default all")
+    parser.add_argument("--workers", type=int, default=4, help="weeks ingested concurrently")
+    args = parser.parse_args(argv)
+    weeks = args.weeks or [args.week]
+    sources = args.sources or [*WEEK_SOURCES, *SEASON_SOURCES]
+    week_sources = [s for s in sources if s in WEEK_SOURCES]
+    season_sources = [s for s in sources if s in SEASON_SOURCES]
+
+    sqlite = engine.dialect.name == "sqlite"
+    workers = 1 if sqlite else max(1, min(args.workers, len(weeks)))
+    started = time.perf_counter()
+    summary: Dict[str, Dict[str, Result]] = {}
+    with shared_clients():
+        resolver = None if sqlite else PlayerResolver.shared(engine)
+        if season_sources:
+            summary["season"] = run_season_sources(season_sources, resolver)
+        if week_sources:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                per_week = pool.map(lambda w: run_week(w, week_sources, resolver), weeks)
+                for week, results in zip(weeks, per_week):
+                    summary[str(week)] = results
+    print(format_summary(summary, [*week_sources, *season_sources]))
+    print(f"Ingest complete: {len(weeks)} week(s) in {time.perf_counter() - started:.2f}s")
 
 
 if __name__ == "__main__":
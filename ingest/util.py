@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from typing import Iterable
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
 import re
+import threading
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, select
-from sqlalchemy import func
-from backend.app.models import Player, Projection, Injury, ADP
+from sqlalchemy import func, insert, update
+from backend.app.models import DEFAULT_LEAGUE, ActualPoints, Player, Projection, Injury, ADP, DVP, LeagueTeam, Roster, RosterStatus
+from backend.app.services.changes import record_change
+from backend.app.services.dashboard import mark_dashboard_dirty
+from backend.app.services.projection_history import append_history
 
 
 def _normalize_name(name: str) -> str:
@@ -39,24 +46,87 @@ def get_or_create_player(session: Session, name: str, position: str | None = Non
     return p
 
 
-def upsert_projection(session: Session, player: Player, week: int, source: str, expected: float, stdev: float | None = None) -> None:
+def upsert_projection(session: Session, player: Player, week: int, source: str, expected: float, stdev: float | None = None) -> bool:
+    """Insert or update one projection; returns True when the stored value changed."""
     row = session.exec(select(Projection).where(Projection.player_id == player.id, Projection.week == week, Projection.source == source)).first()
     if not row:
-        row = Projection(player_id=player.id, week=week, source=source, expected=expected, stdev=stdev)
-        session.add(row)
-    else:
-        row.expected = expected
-        row.stdev = stdev
+        session.add(Projection(player_id=player.id, week=week, source=source, expected=expected, stdev=stdev))
+    elif not _apply_projection(row, expected, stdev):
+        return False
+    append_history(session, week, source, [(player.id, expected, stdev)])
+    return True
 
 
-def upsert_injury(session: Session, player: Player, week: int, status: str, note: str | None = None) -> None:
-    row = session.exec(select(Injury).where(Injury.player_id == player.id, Injury.week == week)).first()
-    if not row:
-        row = Injury(player_id=player.id, week=week, status=status, note=note)
-        session.add(row)
+def _apply_projection(row: Projection, expected: float, stdev: float | None) -> bool:
+    # updated_at only moves when the value does: incremental blending keys off it
+    if row.expected == expected and row.stdev == stdev:
+        return False
+    row.expected = expected
+    row.stdev = stdev
+    row.updated_at = datetime.utcnow()
+    return True
+
+
+# Statuses that mean "no injury": these are never stored, a missing row reads as Active
+DEFAULT_INJURY_STATUSES = {"", "active", "healthy", "none"}
+
+
+def is_default_injury(status: str | None) -> bool:
+    return (status or "").strip().lower() in DEFAULT_INJURY_STATUSES
+
+
+def _apply_injury(session: Session, row: Optional[Injury], player_id: int, week: int, status: str | None, note: str | None) -> bool:
+    """Bring one player's injury row in line with ``status``/``note``; logs and returns True on change."""
+    old_status = None if row is None else row.status
+    if is_default_injury(status):
+        if row is None:
+            return False
+        session.delete(row)
+        if is_default_injury(old_status):
+            return False  # leftover "Active" row from the old full rewrites: dropped silently
+        record_change(session, "injury", week=week, player_id=player_id, old=old_status, new="Active", note=None)
+        return True
+    if row is not None and row.status == status and row.note == note:
+        return False
+    if row is None:
+        session.add(Injury(player_id=player_id, week=week, status=status, note=note))
     else:
         row.status = status
         row.note = note
+        row.updated_at = datetime.utcnow()
+    record_change(session, "injury", week=week, player_id=player_id, old=old_status or "Active", new=status, note=note)
+    return True
+
+
+def upsert_injury(session: Session, player: Player, week: int, status: str, note: str | None = None) -> bool:
+    """Set one player's status; default statuses delete the row. Returns True when something changed."""
+    row = session.exec(select(Injury).where(Injury.player_id == player.id, Injury.week == week)).first()
+    return _apply_injury(session, row, player.id, week, status, note)
+
+
+def sync_injuries(session: Session, week: int, rows: Iterable[Tuple[int, Optional[str], Optional[str]]], complete: bool = True) -> int:
+    """Diff ``(player_id, status, note)`` rows against the week's stored injuries.
+
+    Only rows whose status or note differ are written, each with an ``injury``
+    change event. With ``complete=True`` the input is the whole injury report, so
+    stored players missing from it are back to Active and their rows are removed.
+    Returns the number of players whose injury state changed.
+    """
+    existing: Dict[int, Injury] = {r.player_id: r for r in session.exec(select(Injury).where(Injury.week == week)).all()}
+    seen = set()
+    changed = 0
+    for pid, status, note in rows:
+        if pid in seen:
+            continue  # first entry per player wins
+        seen.add(pid)
+        changed += _apply_injury(session, existing.get(pid), pid, week, status, note)
+    if complete:
+        for pid, row in existing.items():
+            if pid not in seen:
+                changed += _apply_injury(session, row, pid, week, None, None)
+    if changed:
+        mark_dashboard_dirty(session, "injury", week=week)
+    return changed
 
 
 def upsert_adp(session: Session, player: Player, source: str, rank: float) -> None:
@@ -66,3 +136,234 @@ def upsert_adp(session: Session, player: Player, source: str, rank: float) -> No
         session.add(row)
     else:
         row.rank = rank
+
+
+class PlayerResolver:
+    """In-memory name index over ``Player`` for resolving a whole page of rows.
+
+    Same matching rules as ``get_or_create_player`` (exact name, then lowercased
+    name against the normalized input) but the table is read once up front instead
+    of issuing one or two SELECTs per row. ``resolve`` returns player ids.
+
+    ``PlayerResolver.shared(engine)`` builds one resolver that several threads (each
+    with its own session) can use at once: player inserts and position/team fills
+    then go through a short session of their own and are committed right away, so
+    every caller's transaction can see and reference them.
+    """
+
+    def __init__(self, session: Session, engine: Engine | None = None):
+        self.session = session
+        self._engine = engine
+        self._lock = threading.RLock()
+        self._exact: Dict[str, int] = {}
+        self._lower: Dict[str, int] = {}
+        self._meta: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        for pid, name, position, team in session.exec(select(Player.id, Player.name, Player.position, Player.team)).all():
+            self._index(pid, name, position, team)
+
+    @classmethod
+    def shared(cls, engine: Engine) -> "PlayerResolver":
+        with Session(engine) as session:
+            return cls(session, engine=engine)
+
+    def _index(self, pid: int, name: str, position: Optional[str], team: Optional[str]) -> None:
+        self._exact.setdefault(name, pid)
+        self._lower.setdefault(name.lower(), pid)
+        self._meta[pid] = (position, team)
+
+    def _lookup(self, name: str) -> Optional[int]:
+        pid = self._exact.get(name)
+        if pid is None:
+            pid = self._lower.get(_normalize_name(name))
+        return pid
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Player id for ``name`` without creating one."""
+        return self._lookup(name)
+
+    def _writer(self):
+        return nullcontext(self.session) if self._engine is None else Session(self._engine)
+
+    def _commit(self, session: Session) -> None:
+        if self._engine is None:
+            session.flush()
+        else:
+            session.commit()
+
+    def resolve(self, name: str, position: str | None = None, team: str | None = None) -> int:
+        pid = self._lookup(name)
+        if pid is not None:
+            cur_pos, cur_team = self._meta[pid]
+            if not (position and (not cur_pos or cur_pos == "FLEX")) and not (team and not cur_team):
+                return pid
+        with self._lock:
+            # Re-check under the lock: another thread may have just created/filled it
+            pid = self._lookup(name)
+            if pid is None:
+                with self._writer() as s:
+                    p = Player(name=name, position=(position or "FLEX"), team=team)
+                    s.add(p)
+                    self._commit(s)
+                    self._index(p.id, p.name, p.position, p.team)
+                    return p.id
+            cur_pos, cur_team = self._meta[pid]
+            fill_pos = bool(position and (not cur_pos or cur_pos == "FLEX"))
+            fill_team = bool(team and not cur_team)
+            if fill_pos or fill_team:
+                # Rare path: only players still missing position/team are touched
+                with self._writer() as s:
+                    p = s.get(Player, pid)
+                    if fill_pos:
+                        p.position = position
+                    if fill_team:
+                        p.team = team
+                    self._meta[pid] = (p.position, p.team)
+                    self._commit(s)
+        return pid
+
+
+def bulk_upsert_projections(session: Session, week: int, source: str, rows: Iterable[Tuple[int, float, Optional[float]]]) -> int:
+    """Upsert ``(player_id, expected, stdev)`` rows for one week/source with a single SELECT.
+
+    Rows whose value is unchanged are left alone, ``updated_at`` included, so it
+    records when each player's value last changed for the week/source. New and
+    changed values are also appended to the projection history in one INSERT.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    existing: Dict[int, Projection] = {
+        r.player_id: r for r in session.exec(select(Projection).where(Projection.week == week, Projection.source == source)).all()
+    }
+    changed = []
+    for pid, expected, stdev in rows:
+        row = existing.get(pid)
+        if row is None:
+            row = Projection(player_id=pid, week=week, source=source, expected=expected, stdev=stdev)
+            session.add(row)
+            existing[pid] = row
+            changed.append((pid, expected, stdev))
+        elif _apply_projection(row, expected, stdev):
+            changed.append((pid, expected, stdev))
+    if changed:
+        append_history(session, week, source, changed)
+        # VORP (waiver/trade cards and cached reads) uses every source's rows
+        mark_dashboard_dirty(session, "projection", week=week)
+    return len(rows)
+
+
+def bulk_upsert_adp(session: Session, source: str, rows: Iterable[Tuple[int, float]]) -> int:
+    rows = list(rows)
+    if not rows:
+        return 0
+    existing: Dict[int, ADP] = {r.player_id: r for r in session.exec(select(ADP).where(ADP.source == source)).all()}
+    for pid, rank in rows:
+        row = existing.get(pid)
+        if row is None:
+            row = ADP(player_id=pid, source=source, rank=rank)
+            session.add(row)
+            existing[pid] = row
+        else:
+            row.rank = rank
+    return len(rows)
+
+
+def bulk_upsert_actuals(session: Session, season: int, week: int, rows: Iterable[Tuple[int, float]]) -> int:
+    """Upsert ``(player_id, points)`` for one season/week; the last row per player wins.
+
+    One SELECT, then one executemany INSERT and one executemany UPDATE.
+    """
+    latest = dict(rows)
+    if not latest:
+        return 0
+    existing = {
+        pid: (rid, points)
+        for rid, pid, points in session.exec(
+            select(ActualPoints.id, ActualPoints.player_id, ActualPoints.points).where(ActualPoints.season == season, ActualPoints.week == week)
+        ).all()
+    }
+    now = datetime.utcnow()
+    inserts = [{"season": season, "week": week, "player_id": pid, "points": pts, "updated_at": now} for pid, pts in latest.items() if pid not in existing]
+    updates = [{"id": existing[pid][0], "points": pts, "updated_at": now} for pid, pts in latest.items() if pid in existing and existing[pid][1] != pts]
+    if inserts:
+        session.execute(insert(ActualPoints), inserts)
+    if updates:
+        session.execute(update(ActualPoints), updates)
+    return len(latest)
+
+
+def bulk_upsert_dvp(session: Session, position: str, rows: Iterable[Tuple[str, Optional[int], Optional[float]]]) -> int:
+    """Upsert ``(team, rank, fp_allowed)`` rows for one position."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    existing: Dict[str, DVP] = {d.team: d for d in session.exec(select(DVP).where(DVP.position == position)).all()}
+    for team, rank, fp in rows:
+        dvp = existing.get(team)
+        if dvp is None:
+            dvp = DVP(team=team, position=position)
+            session.add(dvp)
+            existing[team] = dvp
+        dvp.rank = rank
+        dvp.fp_allowed = fp
+    mark_dashboard_dirty(session, "dvp")
+    return len(rows)
+
+
+def bulk_upsert_roster(
+    session: Session, rows: Iterable[Tuple[int, RosterStatus, bool, Optional[int]]], league_id: int = DEFAULT_LEAGUE
+) -> int:
+    """Upsert ``(player_id, status, my_team, league_team_id)`` rows into ``league_id``'s
+    roster; the last row per player wins.
+
+    One SELECT, then one executemany INSERT and one executemany UPDATE (ORM bulk
+    mode, no per-row RETURNING), whatever the number of rows.
+    """
+    latest = {pid: tuple(rest) for pid, *rest in rows}
+    if not latest:
+        return 0
+    existing: Dict[int, Tuple[int, tuple]] = {
+        pid: (rid, tuple(values))
+        for rid, pid, *values in session.exec(
+            select(Roster.id, Roster.player_id, Roster.status, Roster.my_team, Roster.league_team_id)
+            .where(Roster.league_id == league_id, Roster.player_id.in_(list(latest)))
+        ).all()
+    }
+    fields = ("status", "my_team", "league_team_id")
+    inserts = [{"league_id": league_id, "player_id": pid, **dict(zip(fields, v))} for pid, v in latest.items() if pid not in existing]
+    updates = [
+        {"id": existing[pid][0], **dict(zip(fields, v))}
+        for pid, v in latest.items()
+        if pid in existing and existing[pid][1] != v
+    ]
+    if inserts:
+        session.execute(insert(Roster), inserts)
+    if updates:
+        session.execute(update(Roster), updates)
+    if inserts or updates:
+        mark_dashboard_dirty(session, "roster", league_id=league_id)
+    return len(latest)
+
+
+def upsert_league_teams(
+    session: Session, teams: Iterable[Tuple[int, str, Optional[str], bool]], overwrite: bool = True, league_id: int = DEFAULT_LEAGUE
+) -> int:
+    """Upsert ``(espn_team_id, name, abbrev, is_mine)`` for ``league_id``; with
+    ``overwrite=False`` only missing teams are added."""
+    teams = list(teams)
+    if not teams:
+        return 0
+    existing = {
+        t.id: t
+        for t in session.exec(select(LeagueTeam).where(LeagueTeam.league_id == league_id, LeagueTeam.id.in_([t[0] for t in teams]))).all()
+    }
+    for tid, name, abbrev, mine in teams:
+        row = existing.get(tid)
+        if row is None:
+            existing[tid] = row = LeagueTeam(league_id=league_id, id=tid)
+            session.add(row)
+        elif not overwrite:
+            continue
+        row.name, row.abbrev, row.is_mine, row.updated_at = name, abbrev, mine, datetime.utcnow()
+    session.flush()
+    return len(teams)
@@ -0,0 +1,37 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend.app.db import async_engine, init_db
+from backend.app.main import app
+from backend.app.seeds.seed import run as seed_run
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_read_endpoints_on_async_session():
+    client = TestClient(app)
+    roster = client.get("/api/roster/my").json()["roster"]
+    assert roster and {"player_id", "name", "status"} <= set(roster[0])
+    assert "data" in client.get("/api/settings").json()
+    assert client.get("/api/news/my-players").status_code == 200
+    r = client.get("/api/dashboard/cards")
+    assert r.status_code == 200
+    assert client.get("/api/dashboard/cards", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+
+
+def test_concurrent_requests_share_the_async_pool():
+    import httpx
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get("/api/roster/my") for _ in range(50)))
+
+    responses = asyncio.run(burst())
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.text for r in responses}) == 1
+    asyncio.run(async_engine.dispose())
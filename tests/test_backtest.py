@@ -0,0 +1,86 @@
+import random
+from datetime import datetime
+
+import numpy as np
+from sqlmodel import Session
+
+from backend.app.db import engine, init_db
+from backend.app.models import Player, RosterStatus
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.backtest import POS_INDEX, apply_best, lineup_points, merge_weights, load_season, run_backtest, run_grid, weight_grid
+from backend.app.services.leagues import create_league, league_settings, risk_lambda
+from backend.app.services.projection_history import append_history
+from ingest.util import bulk_upsert_actuals, bulk_upsert_roster
+
+
+SEASON = 2019
+WEEKS = range(1, 5)
+ROSTER = ["QB", "QB", "RB", "RB", "RB", "WR", "WR", "WR", "TE", "TE", "K", "DST"]
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def _season(session, league_id):
+    """A 'sharp' source that tracks actual points and a 'noisy' one that doesn't."""
+    rnd = random.Random(3)
+    players = [Player(name=f"Backtest {pos} {i}", position=pos) for i, pos in enumerate(ROSTER)]
+    session.add_all(players)
+    session.flush()
+    pids = [p.id for p in players]
+    bulk_upsert_roster(session, [(pid, RosterStatus.bench, True, None) for pid in pids], league_id=league_id)
+    for week in WEEKS:
+        actual = {pid: float(v) for pid, v in zip(pids, rnd.sample(range(1, 40), len(pids)))}
+        at = datetime(SEASON, 9, 1 + 7 * week)
+        append_history(session, week, "sharp", [(pid, pts + 0.1, 2.0) for pid, pts in actual.items()], recorded_at=at, season=SEASON)
+        append_history(session, week, "noisy", [(pid, rnd.uniform(0, 40), 2.0) for pid in pids], recorded_at=at, season=SEASON)
+        # Written after lock: never seen by the replay
+        append_history(session, week, "sharp", [(pid, 100.0 - pts, 2.0) for pid, pts in actual.items()], recorded_at=datetime(2100, 1, 1), season=SEASON)
+        bulk_upsert_actuals(session, SEASON, week, actual.items())
+    session.commit()
+
+
+def test_lineup_fills_flex_after_positional_slots():
+    pos = np.array([[POS_INDEX[p] for p in ["RB", "RB", "RB", "WR", "WR", "WR", "TE", "TE"]]])
+    pts = np.array([[10.0, 9.0, 8.0, 7.0, 6.0, 1.0, 5.0, 4.0]])
+    # RB 10+9, WR 7+6, TE 5, FLEX the third RB (8)
+    assert lineup_points(pts, pos, pts).tolist() == [45.0]
+
+
+def test_backtest_finds_the_sharp_source_and_saves_it():
+    with Session(engine) as s:
+        lid = create_league(s, "Backtest").id
+        _season(s, lid)
+        report = run_backtest(s, SEASON, range(1, 19), step=0.25, lambdas=(0.0, 0.35), workers=1, league_id=lid)
+        assert report["weeks"] == list(WEEKS) and report["sources"] == ["noisy", "sharp"]
+        assert report["configs"] == 1 + 5 * 2
+        best = report["best"]
+        assert best["weights"]["RB"] == {"noisy": 0.0, "sharp": 1.0}
+        assert best["regret"] == 0 and best["points"] == report["optimal_points"]
+        assert report["baseline"]["points"] < best["points"]
+        assert sum(w["optimal"] for w in best["by_week"]) == report["optimal_points"]
+
+        apply_best(s, report, league_id=lid)
+        s.commit()
+        # Sources without history keep their weight
+        assert league_settings(s, lid)["weights"]["QB"] == {
+            "espn": 0.5, "fantasypros": 0.3, "sportsdata": 0.2, "yahoo": 0.0, "noisy": 0.0, "sharp": 1.0,
+        }
+        assert risk_lambda(s, lid) == best["risk_lambda"]
+
+        # Same numbers from the process pool
+        data = load_season(s, SEASON, WEEKS, league_id=lid)
+        grid = weight_grid(len(data.sources), 0.1)
+        weights = np.repeat(grid[:, None, :], len(POS_INDEX), axis=1)
+        lams = np.full(len(grid), 0.35)
+        assert np.allclose(run_grid(data, weights, lams, workers=2), run_grid(data, weights, lams, workers=1))
+
+
+def test_tuned_weights_share_the_mass_they_held():
+    current = {"QB": {"espn": 0.5, "fantasypros": 0.3, "sportsdata": 0.2}}
+    merged = merge_weights(current, {"QB": {"espn": 0.25, "fantasypros": 0.75}, "K": {"espn": 1.0, "fantasypros": 0.0}})
+    assert merged["QB"] == {"espn": 0.2, "fantasypros": 0.6, "sportsdata": 0.2}
+    assert merged["K"] == {"espn": 1.0, "fantasypros": 0.0}
+    assert current["QB"]["espn"] == 0.5
@@ -1,7 +1,10 @@
-from sqlmodel import Session
+import numpy as np
+from sqlmodel import Session, select
 from backend.app.db import engine, init_db
+from backend.app.models import Player
 from backend.app.seeds.seed import run as seed_run
-from backend.app.services.projections import blend_projections
+from backend.app.services.projections import blend_matrix, blend_projections, dirty_player_ids, write_blended
+from ingest.util import upsert_projection
 
 
 def setup_module():
@@ -18,3 +21,33 @@ def test_blended_weights():
         any_val = next(iter(blended.values()))["expected"]
         assert 7.0 < any_val < 30.0
 
+
+
+def test_incremental_blend_touches_changed_players():
+    with Session(engine) as session:
+        week = 1
+        write_blended(session, week, full=True)
+        session.commit()
+        assert dirty_player_ids(session, week) == set()
+        assert write_blended(session, week) == 0
+        p = session.exec(select(Player).where(Player.name == "Josh Allen")).first()
+        upsert_projection(session, p, week, "espn", 31.0, stdev=2.0)
+        session.commit()
+        assert dirty_player_ids(session, week) == {p.id}
+        assert write_blended(session, week) == 1
+        session.commit()
+        assert dirty_player_ids(session, week) == set()
+
+
+def test_blend_matrix_dispersion_and_masks():
+    nan = float("nan")
+    values = np.array([[10.0, 10.0], [8.0, 14.0], [12.0, nan], [nan, nan]])
+    stdevs = np.full(values.shape, 2.0)
+    weights = np.array([[0.5, 0.5]] * 4)
+    expected, stdev = blend_matrix(values, stdevs, weights)
+    assert expected[0] == 10.0 and abs(stdev[0] - 2.0) < 1e-9
+    # Disagreeing sources widen the blended stdev beyond the prior
+    assert expected[1] == 11.0 and abs(stdev[1] - (9.0 + 4.0) ** 0.5) < 1e-9
+    # A missing source is masked out rather than treated as zero
+    assert expected[2] == 12.0
+    assert np.isnan(expected[3])
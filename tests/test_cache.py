@@ -0,0 +1,56 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.app.cache import SWRCache
+
+
+def test_single_flight_first_load():
+    cache = SWRCache()
+    calls = []
+    gate = threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait(1)
+        return {"v": 1}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get, "k", loader, 60) for _ in range(8)]
+        time.sleep(0.05)
+        gate.set()
+        values = [f.result()[0] for f in futures]
+    assert len(calls) == 1 and all(v == {"v": 1} for v in values)
+
+
+def test_stale_served_while_refreshing_and_errors_keep_last_good():
+    cache = SWRCache()
+    state = {"n": 0, "fail": False}
+
+    def loader():
+        if state["fail"]:
+            raise RuntimeError("upstream down")
+        if state["n"]:
+            time.sleep(0.1)  # slow refresh
+        state["n"] += 1
+        return state["n"]
+
+    value, meta = cache.get("k", loader, ttl=0.2)
+    assert value == 1 and meta["stale"] is False
+    time.sleep(0.25)
+    value, meta = cache.get("k", loader, ttl=0.2)
+    # Stale value comes back immediately; the refresh happens in the background
+    assert value == 1 and meta["stale"] is True
+    for _ in range(200):
+        if not cache.freshness("k")["refreshing"]:
+            break
+        time.sleep(0.01)
+    assert cache.get("k", loader, ttl=0.2)[0] == 2
+
+    state["fail"] = True
+    value, meta = cache.get("k", loader, ttl=60, force=True)
+    assert value == 2 and "upstream down" in meta["last_error"]
+    with pytest.raises(RuntimeError):
+        cache.get("other", loader, ttl=60)
@@ -0,0 +1,124 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.main import app
+from backend.app.models import ChangeEvent, Player
+from backend.app.seeds.seed import run as seed_run
+from backend.app.settings import get_settings
+from backend.app.services import alerts
+from backend.app.services.alerts import dispatch_change_alerts
+from backend.app.services.changes import changes_since, collapse, get_cursor, record_change, record_lineup_change
+from backend.app.services.projections import write_blended
+from ingest.util import upsert_projection
+
+
+WEEK = 1
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def _last_id(session):
+    return max([e.id for e in changes_since(session, 0, limit=100000)] or [0])
+
+
+def test_projection_swing_and_lineup_events():
+    with Session(engine) as session:
+        write_blended(session, WEEK, full=True)
+        session.commit()
+        cursor = _last_id(session)
+        p = session.exec(select(Player).where(Player.name == "Josh Allen")).first()
+        upsert_projection(session, p, WEEK, "espn", 45.0, stdev=2.0)
+        session.commit()
+        write_blended(session, WEEK)
+        session.commit()
+        swings = changes_since(session, cursor, kinds=["projection"])
+        assert [e.player_id for e in swings] == [p.id] and swings[0].data["delta"] > 3.0
+
+        result = {"starters": [{"player_id": 1, "name": "A"}, {"player_id": 2, "name": "B"}]}
+        assert record_lineup_change(session, 99, result) is not None
+        assert record_lineup_change(session, 99, result) is None
+        swapped = {"starters": [{"player_id": 1, "name": "A"}, {"player_id": 3, "name": "C"}]}
+        event = record_lineup_change(session, 99, swapped)
+        assert event.data["added"] == ["C"] and event.data["removed"] == ["B"]
+        session.commit()
+
+
+def test_collapse_drops_round_trips():
+    with Session(engine) as session:
+        cursor = _last_id(session)
+        record_change(session, "injury", week=50, player_id=1, old="Active", new="Questionable")
+        record_change(session, "injury", week=50, player_id=1, old="Questionable", new="Active")
+        record_change(session, "injury", week=50, player_id=2, old="Active", new="Questionable")
+        record_change(session, "injury", week=50, player_id=2, old="Questionable", new="Out")
+        session.commit()
+        merged = collapse(changes_since(session, cursor))
+        assert [(e.player_id, e.data["old"], e.data["new"]) for e in merged] == [(2, "Active", "Out")]
+
+
+def test_recent_events_are_held_back_until_settled():
+    with Session(engine) as session:
+        cursor = _last_id(session)
+        old = record_change(session, "injury", week=51, player_id=1, old="Active", new="Out")
+        record_change(session, "injury", week=51, player_id=2, old="Active", new="Out")
+        later = record_change(session, "injury", week=51, player_id=3, old="Active", new="Out")
+        session.commit()
+        past = datetime.utcnow() - timedelta(minutes=5)
+        session.execute(update(ChangeEvent).where(ChangeEvent.id.in_([old.id, later.id])).values(created_at=past))
+        session.commit()
+        # The young middle event may have an uncommitted neighbour: stop before it
+        assert [e.id for e in changes_since(session, cursor, settle_s=60)] == [old.id]
+        assert len(changes_since(session, cursor, settle_s=0)) == 3
+
+
+def test_events_are_inserted_after_the_commit():
+    with Session(engine) as session:
+        cursor = _last_id(session)
+        dropped = record_change(session, "injury", week=53, player_id=1, old="Active", new="Out")
+        session.flush()
+        assert dropped.id is None and changes_since(session, cursor) == []
+        session.rollback()
+        kept = record_change(session, "injury", week=53, player_id=2, old="Active", new="Out")
+        session.commit()
+        assert dropped.id is None and [e.id for e in changes_since(session, cursor)] == [kept.id]
+
+
+def test_dispatch_without_webhook_leaves_cursor():
+    with Session(engine) as session:
+        before = get_cursor(session, "slack")
+        record_change(session, "injury", week=52, player_id=1, old="Active", new="Out")
+        session.commit()
+        assert asyncio.run(dispatch_change_alerts(session)) == 0
+        assert get_cursor(session, "slack") == before
+
+
+def test_dispatch_advances_cursor_and_changes_endpoint(monkeypatch):
+    sent = []
+
+    async def fake_send(text):
+        sent.append(text)
+        return True
+
+    monkeypatch.setattr(get_settings(), "slack_webhook_url", "https://hooks.example/test")
+    monkeypatch.setattr(alerts, "send_slack_message", fake_send)
+    with Session(engine) as session:
+        asyncio.run(dispatch_change_alerts(session))
+        # Everything consumed: the next run has nothing to post
+        assert asyncio.run(dispatch_change_alerts(session)) == 0
+        cursor = _last_id(session)
+        record_change(session, "injury", week=50, player_id=1, old="Active", new="Out")
+        session.commit()
+        assert asyncio.run(dispatch_change_alerts(session)) == 1
+        assert "Out" in sent[-1]
+
+    client = TestClient(app)
+    body = client.get(f"/api/changes?since={cursor}").json()
+    assert [c["data"]["new"] for c in body["changes"]] == ["Out"]
+    assert client.get(f"/api/changes?since={body['cursor']}").json()["changes"] == []
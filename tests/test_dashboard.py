@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from backend.app.db import engine, init_db
+from backend.app.main import app
+from backend.app.models import DEFAULT_LEAGUE, DashboardSnapshot
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.dashboard import mark_dashboard_dirty, refresh_dashboard
+from backend.app.services.leagues import current_week
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_cards_etag_and_incremental_rebuild():
+    client = TestClient(app)
+    r = client.get("/api/dashboard/cards")
+    assert r.status_code == 200 and "waivers" in r.json()
+    etag = r.headers["etag"]
+    assert client.get("/api/dashboard/cards", headers={"If-None-Match": etag}).status_code == 304
+
+    with Session(engine) as session:
+        # Reads don't persist the snapshot; the refresh does
+        week = current_week(session)
+        refresh_dashboard(session, week)
+        mark_dashboard_dirty(session, "dvp", week=week)
+        session.commit()
+        assert session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week)).dirty == ["matchups"]
+        refresh_dashboard(session, week)
+        assert session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week)).dirty == []
+    # Rebuilt section is identical, so the ETag still matches
+    assert client.get("/api/dashboard/cards", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_reads_leave_dirty_sections_to_the_refresh():
+    with Session(engine) as session:
+        week = current_week(session)
+        refresh_dashboard(session, week)
+        snap = session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week))
+        snap.dirty = ["injuries", "matchups"]
+        session.commit()
+        # A dirty read is built in memory and not saved
+        client = TestClient(app)
+        assert client.get("/api/dashboard/cards").status_code == 200
+        session.expire_all()
+        assert session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week)).dirty == ["injuries", "matchups"]
+        refresh_dashboard(session, week)
+        assert session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week)).dirty == []
+
+
+def test_marks_land_after_commit_and_not_on_rollback():
+    with Session(engine) as session:
+        week = current_week(session)
+        refresh_dashboard(session, week)
+        mark_dashboard_dirty(session, "dvp", week=week)
+        session.rollback()
+        assert session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week)).dirty == []
+        mark_dashboard_dirty(session, "injury", week=week)
+        mark_dashboard_dirty(session, "dvp")
+        # Nothing is locked or written until the caller commits
+        assert session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week)).dirty == []
+        session.commit()
+        assert session.get(DashboardSnapshot, (DEFAULT_LEAGUE, week)).dirty == ["injuries", "matchups"]
+        refresh_dashboard(session, week)
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.models import ActualPoints, ChangeEvent, Injury, Player, Projection, Roster, RosterStatus
+from backend.app.services.duplicates import find_candidates, merge_duplicate_players
+
+
+def setup_module():
+    init_db()
+
+
+def _seed_pair(name):
+    old, new = datetime(2024, 9, 1), datetime(2024, 9, 2)
+    with Session(engine) as s:
+        a = Player(name=name, position="WR", team="KC")
+        b = Player(name=name.lower(), position="FLEX", espn_id=987654)
+        s.add(a)
+        s.add(b)
+        s.flush()
+        s.add(Projection(player_id=a.id, week=1, source="espn", expected=10.0, updated_at=old))
+        s.add(Projection(player_id=b.id, week=1, source="espn", expected=12.0, updated_at=new))
+        s.add(Projection(player_id=a.id, week=2, source="espn", expected=9.0, updated_at=old))
+        s.add(Roster(player_id=a.id, status=RosterStatus.start, my_team=True))
+        s.add(Roster(player_id=b.id, status=RosterStatus.fa, my_team=False))
+        s.add(Injury(player_id=a.id, week=1, status="Q", updated_at=new))
+        s.add(Injury(player_id=b.id, week=1, status="OUT", updated_at=old))
+        s.add(ChangeEvent(kind="injury", week=1, player_id=a.id))
+        s.add(ActualPoints(season=2024, week=1, player_id=a.id, points=7.0, updated_at=old))
+        s.add(ActualPoints(season=2024, week=1, player_id=b.id, points=11.0, updated_at=new))
+        s.add(ActualPoints(season=2024, week=2, player_id=a.id, points=4.0, updated_at=old))
+        s.commit()
+        return a.id, b.id
+
+
+def _group(report, canonical_id):
+    return next(g for g in report["details"] if g["canonical_id"] == canonical_id)
+
+
+def test_dry_run_reports_without_changing_anything():
+    a_id, b_id = _seed_pair("Dryrun Testguy")
+    with Session(engine) as s:
+        report = merge_duplicate_players(s, dry_run=True)
+    assert report["dry_run"] is True
+    assert _group(report, b_id)["removed_ids"] == [a_id]
+    assert report["rows"]["projection"]["deleted"] >= 1 and report["rows"]["roster"]["deleted"] >= 1
+    assert report["rows"]["actualpoints"]["deleted"] >= 1
+    with Session(engine) as s:
+        assert s.get(Player, a_id) is not None
+        assert len(s.exec(select(Projection).where(Projection.player_id == a_id)).all()) == 2
+
+
+def test_merge_repoints_and_dedupes_in_one_pass():
+    a_id, b_id = _seed_pair("Merge Testguy")
+    with Session(engine) as s:
+        report = merge_duplicate_players(s)
+    assert report["dry_run"] is False and _group(report, b_id)["removed_ids"] == [a_id]
+    with Session(engine) as s:
+        assert s.get(Player, a_id) is None
+        canon = s.get(Player, b_id)
+        assert (canon.team, canon.position) == ("KC", "WR")
+        projs = {(p.week, p.expected) for p in s.exec(select(Projection).where(Projection.player_id == b_id)).all()}
+        assert projs == {(1, 12.0), (2, 9.0)}
+        roster = s.exec(select(Roster).where(Roster.player_id == b_id)).all()
+        assert [(r.my_team, r.status) for r in roster] == [(True, RosterStatus.start)]
+        assert [i.status for i in s.exec(select(Injury).where(Injury.player_id == b_id)).all()] == ["Q"]
+        assert s.exec(select(ChangeEvent).where(ChangeEvent.player_id == a_id)).all() == []
+        actuals = {(r.week, r.points) for r in s.exec(select(ActualPoints).where(ActualPoints.player_id == b_id)).all()}
+        assert actuals == {(1, 11.0), (2, 4.0)}
+    # Nothing left to merge for this name
+    with Session(engine) as s:
+        assert all(g["canonical_id"] != b_id for g in merge_duplicate_players(s, dry_run=True)["details"])
+
+
+def test_fuzzy_candidates_are_blocked_and_ranked():
+    rows = [
+        (1, "A.J. Brown", "WR", "PHI", 101),
+        (2, "AJ Brown", "WR", "PHI", None),
+        (3, "Mike Evans", "WR", "TB", None),
+        (4, "Michael Evans", "FLEX", None, None),  # roster import: unknown team/position
+        (5, "Antonio Brown", "WR", "PHI", None),
+        (6, "Josh Allen", "QB", "BUF", 102),
+        (7, "Josh Allen", "LB", "JAX", None),  # different position block
+        (8, "A. Brown", "WR", "PHI", 103),  # conflicting ESPN id with 1
+    ]
+    out = find_candidates(rows)
+    pairs = [(tuple(p["id"] for p in c["players"]), c["reason"]) for c in out["candidates"]]
+    assert pairs[0] == ((1, 2), "same name") and out["candidates"][0]["confidence"] == 1.0
+    assert ((3, 4), "nickname") in pairs
+    assert all(ids not in {(6, 7), (1, 5), (1, 8)} for ids, _ in pairs)
+    assert out["compared"] < len(rows) * (len(rows) - 1) // 2
@@ -0,0 +1,41 @@
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.models import Injury, Player
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.changes import changes_since
+from ingest.util import sync_injuries
+
+
+WEEK = 9
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_sync_injuries_writes_only_changes():
+    with Session(engine) as session:
+        a, b, c = [p.id for p in session.exec(select(Player).limit(3)).all()]
+        # Leftover row from the old "everyone Active" rewrite
+        session.add(Injury(player_id=c, week=WEEK, status="Active"))
+        session.commit()
+        cursor = max([e.id for e in changes_since(session)] or [0])
+
+        assert sync_injuries(session, WEEK, [(a, "Questionable", "ankle"), (b, "Active", None)]) == 1
+        session.commit()
+        rows = session.exec(select(Injury).where(Injury.week == WEEK)).all()
+        assert [(r.player_id, r.status) for r in rows] == [(a, "Questionable")]
+
+        # Same report again: nothing written, nothing logged
+        assert sync_injuries(session, WEEK, [(a, "Questionable", "ankle")]) == 0
+        session.commit()
+
+        # Player drops off the report -> back to Active (row removed)
+        assert sync_injuries(session, WEEK, []) == 1
+        session.commit()
+        assert session.exec(select(Injury).where(Injury.week == WEEK)).all() == []
+
+        events = changes_since(session, cursor, kinds=["injury"])
+        assert [(e.player_id, e.data["old"], e.data["new"]) for e in events] == [(a, "Active", "Questionable"), (a, "Questionable", "Active")]
@@ -0,0 +1,68 @@
+from sqlmodel import Session, select
+
+from backend.app.cache import TaggedCache
+from backend.app.db import engine, init_db
+from backend.app.invalidation import InvalidationBus, publish
+from backend.app.models import CacheEpoch
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.vorp import compute_vorp
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_tagged_cache_evicts_by_kind_and_week():
+    cache = TaggedCache()
+    loads = []
+
+    def load(v):
+        loads.append(v)
+        return v
+
+    assert cache.get("a", [("projection", 1)], lambda: load("a1")) == "a1"
+    assert cache.get("a", [("projection", 1)], lambda: load("a2")) == "a1"
+    cache.get("b", [("projection", 2)], lambda: load("b"))
+    cache.get("c", [("player", None)], lambda: load("c"))
+    assert cache.evict("projection", 2) == 1
+    assert cache.evict("projection") == 1  # every week
+    assert cache.evict("roster") == 0
+    assert cache.evict("player", 5) == 1  # untagged week matches any week
+    assert cache.get("a", [("projection", 1)], lambda: load("a3")) == "a3"
+
+
+def test_other_worker_evicts_via_epoch_poll():
+    # A second "worker": its own cache and bus, polling CacheEpoch
+    other_cache = TaggedCache()
+    other = InvalidationBus()
+    other.subscribe(lambda kind, week: other_cache.evict(kind, week))
+    other.poll_once()
+    other_cache.get(("vorp", 1), [("projection", 1)], lambda: "old")
+    other_cache.get(("vorp", 2), [("projection", 2)], lambda: "keep")
+
+    with Session(engine) as session:
+        publish(session, "projection", week=1)
+        publish(session, "projection", week=1)
+        session.commit()
+        assert session.exec(select(CacheEpoch.epoch).where(CacheEpoch.kind == "projection", CacheEpoch.week == 1)).one() >= 2
+
+    assert other.poll_once() == 1
+    assert other_cache.get(("vorp", 1), [("projection", 1)], lambda: "new") == "new"
+    assert other_cache.get(("vorp", 2), [("projection", 2)], lambda: "reloaded") == "keep"
+    assert other.poll_once() == 0
+
+
+def test_vorp_cache_follows_projection_writes():
+    from backend.app.models import Player
+    from ingest.util import bulk_upsert_projections
+
+    with Session(engine) as session:
+        qbs = session.exec(select(Player.id).where(Player.position == "QB").limit(2)).all()
+        bulk_upsert_projections(session, 16, "espn", [(qbs[0], 20.0, 2.0), (qbs[1], 10.0, 2.0)])
+        session.commit()
+        before = compute_vorp(session, 16)
+        bulk_upsert_projections(session, 16, "espn", [(qbs[0], 30.0, 2.0)])
+        session.commit()
+        after = compute_vorp(session, 16)
+    assert after[qbs[0]] == before[qbs[0]] + 10.0
@@ -0,0 +1,112 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from backend.app.db import engine, init_db
+from backend.app.jobs.queue import DuplicateJob, enqueue, register, runner
+from backend.app.main import app
+from backend.app.models import Job, JobStatus
+from backend.app.seeds.seed import run as seed_run
+
+
+release = threading.Event()
+entered = threading.Event()
+
+
+@register("test_sleepy")
+def sleepy(ctx):
+    with ctx.stage("first") as out:
+        out["n"] = 1
+    with ctx.stage("wait"):
+        entered.set()
+        release.wait(10)
+    with ctx.stage("last"):
+        pass
+    return {"done": True}
+
+
+@register("test_boom")
+def boom(ctx):
+    with ctx.stage("explode"):
+        raise RuntimeError("boom")
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def wait_status(job_id, statuses, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with Session(engine) as s:
+            job = s.get(Job, job_id)
+            if job.status in statuses:
+                return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} never reached {statuses}")
+
+
+def test_stages_timings_and_duplicate_rejected():
+    release.clear()
+    with Session(engine) as s:
+        job_id = enqueue(s, "test_sleepy", week=7).id
+        wait_status(job_id, {JobStatus.running})
+        try:
+            enqueue(s, "test_sleepy", week=7)
+            raise AssertionError("duplicate accepted")
+        except DuplicateJob as e:
+            assert e.job_id == job_id
+        other = enqueue(s, "test_sleepy", week=8).id
+    release.set()
+    job = wait_status(job_id, {JobStatus.succeeded, JobStatus.failed})
+    assert job.status == JobStatus.succeeded and job.result == {"done": True}
+    assert [st["name"] for st in job.stages] == ["first", "wait", "last"]
+    assert all(st["status"] == "succeeded" and st["duration_ms"] >= 0 for st in job.stages)
+    assert job.stages[0]["result"] == {"n": 1}
+    wait_status(other, {JobStatus.succeeded})
+
+
+def test_cancel_and_failure_via_api():
+    client = TestClient(app)
+    release.clear()
+    entered.clear()
+    with Session(engine) as s:
+        job_id = enqueue(s, "test_sleepy", week=9).id
+    assert entered.wait(10)
+    r = client.post(f"/api/jobs/{job_id}/cancel")
+    assert r.json()["cancel_requested"] is True
+    release.set()
+    job = wait_status(job_id, {JobStatus.cancelled, JobStatus.succeeded})
+    assert job.status == JobStatus.cancelled
+    assert [st["name"] for st in job.stages] == ["first", "wait"]
+
+    with Session(engine) as s:
+        bad = enqueue(s, "test_boom").id
+    job = wait_status(bad, {JobStatus.failed})
+    assert "RuntimeError: boom" in job.error
+    assert job.stages[0]["status"] == "failed"
+    with client.stream("GET", f"/api/jobs/{bad}/events") as r:
+        body = "".join(r.iter_text())
+    assert body.startswith("data: ") and '"status": "failed"' in body
+    assert client.get("/api/jobs/999999").status_code == 404
+
+
+def test_recover_fails_only_jobs_without_a_heartbeat():
+    now = datetime.utcnow()
+    with Session(engine) as s:
+        stale = Job(kind="test_stale", week=30, status=JobStatus.running, owner="dead:1", started_at=now - timedelta(hours=1), updated_at=now - timedelta(hours=1))
+        live = Job(kind="test_stale", week=31, status=JobStatus.running, owner="other:2", started_at=now - timedelta(hours=1), updated_at=now)
+        s.add_all([stale, live])
+        s.commit()
+        ids = stale.id, live.id
+    assert runner._recover() == 1
+    with Session(engine) as s:
+        stale, live = s.get(Job, ids[0]), s.get(Job, ids[1])
+        assert stale.status == JobStatus.failed and "dead:1" in stale.error
+        assert live.status == JobStatus.running
+        live.status = JobStatus.cancelled
+        s.commit()
@@ -0,0 +1,36 @@
+import asyncio
+
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.jobs.leader import LeaderElector, leader_only
+from backend.app.models import ScheduledRun
+
+
+def setup_module():
+    init_db()
+
+
+def test_runs_once_per_slot_and_only_on_leader():
+    who = LeaderElector(engine, key=1)
+    calls = []
+
+    @leader_only("test_job", who)
+    async def job():
+        calls.append(1)
+
+    @leader_only("test_boom", who)
+    async def boom():
+        raise RuntimeError("boom")
+
+    # Not leader yet: nothing runs or is recorded
+    assert asyncio.run(job()) is None and calls == []
+    assert who.try_acquire()  # non-Postgres: the single process leads
+    assert asyncio.run(job()) == "succeeded"
+    # Same minute slot again (e.g. a second leader after a handover): skipped
+    assert asyncio.run(job()) is None and calls == [1]
+    assert asyncio.run(boom()) == "failed"
+    with Session(engine) as session:
+        runs = {r.job: r for r in session.exec(select(ScheduledRun).where(ScheduledRun.job.in_(["test_job", "test_boom"]))).all()}
+    assert runs["test_job"].status == "succeeded" and runs["test_job"].duration_ms is not None
+    assert runs["test_boom"].status == "failed" and "RuntimeError: boom" in runs["test_boom"].error
@@ -0,0 +1,76 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete, select
+
+from backend.app.db import engine, init_db
+from backend.app.main import app
+from backend.app.models import DEFAULT_LEAGUE, LeagueTeam, Player, Roster, RosterStatus
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.dashboard import mark_dashboard_dirty
+from backend.app.settings import get_settings
+from ingest.providers.espn import apply_private_roster
+
+
+def _entry(name, pos_id, pro_team, slot):
+    return {"lineupSlotId": slot, "playerPoolEntry": {"player": {"fullName": name, "defaultPositionId": pos_id, "proTeamId": pro_team}}}
+
+
+PAYLOAD = {
+    "teams": [
+        {"id": 1, "name": "Mine", "abbrev": "ME", "roster": {"entries": [
+            _entry("Patrick Mahomes", 1, 12, 0), _entry("Travis Kelce", 4, 12, 20), _entry("Tyreek Hill", 3, 15, 21),
+        ]}},
+        {"id": 2, "location": "Other", "nickname": "Guys", "abbrev": "OG", "roster": {"entries": [
+            _entry("Josh Allen", 1, 2, 0), _entry("Leaguer New", 2, 21, 20),
+        ]}},
+        {"id": 3, "name": "Empty", "roster": {"entries": []}},
+    ]
+}
+
+
+saved = []
+
+
+def setup_module():
+    init_db()
+    seed_run()
+    with Session(engine) as s:
+        saved.extend(s.exec(select(Roster.player_id, Roster.status, Roster.my_team)).all())
+
+
+def teardown_module():
+    # Put back the seeded single-team roster the other modules expect
+    with Session(engine) as s:
+        s.exec(delete(Roster))
+        s.exec(delete(LeagueTeam))
+        s.add_all(Roster(player_id=pid, status=st, my_team=mine) for pid, st, mine in saved)
+        mark_dashboard_dirty(s, "roster")
+        s.commit()
+
+
+def test_whole_league_imported_and_rest_are_free_agents(monkeypatch):
+    monkeypatch.setattr(get_settings(), "team_id", "1")
+    with Session(engine) as s:
+        res = apply_private_roster(s, PAYLOAD)
+        s.commit()
+        assert res["ok"] and (res["count"], res["starts"], res["bench"], res["ir"]) == (3, 1, 1, 1)
+        assert (res["teams"], res["rostered"]) == (3, 5)
+        teams = {t.id: t for t in s.exec(select(LeagueTeam)).all()}
+        assert teams[2].name == "Other Guys" and teams[1].is_mine and not teams[2].is_mine
+        by_name = {
+            p.name: r
+            for r, p in s.exec(select(Roster, Player).join(Player, Roster.player_id == Player.id).where(Roster.league_id == DEFAULT_LEAGUE)).all()
+        }
+        assert (by_name["Josh Allen"].league_team_id, by_name["Josh Allen"].my_team) == (2, False)
+        assert by_name["Leaguer New"].league_team_id == 2
+        assert (by_name["Tyreek Hill"].status, by_name["Tyreek Hill"].my_team) == (RosterStatus.ir, True)
+        # Only real entries are stored; seeded players on nobody's roster lost their rows
+        assert set(by_name) == {"Patrick Mahomes", "Travis Kelce", "Tyreek Hill", "Josh Allen", "Leaguer New"}
+        assert res["free_agents"] == len(s.exec(select(Player.id)).all()) - 5
+
+    client = TestClient(app)
+    league = client.get("/api/league/rosters").json()["teams"]
+    assert [len(t["roster"]) for t in league if t["id"] in (1, 2, 3)] == [3, 2, 0]
+    fas = client.get("/api/league/free-agents", params={"position": "rb"}).json()["free_agents"]
+    assert fas and all(p["position"] == "RB" for p in fas)
+    assert "Leaguer New" not in {p["name"] for p in fas}
+    assert "Christian McCaffrey" in {p["name"] for p in client.get("/api/league/free-agents").json()["free_agents"]}
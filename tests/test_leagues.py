@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.jobs.queue import _claim, runner
+from backend.app.main import app
+from backend.app.models import DEFAULT_LEAGUE, DashboardSnapshot, Job, JobStatus, Roster
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.dashboard import mark_dashboard_dirty, refresh_dashboard
+from backend.app.services.leagues import current_week
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def _new_league(client, name, **extra):
+    r = client.post("/api/leagues", json={"name": name, **extra})
+    assert r.status_code == 201
+    return r.json()["id"]
+
+
+def test_rosters_settings_and_dashboards_are_scoped_by_league():
+    client = TestClient(app)
+    default_roster = client.get("/api/roster/my").json()["roster"]
+    lid = _new_league(client, "Work League")
+    hdr = {"X-League-Id": str(lid)}
+    assert client.get("/api/roster/my", headers=hdr).json()["roster"] == []
+    # Settings start as a copy of the default league's, then diverge
+    assert client.get("/api/settings", headers=hdr).json() == client.get("/api/settings").json()
+    data = dict(client.get("/api/settings").json()["data"], current_week=3)
+    assert client.post("/api/settings", params={"league_id": lid}, json={"data": data}).status_code == 200
+    with Session(engine) as s:
+        assert (current_week(s, lid), current_week(s)) == (3, 1)
+
+    csv = "name,position,team,status\nJosh Allen,QB,BUF,start\nTravis Kelce,TE,KC,bench\n"
+    assert client.post("/api/roster/import", headers=hdr, json={"csv": csv}).json()["count"] == 2
+    mine = client.get("/api/roster/my", headers=hdr).json()["roster"]
+    assert sorted(p["name"] for p in mine) == ["Josh Allen", "Travis Kelce"]
+    assert client.get("/api/roster/my").json()["roster"] == default_roster
+
+    assert client.get("/api/dashboard/cards", headers=hdr).status_code == 200
+    assert client.get("/api/dashboard/cards").status_code == 200
+    with Session(engine) as s:
+        refresh_dashboard(s, 3, league_id=lid)
+        refresh_dashboard(s, 1)
+        mark_dashboard_dirty(s, "roster", league_id=lid)
+        s.commit()
+        assert s.get(DashboardSnapshot, (lid, 3)).dirty
+        assert s.get(DashboardSnapshot, (DEFAULT_LEAGUE, 1)).dirty == []
+        rows = s.exec(select(Roster).where(Roster.league_id == lid)).all()
+        assert len(rows) == 2
+
+
+def test_unknown_league_is_404():
+    client = TestClient(app)
+    assert client.get("/api/roster/my", headers={"X-League-Id": "987654"}).status_code == 404
+
+
+def test_claim_prefers_the_least_busy_league():
+    client = TestClient(app)
+    busy, quiet = _new_league(client, "Busy"), _new_league(client, "Quiet")
+    t0 = datetime.utcnow() - timedelta(minutes=5)
+    # Serialised with the worker threads' claims
+    with runner._claim_lock, Session(engine) as s:
+        s.add(Job(kind="test_fair", week=1, league_id=busy, status=JobStatus.running, created_at=t0))
+        s.add_all(Job(kind="test_fair", week=w, league_id=busy, created_at=t0) for w in range(2, 5))
+        s.add(Job(kind="test_fair", week=2, league_id=quiet, created_at=t0 + timedelta(minutes=1)))
+        s.commit()
+        job = _claim(s)
+        assert (job.league_id, job.status) == (quiet, JobStatus.running)
+        for j in s.exec(select(Job).where(Job.kind == "test_fair", Job.status.in_([JobStatus.queued, JobStatus.running]))).all():
+            j.status = JobStatus.cancelled
+        s.commit()
@@ -0,0 +1,114 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlmodel import select
+
+from backend.app.db import run_migrations
+from backend.app.models import ADP, DVP, Game, Injury, League, Player, Projection, ProjectionHistory, Roster, SettingsRow
+from backend.app.services.projection_history import as_of_stmt
+from backend.app.services.waivers import free_agent_filter
+
+
+PLAYERS = 2000
+WEEKS = 18
+SOURCES = ("espn", "fantasypros", "blended")
+TEAMS = [f"T{i:02d}" for i in range(32)]
+POSITIONS = ("QB", "RB", "WR", "TE", "K", "DST")
+LEAGUES = 12
+
+
+def _engine(tmp_path, name):
+    return create_engine(f"sqlite:///{tmp_path / name}")
+
+
+def test_index_pack_dedupes_existing_rows(tmp_path):
+    eng = _engine(tmp_path, "legacy.db")
+    run_migrations(eng, "0001_baseline")
+    now = datetime(2024, 9, 1)
+    with eng.begin() as c:
+        c.execute(text("INSERT INTO player (id, name, position) VALUES (1, 'A', 'QB')"))
+        for i, expected in enumerate([10.0, 12.0, 11.0]):
+            c.execute(
+                text("INSERT INTO projection (player_id, week, source, expected, updated_at) VALUES (1, 1, 'espn', :e, :t)"),
+                {"e": expected, "t": now + timedelta(days=(1, 3, 2)[i])},
+            )
+        c.execute(text("INSERT INTO roster (player_id, status, my_team) VALUES (1, 'fa', 0), (1, 'start', 1)"))
+    run_migrations(eng)
+    with eng.connect() as c:
+        assert c.execute(text("SELECT expected FROM projection")).scalars().all() == [12.0]
+        assert c.execute(text("SELECT my_team FROM roster")).scalars().all() == [1]
+    names = {ix["name"] for ix in inspect(eng).get_indexes("projection")}
+    assert "uq_projection_week_source_player_id" in names and "ix_projection_week" not in names
+
+
+@pytest.fixture(scope="module")
+def big_db(tmp_path_factory):
+    eng = _engine(tmp_path_factory.mktemp("plans"), "big.db")
+    run_migrations(eng)
+    rnd = random.Random(7)
+    now = datetime(2024, 9, 1)
+    players = [{"id": i, "name": f"P{i}", "position": POSITIONS[i % 6], "team": TEAMS[i % 32]} for i in range(1, PLAYERS + 1)]
+    with eng.begin() as c:
+        c.execute(Player.__table__.insert(), players)
+        c.execute(League.__table__.insert(), [{"id": lg, "name": f"L{lg}", "created_at": now} for lg in range(2, LEAGUES + 1)])
+        c.execute(SettingsRow.__table__.insert(), [{"league_id": lg, "data": {"current_week": 5}} for lg in range(1, LEAGUES + 1)])
+        # Every league rosters every player: a league's reads must not scan the others
+        c.execute(Roster.__table__.insert(), [
+            {"league_id": lg, "player_id": p["id"], "status": "start" if p["id"] % 100 < 15 else "fa", "my_team": p["id"] % 100 < 15}
+            for lg in range(1, LEAGUES + 1) for p in players
+        ])
+        c.execute(Projection.__table__.insert(), [
+            {"player_id": p["id"], "week": w, "source": s, "expected": rnd.uniform(0, 25), "stdev": 2.0, "updated_at": now}
+            for w in range(1, WEEKS + 1) for s in SOURCES for p in players
+        ])
+        # Two seasons of history, three versions per value
+        c.execute(ProjectionHistory.__table__.insert(), [
+            {"season": season, "week": w, "source": "espn", "player_id": p["id"], "expected": rnd.uniform(0, 25), "recorded_at": now + timedelta(days=d)}
+            for season in (2023, 2024) for w in range(1, WEEKS + 1) for d in range(3) for p in players[:500]
+        ])
+        c.execute(Injury.__table__.insert(), [
+            {"player_id": pid, "week": w, "status": "Q", "updated_at": now}
+            for w in range(1, WEEKS + 1) for pid in rnd.sample(range(1, PLAYERS + 1), 150)
+        ])
+        c.execute(Game.__table__.insert(), [
+            {"week": w, "team": t, "home": True, "updated_at": now} for w in range(1, WEEKS + 1) for t in TEAMS
+        ])
+        c.execute(DVP.__table__.insert(), [
+            {"team": t, "position": pos, "rank": 1, "updated_at": now} for t in TEAMS for pos in POSITIONS
+        ])
+        c.execute(ADP.__table__.insert(), [
+            {"player_id": p["id"], "source": s, "rank": float(p["id"]), "updated_at": now} for p in players for s in ("espn", "sleeper")
+        ])
+        c.execute(text("ANALYZE"))
+    return eng
+
+
+# The filters the services run on every refresh / page load (call site in the name)
+HOT_QUERIES = {
+    "projections.write_blended": ("projection", select(Projection).where(Projection.week == 5, Projection.source == "blended")),
+    "vorp.compute_vorp": ("projection", select(Projection, Player).join(Player, Projection.player_id == Player.id).where(Projection.week == 5)),
+    "ingest.upsert_projection": ("projection", select(Projection).where(Projection.player_id == 42, Projection.week == 5, Projection.source == "espn")),
+    "projection_history.as_of": ("projectionhistory", as_of_stmt("sqlite", 5, datetime(2024, 9, 2), season=2024)),
+    "optimizer.injuries": ("injury", select(Injury).where(Injury.week == 5)),
+    "ingest.upsert_injury": ("injury", select(Injury).where(Injury.player_id == 42, Injury.week == 5)),
+    "dashboard.my_roster": ("roster", select(Roster, Player).join(Player, Roster.player_id == Player.id).where(Roster.league_id == 3, Roster.my_team == True)),  # noqa: E712
+    "ingest.roster_lookup": ("roster", select(Roster).where(Roster.league_id == 3, Roster.player_id == 42)),
+    "league.free_agents": ("roster", select(Player.id).where(free_agent_filter(3))),
+    "leagues.current_week": ("settingsrow", select(SettingsRow).where(SettingsRow.league_id == 3)),
+    "schedule.games_for_week": ("game", select(Game).where(Game.week == 5)),
+    "schedule.upsert_game": ("game", select(Game).where(Game.week == 5, Game.team == "T03")),
+    "dashboard.matchups": ("dvp", select(DVP).where(DVP.team.in_(["T01", "T02"]))),
+    "ingest.upsert_adp": ("adp", select(ADP).where(ADP.player_id == 42, ADP.source == "espn")),
+}
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_queries_use_indexes(big_db, name):
+    table, stmt = HOT_QUERIES[name]
+    sql = str(stmt.compile(big_db, compile_kwargs={"literal_binds": True}))
+    with big_db.connect() as c:
+        plan = [row[-1] for row in c.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    steps = [p for p in plan if p.split(" ")[1:2] == [table]]
+    assert steps and all(p.startswith("SEARCH") and "INDEX" in p for p in steps), plan
@@ -0,0 +1,39 @@
+import asyncio
+
+import httpx
+
+from backend.app.services import sportsdata as sdata
+from backend.app.settings import get_settings
+from ingest.transport import use_transport
+
+
+NEWS = {
+    "KC": [{"NewsID": 1, "Title": "Patrick Mahomes limited", "Content": "Travis Kelce rests"}],
+    "BUF": [{"NewsID": 2, "Title": "Bills notes", "Content": "josh allen practices fully"}, {"NewsID": 1, "Title": "dup"}],
+}
+
+
+def test_name_matcher_single_pass():
+    matcher = sdata.NameMatcher({1: "Patrick Mahomes", 2: "Travis Kelce", 3: "Josh Allen", 4: "Nobody Here"})
+    grouped = matcher.group(NEWS["KC"] + NEWS["BUF"][:1])
+    assert {pid: [i["NewsID"] for i in items] for pid, items in grouped.items()} == {1: [1], 2: [1], 3: [2]}
+    # Same results as the per-player helper
+    assert sdata.extract_player_news(NEWS["BUF"], "Josh Allen") == NEWS["BUF"][:1]
+
+
+def test_news_fetched_concurrently_and_cached(monkeypatch):
+    monkeypatch.setattr(get_settings(), "sportsdata_api_key", "test-key")
+    calls = []
+
+    def handler(request):
+        team = request.url.path.rsplit("/", 1)[-1]
+        calls.append(team)
+        return httpx.Response(200, json=NEWS.get(team, []))
+
+    sdata.clear_news_cache()
+    with use_transport(httpx.MockTransport(handler)):
+        items = asyncio.run(sdata.news_by_teams_async(["KC", "BUF", "KC"]))
+        assert sorted(calls) == ["BUF", "KC"]
+        assert sorted(i["NewsID"] for i in items) == [1, 2]
+        asyncio.run(sdata.news_by_teams_async(["BUF"]))
+        assert len(calls) == 2
@@ -0,0 +1,104 @@
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.jobs.dag import Stage, run_pipeline
+from backend.app.jobs import pipelines
+from backend.app.jobs.pipelines import run_weekly_refresh, weekly_stages
+from backend.app.models import Game
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.schedule import ensure_games, upsert_game
+from ingest.transport import use_replay
+
+
+REPLAY = Path(__file__).parent / "fixtures" / "replay"
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_order_skip_and_blocked():
+    calls = []
+    state = {"a": 1}
+
+    def step(name, fail=False):
+        def run(session, week):
+            calls.append(name)
+            if fail:
+                raise RuntimeError(name)
+            return name
+        return run
+
+    stages = [
+        Stage("c", step("c"), deps=("a", "b")),
+        Stage("a", step("a"), inputs=lambda s, w: state["a"]),
+        Stage("b", step("b")),
+        Stage("bad", step("bad", fail=True)),
+        Stage("after_bad", step("after_bad"), deps=("bad",)),
+    ]
+    run = run_pipeline("test_dag", stages, week=3)
+    by = {st["name"]: st for st in run.stages}
+    assert run.status == "failed"
+    assert calls.index("c") > calls.index("a") and calls.index("c") > calls.index("b")
+    assert by["a"]["status"] == "succeeded" and by["a"]["fingerprint"]
+    assert by["bad"]["status"] == "failed" and "RuntimeError" in by["bad"]["error"]
+    assert by["after_bad"]["status"] == "blocked" and "after_bad" not in calls
+    assert all(st["duration_ms"] >= 0 and st["started_ms"] >= 0 for st in run.stages)
+
+    calls.clear()
+    by = {st["name"]: st for st in run_pipeline("test_dag", stages, week=3).stages}
+    assert by["a"]["status"] == "skipped" and "a" not in calls
+    # Skipping is per week, and a changed input reruns the stage
+    assert {st["name"]: st for st in run_pipeline("test_dag", stages, week=4).stages}["a"]["status"] == "succeeded"
+    state["a"] = 2
+    assert {st["name"]: st for st in run_pipeline("test_dag", stages, week=3).stages}["a"]["status"] == "succeeded"
+
+
+def test_cycle_rejected():
+    with pytest.raises(ValueError):
+        run_pipeline("test_cycle", [Stage("x", lambda s, w: 0, deps=("y",)), Stage("y", lambda s, w: 0, deps=("x",))], week=1)
+
+
+def test_ensure_games_keeps_imported_schedule():
+    with Session(engine) as session:
+        upsert_game(session, week=15, team="KC", opponent="BUF", home=True)
+        assert ensure_games(session, 15, ["KC", "BUF", "DAL"]) == 2
+        session.commit()
+        games = {g.team: g for g in session.exec(select(Game).where(Game.week == 15)).all()}
+    assert set(games) == {"KC", "BUF", "DAL"} and games["KC"].opponent == "BUF"
+
+
+def test_weekly_refresh_offline_then_skips():
+    with use_replay(REPLAY):
+        first = run_weekly_refresh(1)
+        second = run_weekly_refresh(1)
+    statuses = {st["name"]: st["status"] for st in first.stages}
+    assert first.status == "succeeded", first.stages
+    assert set(statuses.values()) <= {"succeeded", "skipped"}
+    again = {st["name"]: st["status"] for st in second.stages}
+    assert again["fantasypros"] == again["adp"] == again["games"] == again["blend"] == "skipped"
+    assert again["dashboard"] == "succeeded"
+
+
+def test_source_stages_share_one_resolver(monkeypatch):
+    seen = {}
+
+    def record(name):
+        def fetch(session, *args, resolver=None):
+            seen[name] = resolver
+            return 0
+        return fetch
+
+    monkeypatch.setattr(pipelines.fp_provider, "fetch_projections", record("fantasypros"))
+    monkeypatch.setattr(pipelines.injuries_provider, "fetch_injuries", record("injuries"))
+    monkeypatch.setattr(pipelines.adp_provider, "fetch_adp", record("adp"))
+    monkeypatch.setattr(pipelines.espn_provider, "fetch_adp", record("espn_adp"))
+    resolver = object()
+    stages = {st.name: st for st in weekly_stages(resolver)}
+    for name in ("fantasypros", "injuries", "adp", "espn_adp"):
+        stages[name].run(None, 1)
+    assert seen == dict.fromkeys(["fantasypros", "injuries", "adp", "espn_adp"], resolver)
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.main import app
+from backend.app.models import Player, ProjectionHistory
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.projection_history import append_history, projections_as_of
+from ingest.util import bulk_upsert_projections
+
+
+WEEK = 15
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def _pids(n):
+    with Session(engine) as s:
+        return s.exec(select(Player.id).order_by(Player.id).limit(n)).all()
+
+
+def test_ingest_appends_only_changed_values():
+    a, b = _pids(2)
+    with Session(engine) as s:
+        bulk_upsert_projections(s, WEEK, "espn", [(a, 10.0, 2.0), (b, 8.0, 2.0)])
+        bulk_upsert_projections(s, WEEK, "espn", [(a, 10.0, 2.0), (b, 9.5, 2.0)])
+        s.commit()
+        rows = s.exec(
+            select(ProjectionHistory).where(ProjectionHistory.week == WEEK, ProjectionHistory.source == "espn").order_by(ProjectionHistory.id)
+        ).all()
+    assert [(r.player_id, r.expected) for r in rows] == [(a, 10.0), (b, 8.0), (b, 9.5)]
+
+
+def test_as_of_returns_each_value_as_it_stood():
+    a, b, c = _pids(3)
+    t0 = datetime(2024, 11, 1, 12)
+    with Session(engine) as s:
+        append_history(s, 16, "fantasypros", [(a, 10.0, 2.0), (b, 8.0, 2.0)], recorded_at=t0, season=2024)
+        append_history(s, 16, "fantasypros", [(a, 14.0, 2.5)], recorded_at=t0 + timedelta(hours=6), season=2024)
+        append_history(s, 16, "fantasypros", [(c, 5.0, None)], recorded_at=t0 + timedelta(days=1), season=2024)
+        # Another season's week 16 stays out of the snapshot
+        append_history(s, 16, "fantasypros", [(a, 99.0, None)], recorded_at=t0, season=2023)
+        s.commit()
+
+        def snap(at):
+            return {r.player_id: r.expected for r in projections_as_of(s, 16, at, season=2024, source="fantasypros")}
+
+        assert snap(t0 - timedelta(seconds=1)) == {}
+        assert snap(t0) == {a: 10.0, b: 8.0}
+        assert snap(t0 + timedelta(hours=7)) == {a: 14.0, b: 8.0}
+        assert snap(t0 + timedelta(days=2)) == {a: 14.0, b: 8.0, c: 5.0}
+
+    client = TestClient(app)
+    at = (t0 + timedelta(hours=7)).replace(tzinfo=timezone.utc).isoformat()
+    r = client.get("/api/projections/as-of", params={"week": 16, "season": 2024, "source": "fantasypros", "at": at})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["count"] == 2 and {p["player_id"]: p["expected"] for p in body["projections"]} == {a: 14.0, b: 8.0}
@@ -0,0 +1,64 @@
+import time
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.main import app
+from backend.app.models import Game, Projection
+from backend.app.seeds.seed import run as seed_run
+from ingest.transport import http_client, use_recording, use_replay
+
+
+REPLAY = Path(__file__).parent / "fixtures" / "replay"
+SCHEDULE = "team,opponent,home,kickoff_iso\nKC,BUF,1,2026-09-13T18:00:00\nBUF,KC,0,2026-09-13T18:00:00\n"
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_record_then_replay(tmp_path):
+    upstream = httpx.MockTransport(lambda req: httpx.Response(200, json={"path": req.url.path}))
+    with use_recording(tmp_path, inner=upstream):
+        with http_client() as client:
+            assert client.get("https://example.test/a?x=1").json() == {"path": "/a"}
+    with use_replay(tmp_path):
+        with http_client() as client:
+            assert client.get("https://example.test/a?x=1").json() == {"path": "/a"}
+            assert client.get("https://example.test/missing").status_code == 404
+    with use_replay(tmp_path, error_rate=1.0):
+        with http_client() as client:
+            assert client.get("https://example.test/a?x=1").status_code == 503
+
+
+def wait_for_job(client, job_id, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_update_everything_offline():
+    client = TestClient(app)
+    with use_replay(REPLAY) as transport:
+        r = client.post("/api/admin/update-everything?week=1", json={"schedule_csv": SCHEDULE})
+        assert r.status_code == 202
+        job = wait_for_job(client, r.json()["job_id"])
+    assert job["status"] == "succeeded", job["error"]
+    assert [s["name"] for s in job["stages"]] == ["ingest", "schedule", "blend", "weather", "optimize", "dashboard"]
+    counts = job["result"]["counts"]
+    assert counts["fp_proj"] == 86
+    assert counts["adp_fp"] > 0 and counts["adp_espn"] > 0
+    assert counts["dvp"] == 32
+    assert all(k.startswith("GET ") for k in transport.requests)
+    with Session(engine) as session:
+        games = session.exec(select(Game).where(Game.week == 1, Game.team.in_(["KC", "BUF"]))).all()
+        assert {g.team: g.weather["wind_kmh"] for g in games} == {"KC": 16.2, "BUF": 31.2}
+        assert session.exec(select(Projection).where(Projection.week == 1, Projection.source == "fantasypros")).first()
@@ -0,0 +1,66 @@
+import threading
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.main import app
+from backend.app.models import LineupResult, WaiverRec
+from backend.app.seeds.seed import run as seed_run
+from backend.app.services.results import ResultWriter, content_hash, result_writer
+from backend.app.settings import get_settings
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_read_endpoints_leave_persistence_to_the_writer():
+    client = TestClient(app)
+    seen = []
+    listener = lambda *a, **k: seen.append((threading.current_thread().name, a[2]))  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(4):
+            assert client.get("/api/lineup/optimal", params={"week": 1, "objective": "expected"}).status_code == 200
+        assert client.get("/api/waivers/suggestions", params={"week": 1}).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert not [sql for thread, sql in seen if thread != "result-writer" and sql.startswith(("INSERT INTO lineupresult", "INSERT INTO waiverrec"))]
+
+    result_writer.flush()
+    with Session(engine) as s:
+        rows = s.exec(select(LineupResult).where(LineupResult.week == 1, LineupResult.objective == "expected")).all()
+        # Four identical lineups, one row
+        assert len(rows) == 1 and rows[0].content_hash == content_hash(rows[0].results_json)
+        assert s.exec(select(WaiverRec).where(WaiverRec.week == 1)).first() is not None
+
+
+def test_retention_keeps_latest_plus_history(monkeypatch):
+    monkeypatch.setattr(get_settings(), "result_history", 2)
+    for i in range(6):
+        result_writer.submit("lineup", {"starters": [], "bench": [], "rationale": {}, "n": i}, week=17, objective="risk")
+    result_writer.submit("lineup", {"starters": [], "bench": [], "rationale": {}, "n": 0}, week=18, objective="risk")
+    result_writer.flush()
+    # A repeat of an older result is touched, not re-inserted, and becomes the latest
+    result_writer.submit("lineup", {"starters": [], "bench": [], "rationale": {}, "n": 4}, week=17, objective="risk")
+    out = result_writer.flush()
+    assert (out["inserted"], out["deduped"]) == (0, 1)
+    with Session(engine) as s:
+        rows = s.exec(
+            select(LineupResult).where(LineupResult.week == 17).order_by(LineupResult.created_at.desc(), LineupResult.id.desc())
+        ).all()
+        assert [r.results_json["n"] for r in rows] == [4, 5, 3]
+        assert len(s.exec(select(LineupResult).where(LineupResult.week == 18)).all()) == 1
+
+
+def test_stop_joins_the_thread_then_flushes():
+    writer = ResultWriter()
+    writer.submit("lineup", {"starters": [], "bench": [], "rationale": {}, "n": "stop"}, week=16, objective="risk")
+    thread = writer._thread
+    writer.stop()
+    assert not thread.is_alive() and writer.pending() == 0
+    with Session(engine) as s:
+        assert s.exec(select(LineupResult).where(LineupResult.week == 16)).first() is not None
@@ -0,0 +1,68 @@
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.models import Player, Roster, RosterStatus
+from backend.app.seeds.seed import run as seed_run
+from ingest.roster_csv import import_roster_csv
+
+
+LEAGUE = [(f"Leaguer {i:03d}", ("QB", "RB", "WR", "TE", "K", "DST")[i % 6], "KC") for i in range(240)]
+
+
+def setup_module():
+    init_db()
+    seed_run()
+    with Session(engine) as s:
+        s.add_all(Player(name=n, position=p, team=t) for n, p, t in LEAGUE)
+        s.commit()
+
+
+def _count_statements():
+    seen = []
+    listener = lambda *a, **k: seen.append(a[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    return seen, lambda: event.remove(engine, "before_cursor_execute", listener)
+
+
+def test_full_league_csv_in_a_few_statements():
+    body = "name,position,team,status,my_team\n" + "\n".join(f"{n},{p},{t},bench,0" for n, p, t in LEAGUE)
+    seen, stop = _count_statements()
+    try:
+        with Session(engine) as s:
+            res = import_roster_csv(s, body)
+            s.commit()
+    finally:
+        stop()
+    assert res["count"] == 240 and res["rejected"] == 0
+    # Player index, roster lookup, batched insert, dashboard/cache bookkeeping, commit
+    assert len(seen) < 20, seen
+    with Session(engine) as s:
+        rows = s.exec(select(Roster).join(Player, Roster.player_id == Player.id).where(Player.name.like("Leaguer %"))).all()
+    assert len(rows) == 240 and not any(r.my_team for r in rows)
+
+
+def test_invalid_and_unmatched_rows_are_reported_not_created():
+    body = (
+        "Name, Position, Team, Status\n"
+        "Patrick Mahomes,QB,KC,start\n"
+        "\n"
+        "Nobody Atall,WR,NYJ,bench\n"
+        "Josh Allen,LB,BUF,bench\n"
+        "Travis Kelce,TE,KC,benched\n"
+        "Chiefs D/ST,D/ST,KC,bench\n"
+    )
+    with Session(engine) as s:
+        res = import_roster_csv(s, body)
+        s.commit()
+        assert res["count"] == 2
+        assert [(e["line"], e["error"]) for e in res["errors"]] == [
+            (4, "no matching player"), (5, "unknown position 'LB'"), (6, "unknown status 'benched'"),
+        ]
+        assert s.exec(select(Player).where(Player.name == "Nobody Atall")).first() is None
+        mahomes = s.exec(select(Player).where(Player.name == "Patrick Mahomes")).one()
+        assert s.exec(select(Roster).where(Roster.player_id == mahomes.id)).one().status == RosterStatus.start
+        res = import_roster_csv(s, "name,position,team,status\nNobody Atall,WR,NYJ,bench\n", create_missing=True)
+        s.commit()
+        assert res["created"] == 1
+        assert s.exec(select(Player).where(Player.name == "Nobody Atall")).one().position == "WR"
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from sqlmodel import Session, select
+from backend.app.db import engine, init_db
+from backend.app.seeds.seed import run as seed_run
+from backend.app.models import Projection
+from ingest.providers.dvp import parse_dvp
+from ingest.tables import iter_table, iter_tables, select_columns, column, clean_names, extract_teams, to_float
+from ingest.util import PlayerResolver, bulk_upsert_projections
+
+
+PAGES = Path(__file__).parent / "fixtures" / "pages"
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_projection_table_rows():
+    html = (PAGES / "fp_projections_qb.html").read_bytes()
+    rows = list(select_columns(iter_table(html), column("PLAYER"), column(contains=("FPTS",)), required=(1,)))
+    assert len(rows) == 40
+    raws = [r[0] for r in rows]
+    names, teams = clean_names(raws), extract_teams(raws)
+    # "Name TEAM" cells split into clean name + team abbreviation
+    assert all(n and not n.endswith(t) for n, t in zip(names, teams))
+    assert all(t and t.isupper() for t in teams)
+    assert all(to_float(r[1]) > 0 for r in rows)
+
+
+def test_table_selected_by_header():
+    html = (PAGES / "espn_livedraftresults.html").read_bytes()
+    rows = list(iter_table(html, where=lambda h: "PLAYER" in h))
+    assert rows[0][:2] == ("RANK", "PLAYER")
+    assert len(rows) == 101
+
+
+def test_bulk_upsert_projections():
+    with Session(engine) as session:
+        resolver = PlayerResolver(session)
+        pid = resolver.resolve("Patrick Mahomes", position="QB", team="KC")
+        assert resolver.resolve("patrick mahomes KC") == pid
+        bulk_upsert_projections(session, 17, "fantasypros", [(pid, 21.5, 2.5)])
+        bulk_upsert_projections(session, 17, "fantasypros", [(pid, 23.0, 2.5)])
+        session.flush()
+        rows = session.exec(select(Projection).where(Projection.week == 17, Projection.player_id == pid)).all()
+        assert [r.expected for r in rows] == [23.0]
+        session.rollback()
+
+
+def test_every_matching_table_is_read():
+    html = (
+        "<table><tr><th>NAV</th></tr><tr><td>x</td></tr></table>"
+        "<table><tr><th>PLAYER</th><th>ADP</th></tr><tr><td>A</td><td>1.5</td></tr></table>"
+        "<table><tr><th>PLAYER</th><th>ADP</th></tr><tr><td>B</td><td>2.5</td></tr><tr><td>C</td><td>3.5</td></tr></table>"
+    )
+    tables = list(iter_tables(html, where=lambda h: "ADP" in h))
+    assert tables == [[("PLAYER", "ADP"), ("A", "1.5")], [("PLAYER", "ADP"), ("B", "2.5"), ("C", "3.5")]]
+    assert len(list(iter_tables(html))) == 3
+    assert list(iter_table(html, where=lambda h: "ADP" in h)) == tables[0]
+
+
+def test_dvp_points_column_is_chosen_per_table():
+    # A blank FPTS cell must not fall back to that row's (real-points) PTS cell
+    html = "<table><tr><th>TEAM</th><th>PTS</th><th>FPTS</th></tr><tr><td>KC</td><td>24</td><td>18.5</td></tr><tr><td>BUF</td><td>21</td><td></td></tr></table>"
+    assert parse_dvp(html) == [("KC", 1, 18.5), ("BUF", 2, None)]
+    pts_only = "<table><tr><th>TEAM</th><th>PTS</th></tr><tr><td>KC</td><td>24</td></tr></table>"
+    assert parse_dvp(pts_only) == [("KC", 1, 24.0)]
+    assert parse_dvp((PAGES / "fp_dvp_qb.html").read_bytes())
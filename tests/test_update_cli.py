@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.models import Player, Projection
+from backend.app.seeds.seed import run as seed_run
+from ingest.transport import use_replay
+from ingest import update
+from ingest.update import main, parse_weeks
+from ingest.util import PlayerResolver
+
+
+REPLAY = Path(__file__).parent / "fixtures" / "replay"
+
+
+def setup_module():
+    init_db()
+    seed_run()
+
+
+def test_parse_weeks():
+    assert parse_weeks("1-3") == [1, 2, 3]
+    assert parse_weeks("5,1-2,2") == [1, 2, 5]
+
+
+def test_shared_resolver_creates_once():
+    resolver = PlayerResolver.shared(engine)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        ids = set(pool.map(lambda _: resolver.resolve("Backfill Rookie", position="WR"), range(8)))
+    assert len(ids) == 1
+    with Session(engine) as session:
+        assert len(session.exec(select(Player).where(Player.name == "Backfill Rookie")).all()) == 1
+
+
+def test_backfill_weeks_offline(capsys):
+    with use_replay(REPLAY):
+        main(["--weeks", "1-2", "--sources", "fantasypros,espn", "--workers", "2"])
+    out = capsys.readouterr().out
+    assert "fantasypros" in out and "ERR" not in out
+    with Session(engine) as session:
+        rows = session.exec(select(Projection).where(Projection.week == 2, Projection.source == "fantasypros")).all()
+        assert len(rows) == 86
+
+
+def test_failing_source_rolls_back_only_its_writes(monkeypatch):
+    def broken(session, week, resolver):
+        session.add(Player(name="Half Written", position="WR"))
+        session.flush()
+        raise RuntimeError("feed went away")
+
+    def fine(session, week, resolver):
+        session.add(Player(name="Fully Written", position="WR"))
+        return 1
+
+    monkeypatch.setitem(update.WEEK_SOURCES, "broken", broken)
+    monkeypatch.setitem(update.WEEK_SOURCES, "fine", fine)
+    results = update.run_week(3, ["broken", "fine"], None)
+    assert results["broken"][0] is None and results["broken"][2] == "RuntimeError: feed went away"
+    assert results["fine"][0] == 1 and results["fine"][2] is None
+    with Session(engine) as session:
+        names = set(session.exec(select(Player.name).where(Player.name.in_(["Half Written", "Fully Written"]))).all())
+    assert names == {"Fully Written"}
+    table = update.format_summary({"3": results}, ["broken", "fine"])
+    assert "ERR" in table and "3 broken: RuntimeError: feed went away" in table
@@ -0,0 +1,47 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+from sqlmodel import Session, select
+
+from backend.app.db import engine, init_db
+from backend.app.models import Game
+from backend.app.services.schedule import clear_weather_cache, fetch_weather_for_week, upsert_game
+from ingest.transport import use_transport
+
+
+WEEK = 17
+FORECAST = {"hourly": {"temperature_2m": [1.0, 2.0, 3.0], "precipitation_probability": [0, 10, 20], "wind_speed_10m": [5.0, 6.0, 7.0]}}
+
+
+def setup_module():
+    init_db()
+
+
+def test_weather_dedupes_by_location_and_hour():
+    kickoff = datetime(2026, 12, 27, 18, 0)
+    with Session(engine) as session:
+        # NYG/NYJ share a stadium and slot; KC is a separate location
+        upsert_game(session, WEEK, "NYG", "DAL", True, kickoff)
+        upsert_game(session, WEEK, "NYJ", "MIA", True, kickoff.replace(minute=30))
+        upsert_game(session, WEEK, "KC", "DEN", True, kickoff)
+        session.commit()
+
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.params["latitude"])
+        return httpx.Response(200, json=FORECAST)
+
+    clear_weather_cache()
+    with use_transport(httpx.MockTransport(handler)):
+        with Session(engine) as session:
+            assert asyncio.run(fetch_weather_for_week(session, WEEK)) == 3
+        assert len(seen) == 2
+        with Session(engine) as session:
+            # Second refresh within the TTL is served from the cache
+            assert asyncio.run(fetch_weather_for_week(session, WEEK)) == 3
+        assert len(seen) == 2
+    with Session(engine) as session:
+        games = session.exec(select(Game).where(Game.week == WEEK)).all()
+        assert {g.weather["wind_kmh"] for g in games} == {6.0}